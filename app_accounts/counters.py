@@ -0,0 +1,201 @@
+# app_accounts/counters.py
+"""
+Write-behind profile view counters.
+
+public_profile() calls ``incr(profile_id)``. Increments are summed in a
+per-process dict keyed by (profile, local date) and a daemon thread writes
+them every FLUSH_INTERVAL seconds, one UPDATE per (date, amount) group.
+
+The UPDATE is self-rolling: CASE on last_viewed decides whether each of
+daily / monthly / yearly_views continues (same day / month / year), starts
+over (older window) or is left alone (the row already moved past this
+date), so workers may flush in any order. ``rollover()`` only zeroes
+counters whose window has ended, for profiles nobody viewed since; the
+run_scheduler command calls it.
+
+settings.VIEW_COUNTERS["MODE"]: "buffered" (default) or "sync".
+"""
+import atexit
+import logging
+import threading
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Case, F, Q, Sum, Value, When
+
+from app_analytics.rollups import today
+
+from .models import CustomUser
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "MODE": "buffered",
+    "FLUSH_INTERVAL": 5.0,   # seconds
+    "MAX_PENDING": 1000,     # distinct profiles before an early flush
+}
+
+
+def counter_settings():
+    conf = dict(DEFAULTS)
+    conf.update(getattr(settings, "VIEW_COUNTERS", {}))
+    return conf
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def next_month_start(day):
+    return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+
+
+def year_start(day):
+    return day.replace(month=1, day=1)
+
+
+def add_views(profile_ids, day, n=1):
+    """Add n views on ``day`` to every profile in profile_ids (one UPDATE)."""
+    def window(field, start, end):
+        return Case(
+            When(last_viewed__gte=end, then=F(field)),
+            When(last_viewed__gte=start, then=F(field) + n),
+            default=Value(n),
+        )
+
+    return CustomUser.objects.filter(pk__in=profile_ids).update(
+        daily_views=window("daily_views", day, day + timedelta(days=1)),
+        monthly_views=window("monthly_views", month_start(day), next_month_start(day)),
+        yearly_views=window("yearly_views", year_start(day), date(day.year + 1, 1, 1)),
+        last_viewed=Case(
+            When(last_viewed__gt=day, then=F("last_viewed")),
+            default=Value(day),
+        ),
+    )
+
+
+def rollover(day=None):
+    """
+    Zero the counters of profiles whose window ended without new views.
+
+    Idempotent and only touches stale rows, so it is safe to run often.
+    Returns the number of rows changed per counter.
+    """
+    day = day or today()
+    stale = CustomUser.objects.filter(Q(last_viewed__isnull=True) | Q(last_viewed__lt=day))
+    return {
+        "daily_views": stale.exclude(daily_views=0).update(daily_views=0),
+        "monthly_views": stale.filter(
+            Q(last_viewed__isnull=True) | Q(last_viewed__lt=month_start(day))
+        ).exclude(monthly_views=0).update(monthly_views=0),
+        "yearly_views": stale.filter(
+            Q(last_viewed__isnull=True) | Q(last_viewed__lt=year_start(day))
+        ).exclude(yearly_views=0).update(yearly_views=0),
+    }
+
+
+def current_views(profiles, day=None):
+    """Summed daily / monthly / yearly views, ignoring windows that already ended."""
+    day = day or today()
+    return profiles.aggregate(
+        daily_views=Sum("daily_views", filter=Q(last_viewed=day), default=0),
+        monthly_views=Sum("monthly_views", filter=Q(last_viewed__gte=month_start(day)), default=0),
+        yearly_views=Sum("yearly_views", filter=Q(last_viewed__gte=year_start(day)), default=0),
+    )
+
+
+# ───────────────────────────────────────────────
+class ViewCounterBuffer:
+
+    def __init__(self, flush_interval=5.0, max_pending=1000):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._pending = Counter()      # (profile_id, date) → views
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def __len__(self):
+        return len(self._pending)
+
+    def start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stopped.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="view-counter-flusher", daemon=True
+            )
+            self._thread.start()
+
+    def incr(self, profile_id, n=1, day=None):
+        with self._lock:
+            self._pending[(profile_id, day or today())] += n
+            pending = len(self._pending)
+        if pending >= self.max_pending:
+            self._wakeup.set()
+
+    def flush(self):
+        """Write pending increments. Returns the number of UPDATEs issued."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, Counter()
+
+            groups = defaultdict(list)
+            for (profile_id, day), n in pending.items():
+                groups[(day, n)].append(profile_id)
+
+            # oldest day first, so last_viewed only moves forward
+            for (day, n), ids in sorted(groups.items()):
+                try:
+                    add_views(ids, day, n)
+                except Exception:
+                    logger.exception("View counter flush failed, dropped %s views", n * len(ids))
+            return len(groups)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            if not len(self):
+                continue
+            close_old_connections()
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+
+    def stop(self):
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout=max(self.flush_interval, 1.0) * 2)
+        self.flush()
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer():
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                conf = counter_settings()
+                buf = ViewCounterBuffer(conf["FLUSH_INTERVAL"], conf["MAX_PENDING"])
+                buf.start()
+                atexit.register(buf.stop)
+                _buffer = buf
+    return _buffer
+
+
+def incr(profile_id, n=1):
+    if counter_settings()["MODE"] == "buffered":
+        get_buffer().incr(profile_id, n)
+    else:
+        add_views([profile_id], today(), n)
@@ -1,7 +1,7 @@
-from datetime import date
-from .models import UserProfile
+from . import counters
+
 
 def reset_daily_views():
-    today = date.today()
-    UserProfile.objects.update(daily_views=0, last_viewed=today)
-    print(f"[CRON JOB] ✅ Daily views reset successfully at {today}")
+    """Kept for existing crontabs; prefer `manage.py run_scheduler`."""
+    result = counters.rollover()
+    print(f"[CRON JOB] ✅ View counters rolled over: {result}")
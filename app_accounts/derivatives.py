@@ -0,0 +1,298 @@
+# app_accounts/derivatives.py
+"""
+Resized WebP / JPEG derivatives of uploaded images (profile pictures,
+company logos).
+
+Saving a model whose image changed queues a job (after commit); one
+daemon thread per process reads the upload and hands the bytes to a
+process pool, where Pillow produces every configured size ("avatar",
+"card", "full") in every configured format. Nothing is upscaled. Files
+are stored as <DIR>/<h[:2]>/<h>.<ext>, h being a hash of the encoded
+output, so a name never changes content and identical uploads share
+files. The result is written to the model's "<field>_variants" JSON:
+
+    {"source": "profile_pics/me.jpg",
+     "sizes": {"avatar": {"width": 128, "height": 128,
+                          "webp": "derived/3f/3f….webp", "jpeg": "…"}, …}}
+
+``url()`` only uses variants whose "source" is the current file name,
+and falls back to the original upload, so templates never point at a
+stale or missing derivative. The row's updated_at is bumped when
+variants land, which invalidates pages cached against it.
+
+render() only needs Pillow and runs in spawned worker processes; keep
+this module free of model imports at import time.
+"""
+import hashlib
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "ENABLED": True,
+    "MODE": "pool",          # "pool" → process pool, "thread" → render in the worker thread
+    "WORKERS": 2,            # pool processes
+    "DIR": "derived",        # storage prefix
+    "SIZES": {"avatar": 128, "card": 400, "full": 1200},   # px, longest side
+    "FORMATS": ["webp", "jpeg"],
+    "FORMAT": "webp",        # what url() serves
+    "QUALITY": 82,
+}
+
+EXTENSIONS = {"webp": "webp", "jpeg": "jpg"}
+
+Job = namedtuple("Job", "model pk field name")
+
+
+def derivative_settings():
+    conf = dict(DEFAULTS)
+    conf.update(getattr(settings, "IMAGE_DERIVATIVES", {}))
+    return conf
+
+
+def variants_field(field):
+    return f"{field}_variants"
+
+
+# ───────────────────────────────────────────────
+# rendering (worker processes)
+def _flatten(image):
+    """RGB copy for JPEG, transparent areas on white."""
+    if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    return image.convert("RGB") if image.mode != "RGB" else image
+
+
+def render(data, sizes, formats, quality):
+    """{size: {"width", "height", <format>: bytes}} for one source image."""
+    source = ImageOps.exif_transpose(Image.open(BytesIO(data)))
+    if source.mode not in ("RGB", "RGBA"):
+        source = source.convert("RGBA" if "transparency" in source.info or "A" in source.mode else "RGB")
+
+    out = {}
+    for size, px in sizes.items():
+        image = source.copy()
+        image.thumbnail((px, px), Image.LANCZOS)
+        entry = {"width": image.width, "height": image.height}
+        for fmt in formats:
+            buf = BytesIO()
+            if fmt == "webp":
+                image.save(buf, "WEBP", quality=quality, method=4)
+            else:
+                _flatten(image).save(buf, "JPEG", quality=quality, optimize=True, progressive=True)
+            entry[fmt] = buf.getvalue()
+        out[size] = entry
+    return out
+
+
+# ───────────────────────────────────────────────
+# storing (web process)
+def _model_field(job):
+    model = apps.get_model(job.model)
+    return model, model._meta.get_field(job.field)
+
+
+def save_file(storage, data, fmt, conf):
+    digest = hashlib.sha256(data).hexdigest()[:32]
+    name = f"{conf['DIR']}/{digest[:2]}/{digest}.{EXTENSIONS[fmt]}"
+    if storage.exists(name):
+        return name
+    return storage.save(name, ContentFile(data))
+
+
+def store(job, rendered, conf=None):
+    """Write rendered files and the variants JSON, unless the image changed meanwhile."""
+    conf = conf or derivative_settings()
+    model, field = _model_field(job)
+    variants = {"source": job.name, "sizes": {}}
+    for size, entry in (rendered or {}).items():
+        variants["sizes"][size] = {
+            "width": entry["width"],
+            "height": entry["height"],
+            **{fmt: save_file(field.storage, entry[fmt], fmt, conf) for fmt in conf["FORMATS"]},
+        }
+
+    values = {variants_field(job.field): variants}
+    if any(f.name == "updated_at" for f in model._meta.concrete_fields):
+        values["updated_at"] = timezone.now()
+    return model.objects.filter(pk=job.pk, **{job.field: job.name}).update(**values)
+
+
+def read_source(job):
+    """Bytes of the uploaded image, or None when there is nothing to read."""
+    _, field = _model_field(job)
+    if not job.name or not field.storage.exists(job.name):
+        return None
+    with field.storage.open(job.name, "rb") as fh:
+        return fh.read()
+
+
+def process(job, conf=None):
+    """Render and store in the calling thread."""
+    conf = conf or derivative_settings()
+    data = read_source(job)
+    rendered = render(data, conf["SIZES"], conf["FORMATS"], conf["QUALITY"]) if data else None
+    return store(job, rendered, conf)
+
+
+# ───────────────────────────────────────────────
+class DerivativeWorker:
+    """
+    One thread doing the Django side (storage, DB) of every job; the CPU
+    work goes to a process pool, whose results come back through the
+    same queue.
+    """
+
+    def __init__(self, conf=None):
+        self.conf = conf or derivative_settings()
+        self._queue = queue.Queue()
+        self._pending = set()
+        self._inflight = 0
+        self._lock = threading.Lock()
+        self._pool = None
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="image-derivatives", daemon=True)
+        self._thread.start()
+
+    def submit(self, job):
+        """Queue a job; returns False when the same one is already waiting."""
+        with self._lock:
+            if job in self._pending:
+                return False
+            self._pending.add(job)
+        self._queue.put(job)
+        return True
+
+    def pool(self):
+        if self._pool is None:
+            # spawn: forking a threaded web worker is not safe
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.conf["WORKERS"],
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._pool
+
+    def _render(self, job):
+        with self._lock:
+            self._pending.discard(job)
+        data = read_source(job)
+        if data is None or self.conf["MODE"] != "pool":
+            rendered = data and render(data, self.conf["SIZES"], self.conf["FORMATS"], self.conf["QUALITY"])
+            store(job, rendered, self.conf)
+            return
+        try:
+            future = self.pool().submit(render, data, self.conf["SIZES"], self.conf["FORMATS"], self.conf["QUALITY"])
+        except BrokenProcessPool:
+            self._pool = None     # a worker died earlier; start a fresh pool next time
+            raise
+        with self._lock:
+            self._inflight += 1
+        future.add_done_callback(lambda f: self._queue.put((job, f)))
+
+    def _store(self, job, future):
+        with self._lock:
+            self._inflight -= 1
+        try:
+            rendered = future.result()
+        except BrokenProcessPool:
+            self._pool = None
+            raise
+        store(job, rendered, self.conf)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            job = item if isinstance(item, Job) else item[0]
+            close_old_connections()
+            try:
+                if item is job:
+                    self._render(job)
+                else:
+                    self._store(*item)
+            except Exception:
+                logger.exception("Image derivatives failed for %s", job)
+            finally:
+                close_old_connections()
+                self._queue.task_done()
+
+    def join(self):
+        """Block until everything queued so far has been stored."""
+        while True:
+            self._queue.join()
+            with self._lock:
+                if not self._inflight:
+                    return
+            time.sleep(0.05)
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def get_worker():
+    global _worker
+    if _worker is None:
+        with _worker_lock:
+            if _worker is None:
+                worker = DerivativeWorker()
+                worker.start()
+                _worker = worker
+    return _worker
+
+
+# ───────────────────────────────────────────────
+def needs_update(instance, field):
+    name = getattr(instance, field).name or ""
+    if name and name == instance._meta.get_field(field).get_default():
+        # the shared placeholder every new account starts with: url() serves it as is
+        return False
+    variants = getattr(instance, variants_field(field)) or {}
+    return name != variants.get("source", "")
+
+
+def schedule(instance, field, update_fields=None):
+    """post_save hook: queue derivatives when ``field`` holds a new image."""
+    if not derivative_settings()["ENABLED"]:
+        return False
+    if update_fields is not None and field not in update_fields:
+        return False
+    if not needs_update(instance, field):
+        return False
+    job = Job(instance._meta.label, instance.pk, field, getattr(instance, field).name or "")
+    transaction.on_commit(lambda: get_worker().submit(job))
+    return True
+
+
+def url(file, size="card", fmt=None):
+    """URL of the ``size`` derivative of an ImageField value, else of the original ("" when empty)."""
+    if not file:
+        return ""
+    variants = getattr(file.instance, variants_field(file.field.name), None) or {}
+    if variants.get("source") == file.name:
+        entry = variants.get("sizes", {}).get(size) or {}
+        name = entry.get(fmt or derivative_settings()["FORMAT"])
+        if name:
+            return file.storage.url(name)
+    return file.url
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from app_accounts import derivatives
+from app_accounts.models import CustomUser
+from app_pages.models import Company
+
+TARGETS = [(CustomUser, "profile_picture"), (Company, "logo")]
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate resized WebP/JPEG copies of profile pictures and company logos "
+        "that do not have them yet (uploads from before the pipeline, or after "
+        "changing IMAGE_DERIVATIVES sizes with --force)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="rebuild images that already have derivatives")
+        parser.add_argument("--sync", action="store_true", help="render in this process instead of the pool")
+
+    def handle(self, *args, **opts):
+        worker = None if opts["sync"] else derivatives.get_worker()
+        queued = 0
+        for model, field in TARGETS:
+            rows = model.objects.exclude(**{field: ""}).exclude(**{f"{field}__isnull": True})
+            for obj in rows.only("pk", field, derivatives.variants_field(field)).iterator():
+                if not opts["force"] and not derivatives.needs_update(obj, field):
+                    continue
+                job = derivatives.Job(model._meta.label, obj.pk, field, getattr(obj, field).name)
+                if worker:
+                    worker.submit(job)
+                else:
+                    derivatives.process(job)
+                queued += 1
+
+        if worker:
+            worker.join()
+        self.stdout.write(self.style.SUCCESS(f"Built derivatives for {queued} images."))
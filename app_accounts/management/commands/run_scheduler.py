@@ -0,0 +1,56 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils.module_loading import import_string
+
+DEFAULT_JOBS = {
+    # idempotent, so hourly also covers a missed midnight
+    "rollover_view_counters": {"CALLABLE": "app_accounts.counters.rollover", "EVERY": 3600},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Run periodic jobs from settings.SCHEDULED_JOBS in a loop "
+        "(run one instance per deployment). Use --once from cron instead."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Run every job once and exit.")
+        parser.add_argument("--job", action="append", help="Only run these jobs (repeatable).")
+        parser.add_argument("--tick", type=float, default=30.0, help="Seconds between schedule checks.")
+
+    def handle(self, *args, **opts):
+        jobs = getattr(settings, "SCHEDULED_JOBS", DEFAULT_JOBS)
+        if opts["job"]:
+            jobs = {name: jobs[name] for name in opts["job"]}
+
+        if opts["once"]:
+            for name, job in jobs.items():
+                self.run_job(name, job)
+            return
+
+        next_run = {name: 0.0 for name in jobs}
+        self.stdout.write(f"Scheduler started: {', '.join(jobs)}")
+        try:
+            while True:
+                now = time.monotonic()
+                for name, job in jobs.items():
+                    if now >= next_run[name]:
+                        next_run[name] = now + job["EVERY"]
+                        self.run_job(name, job)
+                time.sleep(opts["tick"])
+        except KeyboardInterrupt:
+            self.stdout.write("Scheduler stopped.")
+
+    def run_job(self, name, job):
+        close_old_connections()
+        try:
+            result = import_string(job["CALLABLE"])()
+            self.stdout.write(self.style.SUCCESS(f"{name}: {result}"))
+        except Exception as e:
+            self.stderr.write(f"{name} failed: {e}")
+        finally:
+            close_old_connections()
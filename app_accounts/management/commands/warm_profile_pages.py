@@ -0,0 +1,45 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Sum
+
+from app_accounts import pagecache
+from app_accounts.models import CustomUser
+from app_analytics.models import DailyRollup
+from app_analytics.rollups import today
+
+
+class Command(BaseCommand):
+    help = (
+        "Pre-render the public pages of the most-viewed profiles into the page "
+        "cache (run after deploy). Needs a cache shared with the web workers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top", type=int, default=500, help="how many profiles")
+        parser.add_argument("--days", type=int, default=30, help="rank by views over the last N days")
+        parser.add_argument("--username", action="append", help="warm these profiles (repeatable)")
+
+    def handle(self, *args, **opts):
+        if not pagecache.pagecache_settings()["ENABLED"]:
+            raise CommandError("PUBLIC_PROFILE_CACHE is disabled.")
+
+        profiles = CustomUser.objects.filter(is_public=True).exclude(username=None)
+        if opts["username"]:
+            profiles = list(profiles.filter(username__in=opts["username"]))
+        else:
+            since = today() - timedelta(days=opts["days"] - 1)
+            ranked = list(
+                DailyRollup.objects
+                .filter(date__gte=since)
+                .values("profile_id")
+                .annotate(views=Sum("leads"))
+                .order_by("-views")
+                .values_list("profile_id", flat=True)[:opts["top"]]
+            )
+            by_id = profiles.in_bulk(ranked)
+            profiles = [by_id[pk] for pk in ranked if pk in by_id]
+
+        for profile in profiles:
+            pagecache.warm(profile)
+        self.stdout.write(self.style.SUCCESS(f"Warmed {len(profiles)} profile pages."))
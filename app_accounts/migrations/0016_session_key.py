@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:23
+
+import hashlib
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+# frozen copy of app_tracking.visitors.session_key as of this migration
+def session_key(ip, user_agent, when, window):
+    bucket = int(when.timestamp()) // window
+    h = hashlib.blake2b(digest_size=16, key=settings.SECRET_KEY.encode()[:64])
+    h.update(f"{ip or ''}\x00{user_agent or ''}\x00{bucket}".encode())
+    return h.hexdigest()
+
+
+def backfill_session_keys(apps, schema_editor):
+    window = int(getattr(settings, "TRACKING_INGEST", {}).get("SESSION_WINDOW", 30 * 60))
+    for name in ("ContactSaveLead", "ClickEvent"):
+        model = apps.get_model("app_accounts", name)
+        batch = []
+        rows = model.objects.filter(session_key="").only("device_ip", "user_agent", "timestamp")
+        for obj in rows.iterator(chunk_size=2000):
+            obj.session_key = session_key(obj.device_ip, obj.user_agent, obj.timestamp, window)
+            batch.append(obj)
+            if len(batch) >= 2000:
+                model.objects.bulk_update(batch, ["session_key"])
+                batch = []
+        if batch:
+            model.objects.bulk_update(batch, ["session_key"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_accounts', '0015_alter_clickevent_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='clickevent',
+            name='session_key',
+            field=models.CharField(blank=True, default='', max_length=32),
+        ),
+        migrations.AddField(
+            model_name='contactsavelead',
+            name='session_key',
+            field=models.CharField(blank=True, default='', max_length=32),
+        ),
+        migrations.AddIndex(
+            model_name='clickevent',
+            index=models.Index(fields=['profile', 'session_key'], name='click_profile_session_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contactsavelead',
+            index=models.Index(fields=['profile', 'session_key'], name='lead_profile_session_idx'),
+        ),
+        migrations.RunPython(backfill_session_keys, migrations.RunPython.noop),
+    ]
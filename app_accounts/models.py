@@ -12,6 +12,8 @@ from django.contrib.auth.models import (
     AbstractBaseUser, PermissionsMixin, BaseUserManager
 )
 
+from . import derivatives
+
 # ======================================================
 #   USER CREATION MANAGER
 # ======================================================
@@ -90,6 +92,8 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
         blank=True,
         default="default.png"
     )
+    # resized copies, filled in by app_accounts.derivatives
+    profile_picture_variants = models.JSONField(default=dict, blank=True, editable=False)
 
     # ========== SOCIAL LINKS ==========
     facebook = models.URLField(null=True, blank=True)
@@ -198,6 +202,9 @@ class ContactSaveLead(models.Model):
 
     timestamp = models.DateTimeField(auto_now_add=True, db_index=True)
 
+    # IP + UA + time window hash, shared with this visitor's ClickEvents
+    session_key = models.CharField(max_length=32, blank=True, default="")
+
     # --------------------------------------------------
     def location_label(self):
         if self.latitude and self.longitude:
@@ -218,7 +225,7 @@ class ContactSaveLead(models.Model):
         if not self.visitor:
             return None, None
         name = self.visitor.full_name or self.visitor.email
-        avatar = getattr(self.visitor.profile_picture, "url", None) or ""
+        avatar = derivatives.url(self.visitor.profile_picture, "avatar")
         return name, avatar
 
     def __str__(self):
@@ -231,6 +238,7 @@ class ContactSaveLead(models.Model):
             models.Index(fields=["city"]),
             models.Index(fields=["country"]),
             models.Index(fields=["location_source"]),
+            models.Index(fields=["profile", "session_key"], name="lead_profile_session_idx"),
         ]
 
 
@@ -253,6 +261,9 @@ class ClickEvent(models.Model):
 
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    # see ContactSaveLead.session_key
+    session_key = models.CharField(max_length=32, blank=True, default="")
+
     # --------------------------------------------------
     def __str__(self):
         return f"{self.profile.username} → {self.button_type}"
@@ -261,4 +272,5 @@ class ClickEvent(models.Model):
         ordering = ["-timestamp"]
         indexes = [
             models.Index(fields=["profile", "timestamp"]),
+            models.Index(fields=["profile", "session_key"], name="click_profile_session_idx"),
         ]
@@ -0,0 +1,104 @@
+# app_accounts/pagecache.py
+"""
+Rendered public_profile pages, cached per profile.
+
+An entry lives under "public_profile:<username>" and remembers the
+profile's updated_at; a lookup only hits when the row still has that
+updated_at, so a stale page can never be served, even from a cache that
+missed an invalidation. ``post_save`` / ``post_delete`` of CustomUser
+drop the entry straight away (profile edits, picture removal,
+toggle_public_view).
+
+Pages are rendered as an anonymous visitor with a placeholder where the
+CSRF token goes; ``respond()`` swaps in the requesting browser's token,
+so one cached body serves everybody. Logged-in visitors and requests
+carrying flash messages get the normal, personalised render.
+"""
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.template.loader import render_to_string
+
+DEFAULTS = {
+    "ENABLED": True,
+    "CACHE": "default",      # alias in settings.CACHES
+    "TIMEOUT": 60 * 60 * 24,
+}
+
+TEMPLATE = "accounts/public_profile.html"
+CSRF_PLACEHOLDER = "__public_profile_csrf_token__"
+
+# saves touching only these fields leave the rendered page unchanged
+UNRENDERED_FIELDS = frozenset({
+    "last_login", "daily_views", "monthly_views", "yearly_views", "last_viewed", "save_count",
+})
+
+
+def pagecache_settings():
+    conf = dict(DEFAULTS)
+    conf.update(getattr(settings, "PUBLIC_PROFILE_CACHE", {}))
+    return conf
+
+
+def get_cache():
+    return caches[pagecache_settings()["CACHE"]]
+
+
+def cache_key(username):
+    return f"public_profile:{username}"
+
+
+def version(updated_at):
+    return updated_at.isoformat() if updated_at else ""
+
+
+def cacheable(request):
+    """Only anonymous GETs without pending flash messages share a page."""
+    if not pagecache_settings()["ENABLED"] or request.method not in ("GET", "HEAD"):
+        return False
+    if request.user.is_authenticated:
+        return False
+    storage = getattr(request, "_messages", None)
+    return not (storage is not None and len(storage))
+
+
+# ───────────────────────────────────────────────
+def render_page(profile):
+    """The page as an anonymous visitor sees it, CSRF token left as a placeholder."""
+    return render_to_string(TEMPLATE, {
+        "profile": profile,
+        "user": AnonymousUser(),
+        "messages": [],
+        "csrf_token": CSRF_PLACEHOLDER,
+    })
+
+
+def get(username, updated_at):
+    entry = get_cache().get(cache_key(username))
+    if entry and entry["version"] == version(updated_at):
+        return entry["html"]
+    return None
+
+
+def store(profile, html):
+    get_cache().set(
+        cache_key(profile.username),
+        {"version": version(profile.updated_at), "html": html},
+        pagecache_settings()["TIMEOUT"],
+    )
+
+
+def warm(profile):
+    html = render_page(profile)
+    store(profile, html)
+    return html
+
+
+def invalidate(*usernames):
+    get_cache().delete_many([cache_key(u) for u in usernames if u])
+
+
+def respond(request, html):
+    return HttpResponse(html.replace(CSRF_PLACEHOLDER, get_token(request)))
@@ -0,0 +1,161 @@
+# app_accounts/qr.py
+"""
+QR codes for profile links, rendered once and kept on disk.
+
+A code is stored at <DIR>/<k[:2]>/<k>.<format>, where k hashes the
+target URL together with the render options (box size, border, error
+correction, format), so the same request is a file read and any option
+change is a new file. Files are written to a temp name and renamed into
+place, so concurrent workers never serve a half-written code.
+
+``stream_zip()`` packs many codes into a ZIP on the fly: the archive is
+written to a non-seekable sink (entries use data descriptors) and handed
+out piece by piece, so memory stays flat however many profiles there are.
+"""
+import hashlib
+import io
+import json
+import os
+import tempfile
+import zipfile
+from pathlib import Path
+
+import qrcode
+import qrcode.image.svg
+from django.conf import settings
+
+DEFAULTS = {
+    "DIR": None,             # default: BASE_DIR / "cache" / "qr"
+    "SIZE": 10,              # px per module
+    "BORDER": 4,             # modules of quiet zone
+    "ERROR_CORRECTION": "M",
+    "FORMAT": "png",
+}
+
+FORMATS = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+}
+
+ERROR_CORRECTION = {
+    "L": qrcode.constants.ERROR_CORRECT_L,
+    "M": qrcode.constants.ERROR_CORRECT_M,
+    "Q": qrcode.constants.ERROR_CORRECT_Q,
+    "H": qrcode.constants.ERROR_CORRECT_H,
+}
+
+MAX_SIZE = 40
+
+
+def qr_settings():
+    conf = dict(DEFAULTS)
+    conf.update(getattr(settings, "QR_CODES", {}))
+    conf["DIR"] = Path(conf["DIR"] or Path(settings.BASE_DIR) / "cache" / "qr")
+    return conf
+
+
+def options(size=None, error_correction=None, fmt=None, border=None):
+    """Normalised render options; raises ValueError on anything unsupported."""
+    conf = qr_settings()
+    opts = {
+        "size": int(size or conf["SIZE"]),
+        "border": int(conf["BORDER"] if border is None else border),
+        "error_correction": (error_correction or conf["ERROR_CORRECTION"]).upper(),
+        "format": (fmt or conf["FORMAT"]).lower(),
+    }
+    if not 1 <= opts["size"] <= MAX_SIZE:
+        raise ValueError(f"size must be 1-{MAX_SIZE}")
+    if opts["border"] < 0:
+        raise ValueError("border must be >= 0")
+    if opts["error_correction"] not in ERROR_CORRECTION:
+        raise ValueError("error_correction must be one of L, M, Q, H")
+    if opts["format"] not in FORMATS:
+        raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+    return opts
+
+
+def cache_key(url, opts):
+    payload = json.dumps({"url": url, **opts}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+def render(url, opts):
+    code = qrcode.QRCode(
+        error_correction=ERROR_CORRECTION[opts["error_correction"]],
+        box_size=opts["size"],
+        border=opts["border"],
+    )
+    code.add_data(url)
+    code.make(fit=True)
+    out = io.BytesIO()
+    if opts["format"] == "svg":
+        code.make_image(image_factory=qrcode.image.svg.SvgPathImage).save(out)
+    else:
+        code.make_image().save(out)
+    return out.getvalue()
+
+
+def path_for(url, opts, root=None):
+    """Path of the cached code, rendering it first when missing."""
+    key = cache_key(url, opts)
+    root = Path(root or qr_settings()["DIR"])
+    path = root / key[:2] / f"{key}.{opts['format']}"
+    if not path.exists():
+        data = render(url, opts)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+    return path
+
+
+# ───────────────────────────────────────────────
+class _Sink:
+    """Write-only, non-seekable file object that hands back what was written."""
+
+    def __init__(self):
+        self._chunks = []
+        self._pos = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._pos
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_zip(entries, chunk_size=64 * 1024):
+    """
+    Yield a ZIP archive of ``entries`` — (arcname, path) pairs, consumed
+    lazily — in pieces. PNGs are stored as-is, anything else deflated.
+    """
+    sink = _Sink()
+    with zipfile.ZipFile(sink, "w") as archive:
+        for arcname, path in entries:
+            compress = zipfile.ZIP_STORED if str(path).endswith(".png") else zipfile.ZIP_DEFLATED
+            info = zipfile.ZipInfo.from_file(path, arcname)
+            info.compress_type = compress
+            with open(path, "rb") as src, archive.open(info, "w") as dst:
+                while chunk := src.read(chunk_size):
+                    dst.write(chunk)
+                    if data := sink.drain():
+                        yield data
+            if data := sink.drain():
+                yield data
+    yield sink.drain()
@@ -0,0 +1,24 @@
+# app_accounts/signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import derivatives, pagecache
+from .models import CustomUser
+
+
+@receiver(post_save, sender=CustomUser)
+def invalidate_public_page(sender, instance, update_fields=None, **kwargs):
+    """Profile edits, picture removal and toggle_public_view all save here."""
+    if update_fields and set(update_fields) <= pagecache.UNRENDERED_FIELDS:
+        return
+    pagecache.invalidate(instance.username)
+
+
+@receiver(post_save, sender=CustomUser)
+def queue_picture_derivatives(sender, instance, update_fields=None, **kwargs):
+    derivatives.schedule(instance, "profile_picture", update_fields)
+
+
+@receiver(post_delete, sender=CustomUser)
+def drop_public_page(sender, instance, **kwargs):
+    pagecache.invalidate(instance.username)
@@ -0,0 +1,11 @@
+from django import template
+
+from app_accounts import derivatives
+
+register = template.Library()
+
+
+@register.filter
+def variant(file, size="card"):
+    """{{ profile.profile_picture|variant:"avatar" }} → URL of the resized copy (or the original)"""
+    return derivatives.url(file, size)
@@ -1,3 +1,568 @@
-from django.test import TestCase
+import base64
+import io
+import shutil
+import tempfile
+import zipfile
+import zlib
+from datetime import date
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db.models import Sum
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import AsyncClient, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from app_analytics import rollups
+from app_analytics.models import DailyRollup
+from app_pages.models import Company
+from app_tracking import ingest
+from middleware.cache_policy import CachePolicyMiddleware
+
+from . import counters, derivatives, pagecache, qr, vcard
+from .models import ClickEvent, ContactSaveLead, CustomUser
+from .views import USER_AGENT_MAX_LENGTH
+
+
+def cache_control(response):
+    """Cache-Control directives as a set, order-independent."""
+    return {d.strip() for d in response.get("Cache-Control", "").split(",") if d.strip()}
+
+
+class TempFilesMixin:
+    """Rendered pages (the "pages" file cache), QR codes and uploads go to a temp dir, not the repo."""
+
+    @classmethod
+    def setUpClass(cls):
+        tmp = Path(tempfile.mkdtemp(prefix="smartcard-tests-"))
+        cls.addClassCleanup(shutil.rmtree, tmp, ignore_errors=True)
+        files = override_settings(**cls.temp_settings(tmp))
+        files.enable()
+        cls.addClassCleanup(files.disable)
+        super().setUpClass()
+
+    @staticmethod
+    def temp_settings(tmp):
+        return {
+            "CACHES": {**settings.CACHES, "pages": {**settings.CACHES["pages"], "LOCATION": str(tmp / "pages")}},
+            "QR_CODES": {**getattr(settings, "QR_CODES", {}), "DIR": str(tmp / "qr")},
+            "MEDIA_ROOT": str(tmp / "media"),
+        }
+
+
+NO_STORE = {"private", "no-store"}
+REVALIDATE = {"private", "no-cache"}
+PUBLIC = {"public", "max-age=300", "stale-while-revalidate=3600"}
+
+
+@override_settings(VIEW_COUNTERS={"MODE": "sync"})
+class CachePolicyTests(TempFilesMixin, TestCase):
+    def setUp(self):
+        self.owner = CustomUser.objects.create_user(
+            email="owner@example.com", username="owner", password="pw", is_active=True, is_public=True,
+        )
+        self.company = Company.objects.create(owner=self.owner, name="Acme Ltd")
+
+    def test_public_profile_revalidates(self):
+        url = reverse("app_account:public_profile", args=[self.owner.username])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(cache_control(response), REVALIDATE)
+
+        not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(cache_control(not_modified), REVALIDATE)
+
+    def test_vcard_is_public(self):
+        response = self.client.get(reverse("app_account:download_contact_vcard", args=[self.owner.username]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(cache_control(response), PUBLIC)
+
+    def test_company_public_pages_are_public(self):
+        page = self.client.get(reverse("app_pages:company_public_slug", args=[self.company.slug]))
+        self.assertEqual(page.status_code, 200)
+        self.assertEqual(cache_control(page), PUBLIC)
+
+        by_uid = self.client.get(reverse("app_pages:company_public_uid", args=[self.company.uid]))
+        self.assertEqual(by_uid.status_code, 302)
+        self.assertEqual(cache_control(by_uid), PUBLIC)
+
+    def test_qr_downloads(self):
+        self.client.force_login(self.owner)
+        code = self.client.get(reverse("app_account:download_qr", args=[self.owner.pk]))
+        self.assertEqual(code.status_code, 200)
+        self.assertEqual(cache_control(code), {"private", "max-age=86400"})
+        code.close()
+
+        archive = self.client.get(reverse("app_account:download_qr_zip"))
+        self.assertEqual(archive.status_code, 200)
+        self.assertEqual(cache_control(archive), NO_STORE)
+        archive.close()
+
+    async def test_live_stream_revalidates(self):
+        client = AsyncClient()
+        await client.aforce_login(self.owner)
+        response = await client.get(reverse("app_account:profile_live_events", args=[self.owner.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertEqual(cache_control(response), REVALIDATE)
+        response.close()
+
+    def test_live_stream_under_wsgi_is_not_stored(self):
+        self.client.force_login(self.owner)
+        response = self.client.get(reverse("app_account:profile_live_events", args=[self.owner.pk]))
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(cache_control(response), NO_STORE)
+
+    def test_dashboard_is_never_stored(self):
+        url = reverse("app_account:dashboard")
+        anonymous = self.client.get(url)
+        self.assertEqual(anonymous.status_code, 302)
+        self.assertEqual(cache_control(anonymous), NO_STORE)
+
+        self.client.force_login(self.owner)
+        logged_in = self.client.get(url)
+        self.assertEqual(logged_in.status_code, 200)
+        self.assertEqual(cache_control(logged_in), NO_STORE)
+
+    def test_not_found_is_never_stored(self):
+        response = self.client.get(reverse("app_account:public_profile", args=["nobody"]))
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(cache_control(response), NO_STORE)
+
+    def test_post_is_never_stored(self):
+        response = self.client.post(reverse("app_account:download_contact_vcard", args=[self.owner.username]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(cache_control(response), NO_STORE)
+
+    def test_media_paths(self):
+        middleware = CachePolicyMiddleware(lambda request: HttpResponse(b"img"))
+        factory = RequestFactory()
+
+        derived = middleware(factory.get("/media/derived/3f/3f00.webp"))
+        self.assertEqual(cache_control(derived), {"public", "max-age=31536000", "immutable"})
+        upload = middleware(factory.get("/media/profile_pics/me.jpg"))
+        self.assertEqual(cache_control(upload), {"public", "max-age=3600", "stale-while-revalidate=86400"})
+
+    def test_public_policy_is_private_when_response_sets_cookie(self):
+        policy = {**settings.CACHE_POLICY, "ROUTES": {"app_accounts:public_profile": "public"}}
+        with override_settings(CACHE_POLICY=policy):
+            # the page hands out a CSRF token, which sets the csrftoken cookie
+            response = self.client.get(reverse("app_account:public_profile", args=[self.owner.username]))
+        self.assertIn("csrftoken", response.cookies)
+        self.assertEqual(cache_control(response), {"private", "max-age=300", "stale-while-revalidate=3600"})
+
+
+@override_settings(TRACKING_INGEST={"MODE": "sync"}, TRACKING_GEOCODER={"ENABLED": False})
+class TrackingClientTests(TestCase):
+    def setUp(self):
+        self.owner = CustomUser.objects.create_user(
+            email="owner@example.com", username="owner", password="pw", is_active=True, is_public=True,
+        )
+
+    def test_every_tracking_view_stores_the_same_ip_and_user_agent(self):
+        forwarded = "2001:db8:85a3:8d3:1319:8a2e:370:7348:ffff:ffff:ffff:ffff, 10.0.0.1"
+        headers = dict(HTTP_X_FORWARDED_FOR=forwarded, HTTP_USER_AGENT="x" * 5000)
+        self.client.get(reverse("app_account:track_visit", args=["owner"]), **headers)
+        self.client.post(reverse("app_account:click_track", args=["owner"]), {"action": "call"}, **headers)
+        self.client.post(reverse("app_account:track_save_gps", args=["owner"]), {"lat": "23.8", "lon": "90.4"}, **headers)
+
+        stored = {
+            (ip, len(ua))
+            for model in (ContactSaveLead, ClickEvent)
+            for ip, ua in model.objects.filter(profile=self.owner).values_list("device_ip", "user_agent")
+        }
+        self.assertEqual(stored, {(forwarded.split(",")[0][:50], USER_AGENT_MAX_LENGTH)})
+        self.assertEqual(ContactSaveLead.objects.filter(profile=self.owner).count(), 3)
+
+
+@override_settings(TRACKING_GEOCODER={"ENABLED": False})
+class TrackingViewTests(TestCase):
+    def setUp(self):
+        self.owner = CustomUser.objects.create_user(
+            email="owner@example.com", username="owner", password="pw", is_active=True, is_public=True,
+        )
+
+    def hit_all(self, client):
+        """One hit on each tracking view; returns their JSON bodies."""
+        return [
+            client.get(reverse("app_account:track_visit", args=["owner"]), {"lat": "23.81", "lon": "90.41", "accuracy": "8"}),
+            client.post(reverse("app_account:click_track", args=["owner"]), {"action": "Call"}),
+            client.post(reverse("app_account:track_save_gps", args=["owner"]), {"lat": "23.81", "lon": "90.41"}),
+        ]
+
+    def counts(self):
+        return (
+            ContactSaveLead.objects.filter(profile=self.owner).count(),
+            ClickEvent.objects.filter(profile=self.owner).count(),
+            DailyRollup.objects.filter(profile=self.owner).aggregate(n=Sum("leads"))["n"],
+        )
+
+    @override_settings(TRACKING_INGEST={"MODE": "sync"})
+    def test_sync_mode_writes_during_the_request(self):
+        responses = self.hit_all(self.client)
+
+        self.assertEqual([r.status_code for r in responses], [200, 200, 200])
+        self.assertEqual(responses[0].json()["source"], "GPS")
+        self.assertEqual(responses[1].json(), {"saved": True, "action": "call"})
+        self.assertIsNotNone(responses[2].json()["lead_id"])
+        self.assertEqual(self.counts(), (3, 1, 3))
+
+    @override_settings(TRACKING_INGEST={"MODE": "buffered"})
+    def test_buffered_mode_queues_until_the_flush(self):
+        # a local buffer without its flusher thread: the test decides when to write
+        buf = ingest.EventBuffer()
+        with mock.patch.object(ingest, "_buffer", buf):
+            responses = self.hit_all(self.client)
+
+        self.assertEqual([r.status_code for r in responses], [200, 200, 200])
+        self.assertIsNone(responses[2].json()["lead_id"])
+        self.assertEqual(len(buf), 4)
+        self.assertEqual(self.counts(), (0, 0, None))
+
+        self.assertEqual(buf.flush(), 4)
+        self.assertEqual(self.counts(), (3, 1, 3))
+
+
+@override_settings(TRACKING_INGEST={"MODE": "sync"}, TRACKING_GEOCODER={"ENABLED": False})
+class ProfileDashboardTests(TestCase):
+    def setUp(self):
+        self.owner = CustomUser.objects.create_user(
+            email="owner@example.com", username="owner", password="pw", is_active=True, is_public=True,
+        )
+        ingest.record(
+            leads=[
+                ContactSaveLead(profile=self.owner, device_ip=f"10.0.0.{i}", user_agent="test/1.0",
+                                country="Bangladesh", city="Dhaka", thana="Gulshan")
+                for i in range(3)
+            ],
+            clicks=[ClickEvent(profile=self.owner, button_type="call", device_ip="10.0.0.1")],
+        )
+        self.client.force_login(self.owner)
+
+    def get(self):
+        return self.client.get(reverse("app_account:profile_and_card_dashboard", args=[self.owner.pk]))
+
+    def test_unique_visitor_estimates_are_shown_with_their_error(self):
+        response = self.get()
+        self.assertEqual(
+            response.context["unique_visitors"],
+            [{"days": days, "count": 3, "margin": 0} for days in (7, 30, 365)],
+        )
+        self.assertContains(response, "Unique visitors, 30 days")
+        self.assertContains(response, "≈ 3")
+
+    def test_top_lists_show_counts_and_error_bounds(self):
+        with override_settings(ANALYTICS_TOPK_CAPACITY=2):
+            ingest.record(leads=[
+                ContactSaveLead(profile=self.owner, device_ip="10.0.1.1", user_agent="test/1.0",
+                                country=country, city="-", thana="-")
+                for country in ("India", "Nepal")
+            ])
+            response = self.get()
+        countries = dict(response.context["top_lists"])["Top countries"]
+        # Nepal evicted India from the full 2-counter summary: count 2, error 1
+        self.assertEqual([(h.item, h.count, h.error) for h in countries], [("Bangladesh", 3, 0), ("Nepal", 2, 1)])
+        self.assertContains(response, "Nepal —")
+        self.assertContains(response, "2 ± 1")
+        self.assertContains(response, "call —")
+
+
+class ViewCounterTests(TestCase):
+    def setUp(self):
+        self.owner = CustomUser.objects.create_user(email="owner@example.com", username="owner")
+
+    def views(self):
+        self.owner.refresh_from_db()
+        return (self.owner.daily_views, self.owner.monthly_views, self.owner.yearly_views, self.owner.last_viewed)
+
+    @override_settings(VIEW_COUNTERS={"MODE": "sync"})
+    def test_sync_incr_writes_at_once(self):
+        counters.incr(self.owner.pk)
+        counters.incr(self.owner.pk, 2)
+        self.assertEqual(self.views(), (3, 3, 3, rollups.today()))
+
+    def test_buffer_sums_increments_into_one_update(self):
+        other = CustomUser.objects.create_user(email="other@example.com", username="other")
+        buf = counters.ViewCounterBuffer()
+        day = date(2026, 5, 10)
+        for _ in range(3):
+            buf.incr(self.owner.pk, day=day)
+        buf.incr(other.pk, 3, day=day)
+
+        self.assertEqual(self.views(), (0, 0, 0, None))
+        self.assertEqual(buf.flush(), 1)        # both profiles: +3 on the same day
+        self.assertEqual(self.views(), (3, 3, 3, day))
+        self.assertEqual(len(buf), 0)
+
+    def test_windows_continue_or_start_over(self):
+        counters.add_views([self.owner.pk], date(2026, 5, 10), 2)
+        counters.add_views([self.owner.pk], date(2026, 5, 10), 1)
+        self.assertEqual(self.views(), (3, 3, 3, date(2026, 5, 10)))
+
+        counters.add_views([self.owner.pk], date(2026, 5, 11), 1)     # next day
+        self.assertEqual(self.views(), (1, 4, 4, date(2026, 5, 11)))
+        counters.add_views([self.owner.pk], date(2026, 6, 1), 1)      # next month
+        self.assertEqual(self.views(), (1, 1, 5, date(2026, 6, 1)))
+        counters.add_views([self.owner.pk], date(2027, 1, 2), 1)      # next year
+        self.assertEqual(self.views(), (1, 1, 1, date(2027, 1, 2)))
+
+    def test_late_flush_of_an_older_day_leaves_newer_windows_alone(self):
+        counters.add_views([self.owner.pk], date(2026, 5, 11), 1)
+        counters.add_views([self.owner.pk], date(2026, 5, 10), 5)     # another worker, behind
+        # same month and year still count it; the day window already moved on
+        self.assertEqual(self.views(), (1, 6, 6, date(2026, 5, 11)))
+
+    def test_rollover_zeroes_only_ended_windows(self):
+        counters.add_views([self.owner.pk], date(2026, 2, 28), 4)
+
+        self.assertEqual(
+            counters.rollover(date(2026, 2, 28)),
+            {"daily_views": 0, "monthly_views": 0, "yearly_views": 0},
+        )
+        counters.rollover(date(2026, 3, 1))
+        self.assertEqual(self.views(), (0, 0, 4, date(2026, 2, 28)))
+        counters.rollover(date(2027, 1, 1))
+        self.assertEqual(self.views(), (0, 0, 0, date(2026, 2, 28)))
+
+
+@override_settings(VIEW_COUNTERS={"MODE": "sync"})
+class PublicPageCacheTests(TempFilesMixin, TestCase):
+    def setUp(self):
+        self.owner = CustomUser.objects.create_user(
+            email="owner@example.com", username="owner", full_name="Rahim Uddin",
+            is_active=True, is_public=True,
+        )
+        self.url = reverse("app_account:public_profile", args=["owner"])
+
+    def test_hit_serves_the_anonymous_render_with_this_visitors_token(self):
+        self.client.get(self.url)
+        cached = pagecache.get("owner", self.owner.updated_at)
+        self.assertIn(pagecache.CSRF_PLACEHOLDER, cached)
+
+        # update() skips save(): no invalidation, same updated_at → must be a hit
+        CustomUser.objects.filter(pk=self.owner.pk).update(full_name="Changed Name")
+        response = self.client.get(self.url)
+
+        self.assertContains(response, "Rahim Uddin")
+        self.assertNotContains(response, "Changed Name")
+        before, after = cached.split(pagecache.CSRF_PLACEHOLDER, 1)
+        body = response.content.decode()
+        self.assertTrue(body.startswith(before) and body.endswith(after))
+        token = body[len(before):len(body) - len(after)]
+        self.assertEqual(len(token), 64)       # a masked CSRF token
+        self.assertIn("csrftoken", response.cookies)
+
+    def test_logged_in_visitors_get_a_fresh_render(self):
+        pagecache.store(self.owner, "cached page")
+        self.client.force_login(self.owner)
+        self.assertNotContains(self.client.get(self.url), "cached page")
+
+    def test_saving_the_profile_drops_the_entry(self):
+        pagecache.warm(self.owner)
+        self.owner.full_name = "New Name"
+        self.owner.save()
+        self.assertIsNone(pagecache.get_cache().get(pagecache.cache_key("owner")))
+        self.assertContains(self.client.get(self.url), "New Name")
+
+    def test_counter_only_saves_keep_the_entry(self):
+        pagecache.warm(self.owner)
+        self.owner.daily_views = 5
+        self.owner.save(update_fields=["daily_views"])
+        self.assertIsNotNone(pagecache.get_cache().get(pagecache.cache_key("owner")))
+
+    def test_deleting_the_profile_drops_the_entry(self):
+        pagecache.warm(self.owner)
+        self.owner.delete()
+        self.assertIsNone(pagecache.get_cache().get(pagecache.cache_key("owner")))
+
+
+class QRCodeTests(TempFilesMixin, TestCase):
+    URL = "https://example.com/p/abc"
+
+    def test_a_cached_code_is_not_rendered_again(self):
+        opts = qr.options()
+        with mock.patch.object(qr, "render", wraps=qr.render) as render:
+            first = qr.path_for(self.URL, opts)
+            second = qr.path_for(self.URL, opts)
+        self.assertEqual(render.call_count, 1)
+        self.assertEqual(first, second)
+        self.assertTrue(first.is_relative_to(settings.QR_CODES["DIR"]))
+
+        with mock.patch.object(qr, "render", wraps=qr.render) as render:
+            other = qr.path_for(self.URL, qr.options(size=5))
+        self.assertEqual(render.call_count, 1)
+        self.assertNotEqual(other, first)
+
+    def test_stream_zip_reads_back(self):
+        paths = {
+            "a.png": qr.path_for(self.URL, qr.options()),
+            "b.svg": qr.path_for(self.URL, qr.options(fmt="svg")),
+        }
+        data = b"".join(qr.stream_zip(iter(paths.items()), chunk_size=256))
+
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            self.assertIsNone(archive.testzip())
+            infos = archive.infolist()
+            self.assertEqual([i.filename for i in infos], list(paths))
+            self.assertEqual([i.compress_type for i in infos], [zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED])
+            for info in infos:
+                content = paths[info.filename].read_bytes()
+                self.assertEqual(info.CRC, zlib.crc32(content))
+                self.assertEqual(archive.read(info), content)
+
+    def test_zip_download_has_the_account_and_its_child_profiles(self):
+        owner = CustomUser.objects.create_user(
+            email="owner@example.com", username="owner", password="pw", is_active=True,
+        )
+        CustomUser.objects.create_user(email="child@example.com", username="child", parent_user=owner)
+        self.client.force_login(owner)
+
+        response = self.client.get(reverse("app_account:download_qr_zip"), {"format": "svg"})
+        self.assertIsInstance(response, StreamingHttpResponse)
+        with zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content))) as archive:
+            self.assertEqual(archive.namelist(), ["owner.svg", "child.svg"])
+            self.assertIsNone(archive.testzip())
+
+
+def png(width, height):
+    buf = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 30, 30)).save(buf, "PNG")
+    return SimpleUploadedFile("me.png", buf.getvalue(), content_type="image/png")
+
+
+class ImageDerivativeTests(TempFilesMixin, TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email="owner@example.com", username="owner")
+
+    def upload(self, width=600, height=300):
+        self.user.profile_picture = png(width, height)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.user.save()
+        return callbacks
+
+    def test_signup_does_not_queue_the_placeholder(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            user = CustomUser.objects.create_user(email="new@example.com", username="new")
+        self.assertEqual(user.profile_picture.name, "default.png")
+        self.assertEqual(callbacks, [])
+        self.assertFalse(derivatives.needs_update(user, "profile_picture"))
+        self.assertEqual(derivatives.url(user.profile_picture, "avatar"), user.profile_picture.url)
+
+    def test_upload_queues_one_job(self):
+        self.assertEqual(len(self.upload()), 1)
+        # a save that does not touch the picture queues nothing
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.user.save(update_fields=["full_name"])
+        self.assertEqual(callbacks, [])
+
+    def test_sync_processing_writes_variants(self):
+        self.upload()
+        picture = self.user.profile_picture
+        self.assertEqual(derivatives.url(picture, "avatar"), picture.url)    # nothing rendered yet
+        before = CustomUser.objects.get(pk=self.user.pk).updated_at
+
+        out = io.StringIO()
+        call_command("build_image_derivatives", "--sync", stdout=out)
+        self.assertIn("Built derivatives for 1 images.", out.getvalue())
+
+        user = CustomUser.objects.get(pk=self.user.pk)
+        variants = user.profile_picture_variants
+        self.assertEqual(variants["source"], picture.name)
+        self.assertEqual(
+            {size: (v["width"], v["height"]) for size, v in variants["sizes"].items()},
+            {"avatar": (128, 64), "card": (400, 200), "full": (600, 300)},    # never upscaled
+        )
+        for entry in variants["sizes"].values():
+            for fmt in ("webp", "jpeg"):
+                self.assertTrue(picture.storage.exists(entry[fmt]))
+        self.assertGreater(user.updated_at, before)
+
+        avatar = variants["sizes"]["avatar"]
+        self.assertEqual(derivatives.url(user.profile_picture, "avatar"), picture.storage.url(avatar["webp"]))
+        self.assertEqual(derivatives.url(user.profile_picture, "avatar", "jpeg"), picture.storage.url(avatar["jpeg"]))
+        self.assertFalse(derivatives.needs_update(user, "profile_picture"))
+
+        # a new upload falls back to the original until its own variants land
+        user.profile_picture = png(50, 50)
+        user.save()
+        self.assertEqual(derivatives.url(user.profile_picture, "avatar"), user.profile_picture.url)
+
+
+def unfold(data):
+    return data.replace(b"\r\n ", b"")
+
+
+def vcard_line(data, name):
+    """First unfolded content line of ``data`` whose property is ``name``."""
+    for line in unfold(data).decode("utf-8").split("\r\n"):
+        if line.split(":", 1)[0].split(";", 1)[0] == name:
+            return line
+    return None
+
+
+class VCardTests(TempFilesMixin, TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            email="rahim@example.com", username="rahim", full_name="Rahim Uddin", phone="+880 1711-000000",
+        )
+
+    def test_escaping(self):
+        self.assertEqual(vcard.escape("a,b;c\\d\ne"), "a\\,b\\;c\\\\d\\ne")
+        self.user.company_name = "Smith, Jones; Co \\ Sons"
+        data = vcard.build(self.user)
+        self.assertEqual(vcard_line(data, "ORG"), "ORG:Smith\\, Jones\\; Co \\\\ Sons")
+        self.assertEqual(vcard_line(data, "N"), "N:Uddin;Rahim;;;")
+
+    def test_folding_at_75_octets(self):
+        self.assertEqual(vcard.fold("x" * 75), b"x" * 75)
+        for value in ("x" * 200, "রহিম উদ্দিন " * 20, "a" + "€" * 100):
+            with self.subTest(value=value[:12]):
+                line = "NOTE:" + value
+                folded = vcard.fold(line)
+                physical = folded.split(b"\r\n")
+                self.assertGreater(len(physical), 1)
+                for i, piece in enumerate(physical):
+                    self.assertLessEqual(len(piece), 75)
+                    if i:
+                        self.assertTrue(piece.startswith(b" "))
+                    piece.decode("utf-8")     # no code point split across lines
+                self.assertEqual(unfold(folded).decode("utf-8"), line)
+
+    def test_photo_syntax_by_version(self):
+        self.user.profile_picture = png(600, 300)
+        self.user.save()
+
+        v3 = vcard_line(vcard.build(self.user, "3.0"), "PHOTO")
+        self.assertTrue(v3.startswith("PHOTO;ENCODING=b;TYPE=JPEG:"))
+        v4 = vcard_line(vcard.build(self.user, "4.0"), "PHOTO")
+        self.assertTrue(v4.startswith("PHOTO:data:image/jpeg;base64,"))
+
+        jpeg = base64.b64decode(v3.split(":", 1)[1])
+        self.assertEqual(jpeg, base64.b64decode(v4.split(",", 1)[1]))
+        self.assertEqual(Image.open(io.BytesIO(jpeg)).size, (256, 128))
+
+        self.assertEqual(vcard_line(vcard.build(self.user, "3.0"), "TEL"), "TEL;TYPE=CELL:+880 1711-000000")
+        self.assertEqual(vcard_line(vcard.build(self.user, "4.0"), "TEL"), "TEL;VALUE=uri;TYPE=cell:tel:+8801711000000")
+
+    def test_placeholder_picture_is_not_embedded(self):
+        self.assertIsNone(vcard_line(vcard.build(self.user), "PHOTO"))
+
+    def test_cache_key_follows_updated_at(self):
+        first = vcard.cache_key(self.user, "3.0")
+        self.assertNotEqual(first, vcard.cache_key(self.user, "4.0"))
+        self.assertIn(b"FN:Rahim Uddin", vcard.get_vcard(self.user))
+
+        self.user.full_name = "Karim Uddin"
+        self.user.save()
+        self.assertNotEqual(vcard.cache_key(self.user, "3.0"), first)
+        self.assertIn(b"FN:Karim Uddin", vcard.get_vcard(self.user))
+
+        # the download goes through the same cache
+        response = self.client.get(reverse("app_account:download_contact_vcard", args=["rahim"]), {"version": "4.0"})
+        self.assertEqual(vcard_line(response.content, "VERSION"), "VERSION:4.0")
+        self.assertEqual(vcard_line(response.content, "FN"), "FN:Karim Uddin")
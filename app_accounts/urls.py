@@ -50,8 +50,19 @@ urlpatterns = [
     # 📊 Profile Dashboard
     path('profile/<int:pk>/dashboard/', views.profile_and_card_dashboard, name='profile_and_card_dashboard'),
 
+    # 👥 Visitor table API (keyset paginated JSON)
+    path('profile/<int:pk>/visitors/', views.profile_visitors_api, name='profile_visitors_api'),
+
+    # 🗺 Heatmap cells (geohash-binned lead counts)
+    path('profile/<int:pk>/heatmap/', views.profile_heatmap_api, name='profile_heatmap_api'),
+    path('profile/<int:pk>/live/', views.profile_live_events, name='profile_live_events'),
+
+    # 📤 Export leads / clicks (CSV or NDJSON, streamed)
+    path('profile/<int:pk>/export/<str:kind>/', views.export_profile_events, name='export_profile_events'),
+
     # 🧾 Download QR
     path('profile/<int:pk>/download_qr/', views.download_qr, name='download_qr'),
+    path('profiles/qr-codes.zip', views.download_qr_zip, name='download_qr_zip'),
 
     # 🗑 Delete Profile
 
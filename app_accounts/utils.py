@@ -1,4 +1,11 @@
 # app_accounts/utils.py
+import hashlib
+
+from django.db.models import Q
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+
 def get_client_ip(request):
     x_forwarded_for = request.META.get("HTTP_X_FORWARDED_FOR")
     if x_forwarded_for:
@@ -44,3 +51,46 @@ def parse_user_agent(ua_string: str):
         device_type = "Tablet"
 
     return device_type, browser, os_name
+
+
+def device_q(device, field="user_agent"):
+    """Q() selecting rows parse_user_agent() would put in ``device``."""
+    def has(*words):
+        q = Q()
+        for w in words:
+            q |= Q(**{f"{field}__contains": w})
+        return q
+
+    tablet = has("iPad", "Tablet")
+    mobile = has("Mobile", "Android", "iPhone")
+    if device == "Tablet":
+        return tablet
+    if device == "Mobile":
+        return mobile & ~tablet
+    return ~mobile & ~tablet
+
+
+def content_etag(body, weak=False):
+    """Quoted ETag from a hash of the response body (bytes or str)."""
+    if isinstance(body, str):
+        body = body.encode()
+    etag = quote_etag(hashlib.blake2b(body, digest_size=16).hexdigest())
+    return f"W/{etag}" if weak else etag
+
+
+def conditional(request, response, etag=None, last_modified=None, **cache_control):
+    """
+    Finish a public GET response: set ETag (default: hash of the body),
+    Last-Modified (an aware datetime) and, to override the route's
+    CACHE_POLICY, Cache-Control (patch_cache_control keywords), then answer
+    304 instead when the client's copy still matches If-None-Match /
+    If-Modified-Since.
+    """
+    etag = etag or content_etag(response.content)
+    modified = int(last_modified.timestamp()) if last_modified else None
+    response["ETag"] = etag
+    if modified is not None:
+        response["Last-Modified"] = http_date(modified)
+    if cache_control:
+        patch_cache_control(response, **cache_control)
+    return get_conditional_response(request, etag=etag, last_modified=modified, response=response)
@@ -0,0 +1,172 @@
+# app_accounts/vcard.py
+"""
+vCard export of a profile (RFC 2426 vCard 3.0 / RFC 6350 vCard 4.0).
+
+Text values are escaped, lines are folded at 75 octets with CRLF endings,
+and the profile picture is embedded as a resized base64 JPEG PHOTO.
+
+``get_vcard()`` caches the encoded bytes under (pk, updated_at, version):
+any profile save moves updated_at, so entries never need invalidating and
+repeat "save contact" taps are a single cache read.
+"""
+import base64
+import logging
+from datetime import timezone as dt_timezone
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import caches
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "VERSION": "3.0",        # served when the request does not ask
+    "CACHE": "default",
+    "TIMEOUT": 60 * 60 * 24 * 7,
+    "PHOTO_SIZE": 256,       # px, longest side
+    "PHOTO_QUALITY": 85,
+}
+
+VERSIONS = ("3.0", "4.0")
+SOCIAL_FIELDS = ("facebook", "linkedin", "instagram")
+LINE_OCTETS = 75
+
+
+def vcard_settings():
+    conf = dict(DEFAULTS)
+    conf.update(getattr(settings, "VCARD", {}))
+    return conf
+
+
+# ───────────────────────────────────────────────
+# encoding
+def escape(value):
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace(",", "\\,")
+        .replace(";", "\\;")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def fold(line):
+    """Split a content line into ≤75-octet pieces, never inside a UTF-8 character."""
+    data = line.encode("utf-8")
+    if len(data) <= LINE_OCTETS:
+        return data
+    pieces, start, limit = [], 0, LINE_OCTETS
+    while start < len(data):
+        end = min(start + limit, len(data))
+        while end < len(data) and (data[end] & 0xC0) == 0x80:   # continuation byte
+            end -= 1
+        pieces.append(data[start:end])
+        start, limit = end, LINE_OCTETS - 1                      # room for the leading space
+    return b"\r\n ".join(pieces)
+
+
+def content_line(name, value, params=(), raw=False):
+    head = ";".join([name, *params])
+    return fold(f"{head}:{value if raw else escape(value)}")
+
+
+def split_name(full_name):
+    """Full name → (family, given): the last word is taken as the family name."""
+    parts = (full_name or "").split()
+    if len(parts) < 2:
+        return "", " ".join(parts)
+    return parts[-1], " ".join(parts[:-1])
+
+
+def photo_jpeg(field, size, quality):
+    """Resized JPEG bytes of an ImageField, or None when there is no readable image."""
+    if not field or not field.name or not field.storage.exists(field.name):
+        return None     # includes the "default.png" placeholder when it is not on disk
+    try:
+        with field.open("rb") as fh:
+            image = ImageOps.exif_transpose(Image.open(fh))
+            image.thumbnail((size, size))
+            if image.mode != "RGB":
+                image = image.convert("RGB")
+            out = BytesIO()
+            image.save(out, "JPEG", quality=quality, optimize=True)
+            return out.getvalue()
+    except Exception as e:
+        logger.warning("vCard photo skipped for %s: %s", field.name, e)
+        return None
+
+
+# ───────────────────────────────────────────────
+def build(profile, version=None, photo=True):
+    """Encoded vCard bytes for ``profile``."""
+    conf = vcard_settings()
+    version = version or conf["VERSION"]
+    if version not in VERSIONS:
+        raise ValueError(f"unsupported vCard version {version!r}")
+    v4 = version == "4.0"
+
+    family, given = split_name(profile.full_name)
+    lines = [
+        b"BEGIN:VCARD",
+        content_line("VERSION", version),
+        content_line("FN", profile.full_name or profile.username or profile.email),
+        content_line("N", ";".join([escape(family), escape(given), "", "", ""]), raw=True),
+    ]
+    if profile.company_name:
+        lines.append(content_line("ORG", profile.company_name))
+    if profile.job_title:
+        lines.append(content_line("TITLE", profile.job_title))
+    if profile.phone:
+        if v4:
+            tel = "tel:" + "".join(ch for ch in profile.phone if ch.isdigit() or ch == "+")
+            lines.append(content_line("TEL", tel, ["VALUE=uri", "TYPE=cell"], raw=True))
+        else:
+            lines.append(content_line("TEL", profile.phone, ["TYPE=CELL"]))
+    if profile.email:
+        lines.append(content_line("EMAIL", profile.email, [] if v4 else ["TYPE=INTERNET"]))
+    if profile.website:
+        lines.append(content_line("URL", profile.website, raw=True))
+    for field in SOCIAL_FIELDS:
+        url = getattr(profile, field, None)
+        if url:
+            if v4:   # RFC 9554
+                lines.append(content_line("SOCIALPROFILE", url, [f"SERVICE-TYPE={field}"], raw=True))
+            else:    # Apple / Google extension
+                lines.append(content_line("X-SOCIALPROFILE", url, [f"TYPE={field}"], raw=True))
+    if profile.bio:
+        lines.append(content_line("NOTE", profile.bio))
+
+    jpeg = photo_jpeg(profile.profile_picture, conf["PHOTO_SIZE"], conf["PHOTO_QUALITY"]) if photo else None
+    if jpeg:
+        data = base64.b64encode(jpeg).decode("ascii")
+        if v4:
+            lines.append(content_line("PHOTO", f"data:image/jpeg;base64,{data}", raw=True))
+        else:
+            lines.append(content_line("PHOTO", data, ["ENCODING=b", "TYPE=JPEG"], raw=True))
+
+    lines.append(content_line("UID", f"urn:uuid:{profile.public_id}", raw=True))
+    if profile.updated_at:
+        rev = profile.updated_at.astimezone(dt_timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        lines.append(content_line("REV", rev, raw=True))
+    lines.append(b"END:VCARD")
+    return b"\r\n".join(lines) + b"\r\n"
+
+
+def cache_key(profile, version):
+    stamp = profile.updated_at.isoformat() if profile.updated_at else ""
+    return f"vcard:{profile.pk}:{stamp}:{version}"
+
+
+def get_vcard(profile, version=None):
+    """build(), cached per (pk, updated_at, version)."""
+    conf = vcard_settings()
+    version = version or conf["VERSION"]
+    cache = caches[conf["CACHE"]]
+    key = cache_key(profile, version)
+    data = cache.get(key)
+    if data is None:
+        data = build(profile, version)
+        cache.set(key, data, conf["TIMEOUT"])
+    return data
@@ -1,31 +1,31 @@
 # views.py (CLEAN + READY)
-from datetime import timedelta
-from io import BytesIO
-from collections import defaultdict
-
-import qrcode
-import requests
+from datetime import date
 
 from app_pages.models import Employee
+from asgiref.sync import sync_to_async
 from django.apps import apps
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import get_user_model, login
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.tokens import default_token_generator
+from django.core.handlers.asgi import ASGIRequest
 from django.core.mail import send_mail
-from django.db.models import Count, Q
+from django.db.models import Q
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
-from django.utils import timezone
 from django.utils.encoding import force_bytes
-from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+from django.utils.http import quote_etag, urlsafe_base64_decode, urlsafe_base64_encode
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
-from django.http import HttpResponse, JsonResponse
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+
+from app_analytics import exports, heatmap, hll, queries, sketches
+from app_tracking import geoip, ingest, live
 
+from . import counters, pagecache, qr, vcard
 from .forms import ChildProfileCreateForm, ProfileUpdateForm, SignupForm
-from .utils import get_client_ip, parse_user_agent
+from .utils import conditional, content_etag, get_client_ip, parse_user_agent
 
 # Models
 from app_accounts.models import CustomUser, ContactSaveLead, ClickEvent
@@ -95,9 +95,8 @@ def dashboard(request):
         "user": user,
         "profiles": profiles,
         "total_profiles": profiles.count(),
-        "daily_views": sum(p.daily_views for p in profiles),
-        "monthly_views": sum(p.monthly_views for p in profiles),
-        "yearly_views": sum(p.yearly_views for p in profiles),
+        **counters.current_views(profiles),
+        "unique_visitors_30": sketches.unique_visitors(profiles.values("pk"), windows=(30,))[30],
     })
 
 
@@ -180,6 +179,24 @@ def remove_profile_picture(request, pk):
 # ───────────────────────────────────────────────
 # public profile only renders template — tracking is handled by track_visit()
 def public_profile(request, username):
+    if pagecache.cacheable(request):
+        # anonymous tap / scan: (pk, updated_at) is enough to serve a cached page
+        row = CustomUser.objects.filter(
+            username=username, is_public=True
+        ).values_list("pk", "updated_at").first()
+        if row:
+            pk, updated_at = row
+            counters.incr(pk)
+            html = pagecache.get(username, updated_at)
+            if html is None:
+                html = pagecache.warm(CustomUser.objects.get(pk=pk))
+            # weak: bodies differ only by the per-request CSRF token
+            return conditional(
+                request, pagecache.respond(request, html),
+                etag=content_etag(html, weak=True), last_modified=updated_at,
+            )
+        return render(request, "accounts/profile_not_found.html", status=404)
+
     profile = CustomUser.objects.filter(
         username=username,
         is_public=True
@@ -193,6 +210,8 @@ def public_profile(request, username):
             status=404
         )
 
+    counters.incr(profile.pk)
+
     return render(
         request,
         "accounts/public_profile.html",
@@ -200,99 +219,106 @@ def public_profile(request, username):
     )
 
 # ───────────────────────────────────────────────
+def _qr_options(request):
+    """?format=png|svg  &size=px per module  &ec=L|M|Q|H"""
+    return qr.options(
+        size=request.GET.get("size"),
+        error_correction=request.GET.get("ec"),
+        fmt=request.GET.get("format"),
+    )
+
+
+def _qr_url(request, profile):
+    return request.build_absolute_uri(
+        reverse("app_accounts:public_profile_by_id", args=[profile.public_id])
+    )
+
+
 @login_required
 def download_qr(request, pk):
     profile = get_object_or_404(User, pk=pk)
     if profile != request.user and profile.parent_user != request.user:
         return HttpResponse("Forbidden", 403)
-    qr = qrcode.make(request.build_absolute_uri(reverse("app_accounts:public_profile_by_id", args=[profile.public_id])))
-    b = BytesIO()
-    qr.save(b, "PNG")
-    b.seek(0)
-    res = HttpResponse(b, "image/png")
-    res["Content-Disposition"] = f'attachment; filename="{profile.username}.png"'
-    return res
+    try:
+        opts = _qr_options(request)
+    except ValueError as e:
+        return HttpResponse(str(e), status=400)
 
+    path = qr.path_for(_qr_url(request, profile), opts)
+    res = FileResponse(open(path, "rb"), content_type=qr.FORMATS[opts["format"]])
+    res["Content-Disposition"] = f'attachment; filename="{profile.username}.{opts["format"]}"'
+    # file names are content addresses, so the name is a strong validator
+    return conditional(request, res, etag=quote_etag(path.stem))
 
-@login_required
-def profile_and_card_dashboard(request, pk):
-    """
-    Main dashboard for a single profile.
-    Company/Page owner can view analytics
-    if the profile is added as an active employee.
-    """
 
-    profile = get_object_or_404(CustomUser, pk=pk)
+@login_required
+def download_qr_zip(request):
+    """QR codes of the account and all its child profiles, streamed as one ZIP."""
+    try:
+        opts = _qr_options(request)
+    except ValueError as e:
+        return HttpResponse(str(e), status=400)
+
+    profiles = (
+        User.objects
+        .filter(Q(pk=request.user.pk) | Q(parent_user=request.user))
+        .only("pk", "username", "public_id")
+        .order_by("pk")
+    )
+    entries = (
+        (f"{p.username or p.pk}.{opts['format']}", qr.path_for(_qr_url(request, p), opts))
+        for p in profiles.iterator()
+    )
+    res = StreamingHttpResponse(qr.stream_zip(entries), content_type="application/zip")
+    name = request.user.username or request.user.pk
+    res["Content-Disposition"] = f'attachment; filename="{name}-qr-codes.zip"'
+    return res
 
-    # ─────────────────────────────
-    # 🔐 PERMISSION LOGIC (FINAL)
-    # ─────────────────────────────
-    allowed = False
 
+# ───────────────────────────────────────────────
+def can_view_analytics(user, profile):
+    """
+    🔐 Own profile, child profile, or company owner of an active employee.
+    """
     # 1️⃣ Own profile
-    if profile == request.user:
-        allowed = True
+    if profile == user:
+        return True
 
     # 2️⃣ Child profile
-    elif profile.parent_user == request.user:
-        allowed = True
+    if profile.parent_user == user:
+        return True
 
     # 3️⃣ Company owner → employee access
-    elif Employee.objects.filter(
+    return Employee.objects.filter(
         user=profile,
-        company__owner=request.user,
+        company__owner=user,
         is_active=True
-    ).exists():
-        allowed = True
+    ).exists()
+
+
+@login_required
+def profile_and_card_dashboard(request, pk):
+    """
+    Main dashboard for a single profile.
+    Company/Page owner can view analytics
+    if the profile is added as an active employee.
+    """
+
+    profile = get_object_or_404(CustomUser, pk=pk)
 
-    if not allowed:
+    if not can_view_analytics(request.user, profile):
         return HttpResponse("Forbidden", status=403)
 
     # ─────────────────────────────
-    # 📊 ANALYTICS LOGIC (UNCHANGED)
+    # 📊 ANALYTICS (fixed query count, see app_analytics.queries)
     # ─────────────────────────────
 
-    base = (
-        ContactSaveLead.objects
-        .filter(profile=profile)
-        .select_related("visitor")
-        .order_by("-timestamp")
-    )
-
-    leads = base[:200]
-    location_logs = base[:50]
-
-    # Basic counts
-    total_views = base.count()
-    gps_count = base.filter(
-        latitude__isnull=False,
-        longitude__isnull=False
-    ).count()
-    ip_count = total_views - gps_count
-
-    # Device stats
-    mobile_count = base.filter(user_agent__icontains="Mobile").count()
-    tablet_count = base.filter(user_agent__icontains="Tablet").count()
-    desktop_count = total_views - (mobile_count + tablet_count)
-
-    # Last 15 days chart
-    today = timezone.now().date()
-    chart_labels = []
-    chart_values = []
-
-    for i in range(15):
-        day = today - timedelta(days=(14 - i))
-        chart_labels.append(day.strftime("%d %b"))
-        chart_values.append(
-            base.filter(timestamp__date=day).count()
-        )
-
-    # Top countries
-    top_countries = (
-        base.values("country")
-        .annotate(c=Count("id"))
-        .order_by("-c")[:5]
-    )
+    analytics = queries.profile_analytics(profile, days=15)
+    # HyperLogLog estimates, ± one standard error
+    unique_visitors = [
+        {"days": days, "count": n, "margin": round(n * hll.STANDARD_ERROR)}
+        for days, n in sorted(sketches.unique_visitors([profile.pk]).items())
+    ]
 
     # Click events
     click_events = (
@@ -301,51 +327,149 @@ def profile_and_card_dashboard(request, pk):
         .order_by("-timestamp")
     )
 
-    # Map: device_ip → clicked buttons
-    click_by_ip = defaultdict(list)
-    for ce in click_events:
-        key = ce.device_ip or "anon"
-        btn = (ce.button_type or "").strip().lower()
-        if btn and btn not in click_by_ip[key]:
-            click_by_ip[key].append(btn)
-
-    # Map: lead.id → buttons clicked
-    lead_buttons_map = {}
-    for lead in location_logs:
-        ip_key = lead.device_ip or "anon"
-        lead_buttons_map[lead.id] = click_by_ip.get(ip_key, [])
-
     return render(
         request,
         "accounts/profile_and_card_dashboard.html",
         {
             "profile": profile,
-            "leads": leads,
-            "location_logs": location_logs,
-            "lead_buttons_map": lead_buttons_map,
 
-            "total_views": total_views,
-            "gps_count": gps_count,
-            "ip_count": ip_count,
+            "analytics": analytics,
+            **analytics.as_context(),
+            "unique_visitors": unique_visitors,   # 7, 30 and 365 days
+            "top_lists": [   # all-time heavy hitters, count and Space-Saving error
+                ("Top countries", analytics.top_countries),
+                ("Top cities", analytics.top_cities),
+                ("Top thanas", analytics.top_thanas),
+                ("Top buttons", analytics.top_buttons),
+            ],
+            "chart": {   # live-updated client-side, see profile_live_events
+                "days": [d.isoformat() for d in analytics.days],
+                "labels": analytics.chart_labels,
+                "values": analytics.day_counts,
+            },
+
+            "click_events": click_events[:50],
+        }
+    )
+
+# ───────────────────────────────────────────────
+@login_required
+def profile_visitors_api(request, pk):
+    """
+    Visitor table rows as JSON, keyset paginated.
+    ?cursor=  &limit=  &source=GPS|IP  &country=  &device=Mobile|Tablet|Desktop
+    &since=YYYY-MM-DD  &until=YYYY-MM-DD
+    """
+    profile = get_object_or_404(CustomUser, pk=pk)
+    if not can_view_analytics(request.user, profile):
+        return JsonResponse({"error": "forbidden"}, status=403)
 
-            "mobile_count": mobile_count,
-            "tablet_count": tablet_count,
-            "desktop_count": desktop_count,
+    params = request.GET
+    try:
+        limit = min(max(int(params.get("limit", 50)), 1), 200)
+        since = date.fromisoformat(params["since"]) if params.get("since") else None
+        until = date.fromisoformat(params["until"]) if params.get("until") else None
+        start, end = exports.date_range(since, until)
+        page = queries.visitor_page(
+            profile,
+            cursor=params.get("cursor") or None,
+            limit=limit,
+            source=params.get("source") if params.get("source") in ("GPS", "IP") else None,
+            country=params.get("country", "").strip() or None,
+            device=params.get("device") if params.get("device") in ("Mobile", "Tablet", "Desktop") else None,
+            start=start,
+            end=end,
+        )
+    except ValueError:
+        return JsonResponse({"error": "bad parameters"}, status=400)
 
-            "chart_labels": chart_labels,
-            "chart_values": chart_values,
+    return JsonResponse({"results": page.results, "next": page.next_cursor})
 
-            "top_countries": top_countries,
-            "click_events": click_events[:50],
 
-            "click_stats": {
-                "total": click_events.count(),
-                "connect": click_events.filter(button_type="connect").count(),
-                "save": click_events.filter(button_type="save").count(),
-                "call": click_events.filter(button_type="call").count(),
-            },
-        }
+# ───────────────────────────────────────────────
+@login_required
+def profile_heatmap_api(request, pk):
+    """
+    Lead counts per geohash cell for a map.
+    ?zoom=0-20 (picks the precision)  &bbox=min_lat,min_lon,max_lat,max_lon
+    """
+    profile = get_object_or_404(CustomUser, pk=pk)
+    if not can_view_analytics(request.user, profile):
+        return JsonResponse({"error": "forbidden"}, status=403)
+
+    try:
+        zoom = int(request.GET.get("zoom", 0))
+        bbox = None
+        if request.GET.get("bbox"):
+            bbox = tuple(float(v) for v in request.GET["bbox"].split(","))
+            if len(bbox) != 4:
+                raise ValueError("bbox needs 4 numbers")
+    except ValueError:
+        return JsonResponse({"error": "bad parameters"}, status=400)
+
+    precision, cells = heatmap.cells([profile.pk], zoom=zoom, bbox=bbox)
+    return JsonResponse({
+        "precision": precision,
+        "total": sum(c["count"] for c in cells),
+        "cells": cells,
+    })
+
+
+# ───────────────────────────────────────────────
+@login_required
+async def profile_live_events(request, pk):
+    """
+    Server-Sent Events stream of new leads / clicks for a profile.
+    Served under ASGI only; a WSGI worker would have to buffer the
+    endless stream, so it answers 204 (EventSource stops retrying).
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+
+    profile = await CustomUser.objects.filter(pk=pk).select_related("parent_user").afirst()
+    if profile is None:
+        raise Http404
+    user = await request.auser()
+    if not await sync_to_async(can_view_analytics)(user, profile):
+        return HttpResponse("Forbidden", status=403)
+
+    response = StreamingHttpResponse(
+        live.sse_stream(live.profile_channel(profile.pk)),
+        content_type="text/event-stream",
     )
+    response["X-Accel-Buffering"] = "no"    # nginx: don't buffer the stream
+    return response
+
+
+# ───────────────────────────────────────────────
+@login_required
+def export_profile_events(request, pk, kind):
+    """
+    Stream all leads / clicks of a profile.
+    ?format=csv|ndjson  &since=YYYY-MM-DD  &until=YYYY-MM-DD  &gzip=1
+    """
+    profile = get_object_or_404(CustomUser, pk=pk)
+    if not can_view_analytics(request.user, profile):
+        return HttpResponse("Forbidden", status=403)
+
+    fmt = request.GET.get("format", "csv")
+    if kind not in exports.FIELDS or fmt not in exports.FORMATS:
+        return HttpResponse("Unknown export", status=400)
+    try:
+        since = date.fromisoformat(request.GET["since"]) if request.GET.get("since") else None
+        until = date.fromisoformat(request.GET["until"]) if request.GET.get("until") else None
+    except ValueError:
+        return HttpResponse("Dates must be YYYY-MM-DD", status=400)
+    gzip = request.GET.get("gzip") in ("1", "true")
+
+    response = StreamingHttpResponse(
+        exports.export(profile, kind, fmt, since, until, gzip),
+        content_type="application/gzip" if gzip else exports.FORMATS[fmt],
+    )
+    name = exports.filename(profile, kind, fmt, since, until, gzip)
+    response["Content-Disposition"] = f'attachment; filename="{name}"'
+    return response
+
 
 # ───────────────────────────────────────────────
 @login_required
@@ -395,19 +519,14 @@ def unlink_profile(request, pk):
 
 # ───────────────────────────────────────────────
 def download_contact_vcard(request, username):
+    """?version=3.0|4.0 (default settings.VCARD["VERSION"])"""
     profile = get_object_or_404(User, username=username)
-    v = f"""BEGIN:VCARD
-VERSION:3.0
-FN:{profile.full_name}
-TEL:{profile.phone}
-EMAIL:{profile.email}
-ORG:{profile.company_name}
-TITLE:{profile.job_title}
-URL:{profile.website}
-END:VCARD"""
-    r = HttpResponse(v, "text/vcard")
+    version = request.GET.get("version") or None
+    if version and version not in vcard.VERSIONS:
+        return HttpResponse("Unsupported vCard version", status=400)
+    r = HttpResponse(vcard.get_vcard(profile, version), "text/vcard; charset=utf-8")
     r["Content-Disposition"] = f'attachment; filename="{profile.username}.vcf"'
-    return r
+    return conditional(request, r, last_modified=profile.updated_at)
 
 
 def subscription(request):
@@ -423,21 +542,36 @@ def public_profile_by_id(request, public_id):
 
 # ───────────────────────────────────────────────
 def ip_to_location(ip):
-    try:
-        r = requests.get(f"http://ip-api.com/json/{ip}", timeout=2).json()
-        return r.get("city"), r.get("country")
-    except Exception:
+    geo = geoip.lookup(ip)
+    if not geo:
         return None, None
+    return geo.get("city"), geo.get("country")
+
+
+# user_agent is a TextField: cap what a client can make us store
+USER_AGENT_MAX_LENGTH = 1000
+
+
+def tracking_client(request):
+    """(ip, user agent) of a tracking hit, cut to fit the lead / click columns."""
+    ip_max_length = ContactSaveLead._meta.get_field("device_ip").max_length
+    ip = (get_client_ip(request) or "")[:ip_max_length]
+    return ip, request.META.get("HTTP_USER_AGENT", "")[:USER_AGENT_MAX_LENGTH]
 
 
 # ───────────────────────────────────────────────
+# Tracking endpoints stay sync views. Measured with bench_tracking_views
+# (SQLite, buffered ingest, 600 visits, visits/s at 10 / 50 clients):
+#   sync views,  WSGI 8 threads  284 / 276      ASGI  134 / 133
+#   async views, WSGI 8 threads  203 / 229      ASGI  106 / 143
+# The handlers do no network I/O (geocoding runs in app_tracking.geocode),
+# so an event loop has nothing to overlap and only adds thread hops.
 @require_POST
 @csrf_exempt
 def track_save_gps(request, username):
     profile = get_object_or_404(CustomUser, username=username)
 
-    ip = get_client_ip(request) or request.META.get("REMOTE_ADDR", "")
-    ua = request.META.get("HTTP_USER_AGENT", "")[:1000]
+    ip, ua = tracking_client(request)
 
     raw_lat = request.POST.get("lat") or request.POST.get("latitude")
     raw_lon = request.POST.get("lon") or request.POST.get("longitude")
@@ -467,12 +601,13 @@ def track_save_gps(request, username):
         if v:
             data[k] = v
     lead_kwargs = {k: v for k, v in data.items() if k in allowed}
-    lead = ContactSaveLead.objects.create(**lead_kwargs)
+    saved = ingest.record(leads=[ContactSaveLead(**lead_kwargs)])
     redirect_url = reverse("app_accounts:public_profile", args=[username])
     return JsonResponse({
         "success": True,
         "url": redirect_url,
-        "lead_id": lead.id,
+        # None when the lead was queued (buffered ingestion)
+        "lead_id": saved[0].id if saved else None,
         "gps_used": is_gps,
         "browser": browser,
         "device": device_type,
@@ -492,13 +627,13 @@ def click_track(request, username):
     """
     user = get_object_or_404(CustomUser, username=username)
 
-    ip = get_client_ip(request) or request.META.get("REMOTE_ADDR", "")
-    ua = request.META.get("HTTP_USER_AGENT", "")[:1000]
+    ip, ua = tracking_client(request)
 
     action = (request.POST.get("action") or "").strip().lower()
 
     # Visitor detection: only when logged-in user != profile owner
-    visitor = request.user if request.user.is_authenticated and request.user != user else None
+    viewer = request.user
+    visitor = viewer if viewer.is_authenticated and viewer != user else None
 
     raw_lat = request.POST.get("lat") or request.POST.get("latitude")
     raw_lon = request.POST.get("lon") or request.POST.get("longitude")
@@ -526,15 +661,16 @@ def click_track(request, username):
         if v:
             data[k] = v
     lead_kwargs = {k: v for k, v in data.items() if k in allowed}
-    ContactSaveLead.objects.create(**lead_kwargs)
-
-    ClickEvent.objects.create(
-        profile=user,
-        button_type=action,
-        device_ip=ip,
-        user_agent=ua,
-        latitude=lat,
-        longitude=lon,
+    ingest.record(
+        leads=[ContactSaveLead(**lead_kwargs)],
+        clicks=[ClickEvent(
+            profile=user,
+            button_type=action,
+            device_ip=ip,
+            user_agent=ua,
+            latitude=lat,
+            longitude=lon,
+        )],
     )
 
     return JsonResponse({"saved": True, "action": action})
@@ -548,6 +684,7 @@ def track_visit(request, username):
     Visitor recorded only when a logged-in user visits someone else's profile.
     """
     user = get_object_or_404(CustomUser, username=username)
+    ip, ua = tracking_client(request)
 
     lat = request.GET.get("lat")
     lon = request.GET.get("lon")
@@ -576,6 +713,7 @@ def track_visit(request, username):
     if gps_allowed:
         try:
             gps_accuracy_m = float(acc_raw)
+            lat, lon = float(lat), float(lon)
         except:
             gps_allowed = False
 
@@ -586,45 +724,28 @@ def track_visit(request, username):
         lon = None
         location_source = "IP"
 
-    if location_source == "GPS":
-        try:
-            r = requests.get("https://nominatim.openstreetmap.org/reverse", params={
-                "format": "json", "lat": lat, "lon": lon, "zoom": 18, "accept-language": "en", "addressdetails": 1
-            }, headers={"User-Agent": "SmartCard-GPS-Tracker/4.0"}, timeout=5).json()
-            addr = r.get("address", {})
-            country = addr.get("country", "Unknown")
-            city = addr.get("state_district") or addr.get("county") or addr.get("state") or "Unknown"
-            thana = addr.get("town") or addr.get("city") or addr.get("village") or "Unknown"
-            post_office = addr.get("postcode", "-")
-            latF = float(lat); lonF = float(lon)
-            if (24.14 <= latF <= 24.20) and (90.00 <= lonF <= 90.08):
-                thana = "Mirzapur"; city = "Tangail District"
-        except Exception as e:
-            print("⛔ GPS Reverse Error", e)
+    # GPS leads are written with raw coordinates only; country / city /
+    # thana / post_office are filled in by app_tracking.geocode afterwards.
 
     if location_source == "IP":
-        try:
-            from django.contrib.gis.geoip2 import GeoIP2
-            g = GeoIP2()
-            ip = request.META.get("REMOTE_ADDR")
-            geo = g.city(ip)
-            country = geo.get("country_name", "Unknown")
-            city = geo.get("city", "Unknown")
-            thana = geo.get("region", "Unknown")
-            post_office = geo.get("postal_code", "-")
+        geo = geoip.lookup(ip)
+        if geo:
+            country = geo.get("country") or "Unknown"
+            city = geo.get("city") or "Unknown"
+            thana = geo.get("region") or "Unknown"
+            post_office = geo.get("postal_code") or "-"
             lat = geo.get("latitude")
             lon = geo.get("longitude")
             accuracy = 40
-        except Exception as e:
-            print("❗ GEO Lookup Failed →", e)
 
-    visitor = request.user if request.user.is_authenticated and request.user != user else None
+    viewer = request.user
+    visitor = viewer if viewer.is_authenticated and viewer != user else None
 
-    ContactSaveLead.objects.create(
+    ingest.record(leads=[ContactSaveLead(
         profile=user,
         visitor=visitor,
-        device_ip=request.META.get("REMOTE_ADDR"),
-        user_agent=request.META.get("HTTP_USER_AGENT", "")[:500],
+        device_ip=ip,
+        user_agent=ua,
         latitude=lat,
         longitude=lon,
         country=country,
@@ -633,7 +754,7 @@ def track_visit(request, username):
         post_office=post_office,
         accuracy=accuracy,
         location_source=location_source,
-    )
+    )])
 
     return JsonResponse({
         "status": "saved",
@@ -642,6 +763,7 @@ def track_visit(request, username):
         "country": country,
         "city": city,
         "thana": thana,
+        "geocode": "pending" if location_source == "GPS" else "done",
     })
 
 
@@ -1,3 +1,33 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import DailyRollup, GeoCellCount, TopKSketch, VisitorSketch
+
+
+@admin.register(DailyRollup)
+class DailyRollupAdmin(admin.ModelAdmin):
+    list_display = ("profile", "date", "location_source", "device_class", "country", "leads", "clicks")
+    list_filter = ("location_source", "device_class")
+    search_fields = ("profile__email", "profile__username", "country")
+    date_hierarchy = "date"
+
+
+@admin.register(VisitorSketch)
+class VisitorSketchAdmin(admin.ModelAdmin):
+    list_display = ("profile", "date")
+    search_fields = ("profile__email", "profile__username")
+    date_hierarchy = "date"
+    exclude = ("registers",)
+
+
+@admin.register(TopKSketch)
+class TopKSketchAdmin(admin.ModelAdmin):
+    list_display = ("profile", "dimension", "date", "total")
+    list_filter = ("dimension",)
+    search_fields = ("profile__email", "profile__username")
+
+
+@admin.register(GeoCellCount)
+class GeoCellCountAdmin(admin.ModelAdmin):
+    list_display = ("profile", "precision", "cell", "leads")
+    list_filter = ("precision",)
+    search_fields = ("profile__email", "profile__username", "cell")
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class AppAnalyticsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'app_analytics'
+
+    def ready(self):
+        import app_analytics.receivers
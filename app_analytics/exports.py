@@ -0,0 +1,121 @@
+# app_analytics/exports.py
+"""
+Streaming CSV / NDJSON export of a profile's leads and clicks.
+
+Rows come from archived partitions first (oldest), then from the live
+table in (timestamp, id) order via values_list().iterator(), so memory
+stays flat however many rows a profile has. Output can be gzip'd on the
+fly with a streaming zlib compressor.
+
+Raw IPs are not exported: ``session_key`` (the keyed visitor hash from
+app_tracking.visitors) stands in for them and links a lead to the clicks
+that followed it.
+"""
+import csv
+import json
+import zlib
+from datetime import datetime, time, timedelta
+from itertools import chain
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from app_accounts.models import ClickEvent, ContactSaveLead
+from app_tracking import archive
+
+from .rollups import analytics_tz
+
+FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+FIELDS = {
+    "leads": (
+        "id", "timestamp", "location_source", "country", "city", "thana", "post_office",
+        "latitude", "longitude", "accuracy", "session_key", "user_agent", "visitor_id",
+    ),
+    "clicks": (
+        "id", "timestamp", "button_type", "latitude", "longitude", "session_key", "user_agent",
+    ),
+}
+
+MODELS = {"leads": ContactSaveLead, "clicks": ClickEvent}
+
+
+def date_range(since=None, until=None):
+    """Local dates (inclusive) → aware [start, end) datetimes."""
+    tz = analytics_tz()
+    start = datetime.combine(since, time.min, tzinfo=tz) if since else None
+    end = datetime.combine(until + timedelta(days=1), time.min, tzinfo=tz) if until else None
+    return start, end
+
+
+def rows(profile, kind, start=None, end=None, chunk_size=2000):
+    fields = FIELDS[kind]
+    live = MODELS[kind].objects.filter(profile=profile)
+    if start:
+        live = live.filter(timestamp__gte=start)
+    if end:
+        live = live.filter(timestamp__lt=end)
+    return chain(
+        archive.iter_rows(kind, fields, [profile.pk], start, end),
+        live.order_by("timestamp", "id").values_list(*fields).iterator(chunk_size=chunk_size),
+    )
+
+
+class _Echo:
+    """csv.writer target that hands back each line instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(fields, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow(
+            [v.isoformat() if isinstance(v, datetime) else v for v in row]
+        )
+
+
+def ndjson_lines(fields, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(fields, row)), cls=DjangoJSONEncoder) + "\n"
+
+
+def encode(lines, gzip=False, flush_bytes=64 * 1024):
+    """Yield bytes in ~flush_bytes pieces, gzip-compressed when asked."""
+    compressor = zlib.compressobj(wbits=31) if gzip else None   # 31 → gzip container
+    buf, size = [], 0
+    for line in lines:
+        data = line.encode("utf-8")
+        buf.append(data)
+        size += len(data)
+        if size >= flush_bytes:
+            chunk = b"".join(buf)
+            buf, size = [], 0
+            out = compressor.compress(chunk) if compressor else chunk
+            if out:
+                yield out
+    chunk = b"".join(buf)
+    if compressor:
+        yield compressor.compress(chunk) + compressor.flush()
+    elif chunk:
+        yield chunk
+
+
+def export(profile, kind, fmt="csv", since=None, until=None, gzip=False):
+    """Byte iterator for StreamingHttpResponse."""
+    start, end = date_range(since, until)
+    fields = FIELDS[kind]
+    data = rows(profile, kind, start, end)
+    lines = csv_lines(fields, data) if fmt == "csv" else ndjson_lines(fields, data)
+    return encode(lines, gzip=gzip)
+
+
+def filename(profile, kind, fmt, since=None, until=None, gzip=False):
+    parts = [profile.username or str(profile.pk), kind]
+    if since or until:
+        parts.append(f"{since or ''}_{until or ''}")
+    return "-".join(parts) + f".{fmt}" + (".gz" if gzip else "")
@@ -0,0 +1,153 @@
+# app_analytics/heatmap.py
+"""
+Per-profile lead counts binned into geohash cells.
+
+Every ingested lead with coordinates adds 1 to its cell at each precision
+in settings.ANALYTICS_HEATMAP_PRECISIONS, so a map request reads one
+precision's cells (chosen from the map zoom) and its cost depends on the
+number of occupied cells, not on the number of leads.
+"""
+from collections import Counter
+from itertools import chain
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q, Sum
+
+from app_accounts.models import ContactSaveLead
+from app_tracking import archive, geohash
+
+from .models import GeoCellCount
+
+DEFAULT_PRECISIONS = (2, 3, 4, 5, 6, 7)
+MAX_PREFIXES = 32
+
+
+def precisions():
+    return tuple(getattr(settings, "ANALYTICS_HEATMAP_PRECISIONS", DEFAULT_PRECISIONS))
+
+
+def precision_for_zoom(zoom, cells_per_tile=8):
+    """
+    Coarsest stored precision whose cells are at most 1/cells_per_tile of
+    a 256px web-map tile wide at ``zoom`` (fewest cells that still look
+    fine-grained), or the finest stored precision when none is that small.
+    """
+    available = sorted(precisions())
+    target = 360.0 / (2 ** max(0, zoom)) / cells_per_tile
+    best = available[0]
+    for p in available:
+        best = p
+        if geohash.cell_size(p)[1] <= target:
+            break
+    return best
+
+
+def _cells(lat, lon):
+    return [(p, geohash.encode(lat, lon, p)) for p in precisions()]
+
+
+def _add(profile_id, precision, cell, n):
+    lookup = dict(profile_id=profile_id, precision=precision, cell=cell)
+    if GeoCellCount.objects.filter(**lookup).update(leads=F("leads") + n):
+        return
+    try:
+        with transaction.atomic():
+            GeoCellCount.objects.create(**lookup, leads=n)
+    except IntegrityError:
+        # another worker created the cell first
+        GeoCellCount.objects.filter(**lookup).update(leads=F("leads") + n)
+
+
+def _count(rows):
+    counts = Counter()
+    for profile_id, lat, lon in rows:
+        if lat is None or lon is None:
+            continue
+        for precision, cell in _cells(lat, lon):
+            counts[(profile_id, precision, cell)] += 1
+    return counts
+
+
+def record_leads(leads):
+    counts = _count((l.profile_id, l.latitude, l.longitude) for l in leads)
+    for (profile_id, precision, cell), n in counts.items():
+        _add(profile_id, precision, cell, n)
+
+
+def _in_bbox(lat, lon, bbox):
+    min_lat, min_lon, max_lat, max_lon = bbox
+    if not min_lat <= lat <= max_lat:
+        return False
+    if min_lon <= max_lon:
+        return min_lon <= lon <= max_lon
+    return lon >= min_lon or lon <= max_lon      # crosses the antimeridian
+
+
+def _prefix_q(bbox, precision):
+    """startswith filter over the coarsest cover of bbox with few cells."""
+    min_lat, min_lon, max_lat, max_lon = bbox
+    if min_lon > max_lon:
+        return Q()
+    best = None
+    for p in range(1, precision + 1):
+        prefixes = geohash.cover(min_lat, min_lon, max_lat, max_lon, p)
+        if len(prefixes) > MAX_PREFIXES:
+            break
+        best = prefixes
+    if not best:
+        return Q()
+    q = Q()
+    for prefix in best:
+        q |= Q(cell__startswith=prefix)
+    return q
+
+
+def cells(profile_ids, zoom=None, precision=None, bbox=None):
+    """
+    (precision, [{"cell", "lat", "lon", "bbox", "count"}, ...]) summed over
+    ``profile_ids``. bbox is (min_lat, min_lon, max_lat, max_lon).
+    """
+    if precision is None:
+        precision = precision_for_zoom(zoom or 0)
+    rows = GeoCellCount.objects.filter(profile_id__in=profile_ids, precision=precision)
+    if bbox:
+        rows = rows.filter(_prefix_q(bbox, precision))
+    rows = rows.order_by().values("cell").annotate(count=Sum("leads"))
+
+    out = []
+    for row in rows:
+        lat, lon = geohash.decode(row["cell"])
+        if bbox and not _in_bbox(lat, lon, bbox):
+            continue
+        out.append({
+            "cell": row["cell"],
+            "lat": round(lat, 6),
+            "lon": round(lon, 6),
+            "bbox": [round(v, 6) for v in geohash.bbox(row["cell"])],
+            "count": row["count"],
+        })
+    return precision, out
+
+
+def rebuild(profile_ids=None, chunk_size=2000):
+    """Recompute cell counts from raw (and archived) leads. Returns rows written."""
+    leads = ContactSaveLead.objects.filter(latitude__isnull=False, longitude__isnull=False)
+    stored = GeoCellCount.objects.all()
+    if profile_ids is not None:
+        leads = leads.filter(profile_id__in=profile_ids)
+        stored = stored.filter(profile_id__in=profile_ids)
+
+    fields = ("profile_id", "latitude", "longitude")
+    counts = _count(chain(
+        leads.order_by().values_list(*fields).iterator(chunk_size=chunk_size),
+        archive.iter_rows("leads", fields, profile_ids),
+    ))
+    objs = [
+        GeoCellCount(profile_id=p, precision=precision, cell=cell, leads=n)
+        for (p, precision, cell), n in counts.items()
+    ]
+    with transaction.atomic():
+        stored.delete()
+        GeoCellCount.objects.bulk_create(objs, batch_size=chunk_size)
+    return len(objs)
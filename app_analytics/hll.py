@@ -0,0 +1,79 @@
+# app_analytics/hll.py
+"""
+HyperLogLog distinct counter over a fixed-size bytes register array.
+
+2**PRECISION one-byte registers (2 KiB at the default precision of 11,
+standard error 1.04 / sqrt(2048) ≈ 2.3%). Sketches of the same precision
+merge with a register-wise max, so per-day sketches can be combined for
+any date range or any set of profiles.
+"""
+import hashlib
+import math
+
+PRECISION = 11
+STANDARD_ERROR = 1.04 / math.sqrt(1 << PRECISION)
+
+
+def hash64(value):
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+def visitor_hash(ip, user_agent):
+    """Same identity as COUNT(DISTINCT device_ip, user_agent)."""
+    return hash64(f"{ip or ''}\x00{user_agent or ''}")
+
+
+class HyperLogLog:
+
+    def __init__(self, registers=None, precision=PRECISION):
+        self.p = precision
+        self.m = 1 << precision
+        if registers is None:
+            self.registers = bytearray(self.m)
+        else:
+            if len(registers) != self.m:
+                raise ValueError(f"expected {self.m} registers, got {len(registers)}")
+            self.registers = bytearray(registers)
+
+    def add_hash(self, h):
+        index = h >> (64 - self.p)
+        rest = h & ((1 << (64 - self.p)) - 1)
+        # position of the leftmost 1-bit in the remaining 64 - p bits
+        rank = (64 - self.p) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def add(self, value):
+        self.add_hash(hash64(value))
+
+    def update(self, other):
+        if other.p != self.p:
+            raise ValueError("cannot merge sketches of different precision")
+        regs = self.registers
+        for i, r in enumerate(other.registers):
+            if r > regs[i]:
+                regs[i] = r
+        return self
+
+    def __or__(self, other):
+        return HyperLogLog(self.registers, self.p).update(other)
+
+    def __bytes__(self):
+        return bytes(self.registers)
+
+    def count(self):
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # small range: linear counting is far more accurate
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    @classmethod
+    def merged(cls, blobs, precision=PRECISION):
+        sketch = cls(precision=precision)
+        for blob in blobs:
+            sketch.update(cls(blob, precision))
+        return sketch
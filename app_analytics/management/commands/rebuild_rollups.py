@@ -0,0 +1,37 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from app_analytics import heatmap, rollups, sketches
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild DailyRollup, VisitorSketch, TopKSketch and GeoCellCount rows "
+        "from raw ContactSaveLead / ClickEvent data and archived partitions. Run it "
+        "once after migrating on deploy, and again after restoring archives or changing "
+        "ANALYTICS_HEATMAP_PRECISIONS / ANALYTICS_TOPK_CAPACITY."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--profile", type=int, action="append",
+                            help="profile id (repeatable); default: all profiles")
+        parser.add_argument("--since", type=date.fromisoformat,
+                            help="only rebuild local dates on/after YYYY-MM-DD")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **opts):
+        scope = dict(
+            profile_ids=opts["profile"],
+            since=opts["since"],
+            chunk_size=opts["chunk_size"],
+        )
+        written = rollups.rebuild(**scope)
+        sketched = sketches.rebuild(**scope)
+        topk = sketches.rebuild_topk(**scope)
+        # cell counts are all-time, so --since does not apply to them
+        cells = heatmap.rebuild(profile_ids=opts["profile"], chunk_size=opts["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {written} rollup rows, {sketched} visitor sketches, "
+            f"{topk} top-K sketches and {cells} heatmap cells."
+        ))
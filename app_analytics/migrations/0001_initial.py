@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('location_source', models.CharField(default='IP', max_length=5)),
+                ('device_class', models.CharField(default='Desktop', max_length=10)),
+                ('country', models.CharField(blank=True, default='', max_length=100)),
+                ('leads', models.PositiveIntegerField(default=0)),
+                ('clicks', models.PositiveIntegerField(default=0)),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['profile', 'date'], name='rollup_profile_date_idx')],
+                'constraints': [models.UniqueConstraint(fields=('profile', 'date', 'location_source', 'device_class', 'country'), name='uniq_daily_rollup_key')],
+            },
+        ),
+    ]
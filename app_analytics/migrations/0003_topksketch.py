@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_analytics', '0002_visitorsketch'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TopKSketch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('country', 'Country'), ('city', 'City'), ('thana', 'Thana'), ('button', 'Button')], max_length=10)),
+                ('date', models.DateField()),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('counters', models.JSONField(default=dict)),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='topk_sketches', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-date'],
+                'constraints': [models.UniqueConstraint(fields=('profile', 'dimension', 'date'), name='uniq_topk_sketch_key')],
+            },
+        ),
+    ]
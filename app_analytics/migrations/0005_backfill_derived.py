@@ -0,0 +1,25 @@
+"""
+Placeholder for the old one-off backfill of DailyRollup, VisitorSketch,
+TopKSketch and GeoCellCount.
+
+The backfill used the live counting code (app_analytics.rollups,
+sketches, heatmap, app_tracking.archive), which a migration must not
+import: any later change to those modules would silently change what an
+old migration does, or break it. Derived rows are filled outside the
+migration graph instead; after migrating on deploy, run
+
+    python manage.py rebuild_rollups
+
+once (it replaces existing derived rows, so re-running it is safe).
+"""
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_accounts', '0016_session_key'),
+        ('app_analytics', '0004_geocellcount'),
+    ]
+
+    operations = []
@@ -1,3 +1,124 @@
 from django.db import models
 
-# Create your models here.
+from app_accounts.models import CustomUser
+
+
+# ======================================================
+#   DAILY ROLLUP (one row per profile / day / dimensions)
+# ======================================================
+class DailyRollup(models.Model):
+    profile = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        related_name="daily_rollups"
+    )
+
+    # local date (settings.ANALYTICS_TIME_ZONE, Asia/Dhaka)
+    date = models.DateField()
+
+    location_source = models.CharField(max_length=5, default="IP")
+    device_class = models.CharField(max_length=10, default="Desktop")  # Mobile / Tablet / Desktop
+    country = models.CharField(max_length=100, blank=True, default="")
+
+    leads = models.PositiveIntegerField(default=0)
+    clicks = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.profile_id} {self.date} {self.location_source}/{self.device_class}/{self.country}"
+
+    class Meta:
+        ordering = ["-date"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["profile", "date", "location_source", "device_class", "country"],
+                name="uniq_daily_rollup_key",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["profile", "date"], name="rollup_profile_date_idx"),
+        ]
+
+
+# ======================================================
+#   DAILY UNIQUE-VISITOR SKETCH (HyperLogLog, see hll.py)
+# ======================================================
+class VisitorSketch(models.Model):
+    profile = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        related_name="visitor_sketches"
+    )
+    date = models.DateField()
+
+    # 2 ** hll.PRECISION one-byte registers
+    registers = models.BinaryField()
+
+    def __str__(self):
+        return f"{self.profile_id} {self.date}"
+
+    class Meta:
+        ordering = ["-date"]
+        constraints = [
+            models.UniqueConstraint(fields=["profile", "date"], name="uniq_visitor_sketch_day"),
+        ]
+
+
+# ======================================================
+#   TOP-K SKETCH (Space-Saving, see topk.py)
+# ======================================================
+class TopKSketch(models.Model):
+    DIMENSIONS = [
+        ("country", "Country"),
+        ("city", "City"),
+        ("thana", "Thana"),
+        ("button", "Button"),
+    ]
+
+    profile = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        related_name="topk_sketches"
+    )
+    dimension = models.CharField(max_length=10, choices=DIMENSIONS)
+
+    # local date; sketches.ALL_TIME marks the running all-time summary
+    date = models.DateField()
+
+    total = models.PositiveIntegerField(default=0)
+    counters = models.JSONField(default=dict)   # item → [count, error]
+
+    def __str__(self):
+        return f"{self.profile_id} {self.dimension} {self.date}"
+
+    class Meta:
+        ordering = ["-date"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["profile", "dimension", "date"], name="uniq_topk_sketch_key",
+            ),
+        ]
+
+
+# ======================================================
+#   GEO CELL COUNTS (heatmap bins, see heatmap.py)
+# ======================================================
+class GeoCellCount(models.Model):
+    profile = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        related_name="geo_cells"
+    )
+    precision = models.PositiveSmallIntegerField()   # geohash length
+    cell = models.CharField(max_length=12)
+    leads = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.profile_id} {self.cell} ({self.leads})"
+
+    class Meta:
+        ordering = ["cell"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["profile", "precision", "cell"], name="uniq_geo_cell_count",
+            ),
+        ]
@@ -0,0 +1,290 @@
+# app_analytics/queries.py
+"""
+Dashboard analytics in a fixed number of queries.
+
+profile_analytics() runs exactly three queries, whatever the date range or
+the number of tracked buttons:
+
+  1. DailyRollup aggregate with one conditional SUM per metric and per
+     chart day.
+  2. ClickEvent aggregate with one conditional COUNT per button type.
+  3. All-time TopKSketch rows (K counters per dimension) for the
+     "top N" widgets, see sketches.top_items().
+"""
+import base64
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Count, Q, Sum
+
+from app_accounts import derivatives
+from app_accounts.models import ClickEvent, ContactSaveLead
+from app_accounts.utils import device_q, parse_user_agent
+
+from .models import DailyRollup
+from .rollups import local_date, today
+from .sketches import top_items
+from .topk import HeavyHitter
+
+DEFAULT_BUTTON_TYPES = ("connect", "save", "call")
+
+
+def button_types():
+    return tuple(getattr(settings, "ANALYTICS_BUTTON_TYPES", DEFAULT_BUTTON_TYPES))
+
+
+@dataclass(frozen=True)
+class ClickStats:
+    total: int = 0
+    by_button: dict = field(default_factory=dict)
+
+    def __getitem__(self, button):
+        # lets templates keep using {{ click_stats.connect }}
+        return self.by_button[button]
+
+
+@dataclass(frozen=True)
+class ProfileAnalytics:
+    total_views: int
+    gps_count: int
+    mobile_count: int
+    tablet_count: int
+    days: list[date]
+    day_counts: list[int]
+    top_countries: list[HeavyHitter]
+    top_cities: list[HeavyHitter]
+    top_thanas: list[HeavyHitter]
+    top_buttons: list[HeavyHitter]
+    click_stats: ClickStats
+
+    @property
+    def ip_count(self):
+        return self.total_views - self.gps_count
+
+    @property
+    def desktop_count(self):
+        return self.total_views - self.mobile_count - self.tablet_count
+
+    @property
+    def period_views(self):
+        """Views on the chart days (total_views is all-time)."""
+        return sum(self.day_counts)
+
+    @property
+    def chart_labels(self):
+        return [d.strftime("%d %b") for d in self.days]
+
+    def as_context(self):
+        return {
+            "total_views": self.total_views,
+            "period_views": self.period_views,
+            "gps_count": self.gps_count,
+            "ip_count": self.ip_count,
+            "mobile_count": self.mobile_count,
+            "tablet_count": self.tablet_count,
+            "desktop_count": self.desktop_count,
+            "chart_labels": self.chart_labels,
+            "chart_values": self.day_counts,
+            "top_countries": self.top_countries,
+            "top_cities": self.top_cities,
+            "top_thanas": self.top_thanas,
+            "top_buttons": self.top_buttons,
+            "click_stats": self.click_stats,
+        }
+
+
+# ───────────────────────────────────────────────
+def lead_stats(profile, days):
+    """Query 1: totals, device split and per-day counts."""
+    metrics = {
+        "total": Sum("leads", default=0),
+        "gps": Sum("leads", filter=Q(location_source="GPS"), default=0),
+        "mobile": Sum("leads", filter=Q(device_class="Mobile"), default=0),
+        "tablet": Sum("leads", filter=Q(device_class="Tablet"), default=0),
+    }
+    for i, day in enumerate(days):
+        metrics[f"d{i}"] = Sum("leads", filter=Q(date=day), default=0)
+
+    return DailyRollup.objects.filter(profile=profile).aggregate(**metrics)
+
+
+def click_stats(profile, buttons=None):
+    """Query 2: total clicks plus one count per button type."""
+    buttons = button_types() if buttons is None else tuple(buttons)
+    metrics = {"total": Count("id")}
+    for i, button in enumerate(buttons):
+        metrics[f"b{i}"] = Count("id", filter=Q(button_type=button))
+
+    row = ClickEvent.objects.filter(profile=profile).aggregate(**metrics)
+    return ClickStats(
+        total=row["total"],
+        by_button={button: row[f"b{i}"] for i, button in enumerate(buttons)},
+    )
+
+
+def profile_analytics(profile, days=15, buttons=None, top=5):
+    end = today()
+    chart_days = [end - timedelta(days=days - 1 - i) for i in range(days)]
+    totals = lead_stats(profile, chart_days)
+    tops = top_items([profile.pk], n=top)
+    return ProfileAnalytics(
+        total_views=totals["total"],
+        gps_count=totals["gps"],
+        mobile_count=totals["mobile"],
+        tablet_count=totals["tablet"],
+        days=chart_days,
+        day_counts=[totals[f"d{i}"] for i in range(days)],
+        top_countries=tops["country"],
+        top_cities=tops["city"],
+        top_thanas=tops["thana"],
+        top_buttons=tops["button"],
+        click_stats=click_stats(profile, buttons),
+    )
+
+
+def buttons_for_leads(profile, leads):
+    """
+    lead.id → buttons clicked in the same visitor session (newest first).
+
+    One query over ClickEvent limited to the session keys of ``leads``
+    (the rows on screen), served by click_profile_session_idx.
+    """
+    leads = list(leads)
+    keys = {lead.session_key for lead in leads if lead.session_key}
+    by_session = {}
+    if keys:
+        clicks = (
+            ClickEvent.objects
+            .filter(profile=profile, session_key__in=keys)
+            .order_by("-timestamp")
+            .values_list("session_key", "button_type")
+        )
+        for key, button in clicks:
+            button = (button or "").strip().lower()
+            seen = by_session.setdefault(key, [])
+            if button and button not in seen:
+                seen.append(button)
+    return {lead.id: by_session.get(lead.session_key, []) for lead in leads}
+
+
+# ───────────────────────────────────────────────
+@dataclass(frozen=True)
+class VisitorPage:
+    results: list
+    next_cursor: str | None
+
+
+def encode_cursor(timestamp, pk):
+    raw = f"{timestamp.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """(timestamp, pk) or ValueError."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        ts, pk = raw.split("|")
+        return datetime.fromisoformat(ts), int(pk)
+    except (TypeError, ValueError) as e:
+        raise ValueError("bad cursor") from e
+
+
+def visitor_row(lead, buttons):
+    visitor = None
+    if lead.visitor:
+        visitor = {
+            "name": lead.visitor.full_name or lead.visitor.email,
+            "username": lead.visitor.username,
+            "avatar": derivatives.url(lead.visitor.profile_picture, "avatar"),
+        }
+    return {
+        "id": lead.id,
+        "timestamp": lead.timestamp.isoformat(),
+        "visitor": visitor,
+        "country": lead.country,
+        "city": lead.city,
+        "thana": lead.thana,
+        "post_office": lead.post_office,
+        "latitude": lead.latitude,
+        "longitude": lead.longitude,
+        "accuracy": lead.accuracy,
+        "location_source": lead.location_source,
+        "device": parse_user_agent(lead.user_agent or "")[0],
+        "buttons": buttons,
+    }
+
+
+def visitor_page(profile, cursor=None, limit=50, source=None, country=None,
+                 device=None, start=None, end=None):
+    """
+    One page of the visitor table, newest first.
+
+    Keyset pagination on (timestamp, id) over the (profile, timestamp)
+    index: page N costs the same as page 1. Two queries per page (leads,
+    then their session clicks).
+    """
+    leads = (
+        ContactSaveLead.objects
+        .filter(profile=profile)
+        .select_related("visitor")
+        .order_by("-timestamp", "-id")
+    )
+    if source:
+        leads = leads.filter(location_source=source)
+    if country:
+        leads = leads.filter(country__iexact=country)
+    if device:
+        leads = leads.filter(device_q(device))
+    if start:
+        leads = leads.filter(timestamp__gte=start)
+    if end:
+        leads = leads.filter(timestamp__lt=end)
+    if cursor:
+        ts, pk = decode_cursor(cursor)
+        leads = leads.filter(Q(timestamp__lt=ts) | Q(timestamp=ts, id__lt=pk))
+
+    page = list(leads[:limit + 1])
+    more = len(page) > limit
+    page = page[:limit]
+    buttons = buttons_for_leads(profile, page)
+    return VisitorPage(
+        results=[visitor_row(lead, buttons[lead.id]) for lead in page],
+        next_cursor=encode_cursor(page[-1].timestamp, page[-1].id) if more else None,
+    )
+
+
+# ───────────────────────────────────────────────
+def live_events(leads=(), clicks=()):
+    """
+    Dashboard deltas for freshly ingested events, {profile_id: message}:
+    new visitor-table rows, views per local day and clicks per button.
+    """
+    messages = {}
+
+    def message(profile_id):
+        return messages.setdefault(
+            profile_id, {"type": "events", "leads": [], "views": {}, "clicks": {}}
+        )
+
+    for lead in leads:
+        msg = message(lead.profile_id)
+        msg["leads"].append(visitor_row(lead, []))
+        day = local_date(lead.timestamp).isoformat()
+        msg["views"][day] = msg["views"].get(day, 0) + 1
+    for click in clicks:
+        counts = message(click.profile_id)["clicks"]
+        counts[click.button_type] = counts.get(click.button_type, 0) + 1
+    return messages
+
+
+def live_located(lead_ids, location):
+    """Location fill-ins from the geocode worker, {profile_id: message}."""
+    messages = {}
+    rows = ContactSaveLead.objects.filter(pk__in=lead_ids).values_list("id", "profile_id")
+    for lead_id, profile_id in rows:
+        msg = messages.setdefault(
+            profile_id, {"type": "located", "ids": [], "location": dict(location)}
+        )
+        msg["ids"].append(lead_id)
+    return messages
@@ -0,0 +1,68 @@
+# app_analytics/receivers.py
+from django.dispatch import receiver
+
+from app_tracking import live
+from app_tracking.signals import events_ingested, leads_located, leads_relocated
+
+from . import heatmap, queries, rollups, sketches
+
+
+@receiver(events_ingested)
+def rollup_new_events(sender, leads, clicks, **kwargs):
+    rollups.record_events(leads, clicks)
+
+
+@receiver(events_ingested)
+def sketch_new_visitors(sender, leads, clicks, **kwargs):
+    if leads:
+        sketches.record_leads(leads)
+
+
+@receiver(events_ingested)
+def bin_new_leads(sender, leads, clicks, **kwargs):
+    if leads:
+        heatmap.record_leads(leads)
+
+
+@receiver(events_ingested)
+def topk_new_events(sender, leads, clicks, **kwargs):
+    sketches.record_topk(leads, clicks)
+
+
+@receiver(leads_located)
+def topk_located_leads(sender, lead_ids, location, **kwargs):
+    sketches.record_located(lead_ids, location)
+
+
+@receiver(leads_located)
+def rollup_located_leads(sender, lead_ids, location, previous, **kwargs):
+    rollups.move_located(lead_ids, location, previous)
+
+
+@receiver(leads_relocated)
+def rebuild_relocated_profiles(sender, profile_ids, **kwargs):
+    # Space-Saving counters cannot be decremented: recount those profiles
+    rollups.rebuild(profile_ids=profile_ids)
+    sketches.rebuild_topk(profile_ids=profile_ids)
+
+
+@receiver(events_ingested)
+def publish_live_events(sender, leads, clicks, **kwargs):
+    broker = live.get_broker()
+    if not broker.has_subscribers():
+        return
+
+    def watched(events):
+        return [e for e in events if broker.has_subscribers(live.profile_channel(e.profile_id))]
+
+    messages = queries.live_events(watched(leads), watched(clicks))
+    for profile_id, message in messages.items():
+        live.publish(live.profile_channel(profile_id), message)
+
+
+@receiver(leads_located)
+def publish_live_located(sender, lead_ids, location, **kwargs):
+    if not live.get_broker().has_subscribers():
+        return
+    for profile_id, message in queries.live_located(lead_ids, location).items():
+        live.publish(live.profile_channel(profile_id), message)
@@ -0,0 +1,181 @@
+# app_analytics/rollups.py
+"""
+Incremental daily rollups.
+
+Every ingested lead / click adds 1 to its DailyRollup row, keyed by
+(profile, local date, location_source, device class, country). When the
+geocode worker later fills the country of a GPS lead, its count moves from
+the row of the country it was ingested with (None / "" / "Unknown") to the
+real country row.
+"""
+from collections import Counter
+from datetime import datetime, time
+from itertools import chain
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from app_accounts.models import ClickEvent, ContactSaveLead
+from app_accounts.utils import parse_user_agent
+from app_tracking import archive
+
+from .models import DailyRollup
+
+
+def analytics_tz():
+    return ZoneInfo(getattr(settings, "ANALYTICS_TIME_ZONE", "Asia/Dhaka"))
+
+
+def local_date(ts):
+    return timezone.localtime(ts or timezone.now(), analytics_tz()).date()
+
+
+def today():
+    return local_date(timezone.now())
+
+
+def device_class(user_agent):
+    return parse_user_agent(user_agent or "")[0]
+
+
+def lead_key(profile_id, timestamp, location_source, user_agent, country):
+    return (
+        profile_id,
+        local_date(timestamp),
+        location_source or "IP",
+        device_class(user_agent),
+        country or "",
+    )
+
+
+def click_key(profile_id, timestamp, latitude, longitude, user_agent):
+    source = "GPS" if latitude is not None and longitude is not None else "IP"
+    return profile_id, local_date(timestamp), source, device_class(user_agent), ""
+
+
+# ───────────────────────────────────────────────
+def _bump(key, leads=0, clicks=0):
+    profile_id, date, source, device, country = key
+    lookup = dict(
+        profile_id=profile_id, date=date, location_source=source,
+        device_class=device, country=country,
+    )
+    changes = {}
+    if leads:
+        changes["leads"] = F("leads") + leads
+    if clicks:
+        changes["clicks"] = F("clicks") + clicks
+    if not changes:
+        return
+
+    existing = DailyRollup.objects.filter(**lookup)
+    if leads < 0:
+        existing = existing.filter(leads__gte=-leads)
+    if existing.update(**changes):
+        return
+    if leads <= 0 and clicks <= 0:
+        return  # nothing to take away from
+    try:
+        with transaction.atomic():
+            DailyRollup.objects.create(**lookup, leads=max(leads, 0), clicks=max(clicks, 0))
+    except IntegrityError:
+        # another worker created the row first
+        DailyRollup.objects.filter(**lookup).update(**changes)
+
+
+def apply(lead_counts, click_counts=None):
+    click_counts = click_counts or Counter()
+    for key in set(lead_counts) | set(click_counts):
+        _bump(key, leads=lead_counts.get(key, 0), clicks=click_counts.get(key, 0))
+
+
+def record_events(leads=(), clicks=()):
+    lead_counts = Counter(
+        lead_key(l.profile_id, l.timestamp, l.location_source, l.user_agent, l.country)
+        for l in leads
+    )
+    click_counts = Counter(
+        click_key(c.profile_id, c.timestamp, c.latitude, c.longitude, c.user_agent)
+        for c in clicks
+    )
+    apply(lead_counts, click_counts)
+
+
+def move_located(lead_ids, location, previous):
+    """
+    Shift located GPS leads from the country they were counted under at
+    ingest (``previous``: {lead_id: country}, None / "" / "Unknown") to
+    the real one.
+    """
+    new_country = location.get("country")
+    if not new_country:
+        return
+    rows = ContactSaveLead.objects.filter(pk__in=lead_ids).values_list(
+        "pk", "profile_id", "timestamp", "location_source", "user_agent"
+    )
+    moves = Counter()
+    for pk, profile_id, ts, source, ua in rows:
+        old_country = previous.get(pk) or ""
+        if old_country == new_country:
+            continue
+        moves[lead_key(profile_id, ts, source, ua, old_country)] -= 1
+        moves[lead_key(profile_id, ts, source, ua, new_country)] += 1
+    apply(moves)
+
+
+# ───────────────────────────────────────────────
+def rebuild(profile_ids=None, since=None, chunk_size=2000):
+    """
+    Recompute rollups from raw ContactSaveLead / ClickEvent rows, archived
+    partitions included.
+
+    profile_ids limits the rebuild to some profiles, since (a date) to
+    days on or after it. Returns the number of rollup rows written.
+    """
+    leads = ContactSaveLead.objects.all()
+    clicks = ClickEvent.objects.all()
+    rollups = DailyRollup.objects.all()
+    if profile_ids is not None:
+        leads = leads.filter(profile_id__in=profile_ids)
+        clicks = clicks.filter(profile_id__in=profile_ids)
+        rollups = rollups.filter(profile_id__in=profile_ids)
+    start = None
+    if since is not None:
+        start = datetime.combine(since, time.min, tzinfo=analytics_tz())
+        leads = leads.filter(timestamp__gte=start)
+        clicks = clicks.filter(timestamp__gte=start)
+        rollups = rollups.filter(date__gte=since)
+
+    lead_fields = ("profile_id", "timestamp", "location_source", "user_agent", "country")
+    click_fields = ("profile_id", "timestamp", "latitude", "longitude", "user_agent")
+    lead_counts = Counter(
+        lead_key(*row)
+        for row in chain(
+            leads.order_by().values_list(*lead_fields).iterator(chunk_size=chunk_size),
+            archive.iter_rows("leads", lead_fields, profile_ids, start),
+        )
+    )
+    click_counts = Counter(
+        click_key(*row)
+        for row in chain(
+            clicks.order_by().values_list(*click_fields).iterator(chunk_size=chunk_size),
+            archive.iter_rows("clicks", click_fields, profile_ids, start),
+        )
+    )
+
+    objs = [
+        DailyRollup(
+            profile_id=key[0], date=key[1], location_source=key[2],
+            device_class=key[3], country=key[4],
+            leads=lead_counts.get(key, 0), clicks=click_counts.get(key, 0),
+        )
+        for key in set(lead_counts) | set(click_counts)
+    ]
+    with transaction.atomic():
+        rollups.delete()
+        DailyRollup.objects.bulk_create(objs, batch_size=chunk_size)
+    return len(objs)
+
@@ -0,0 +1,290 @@
+# app_analytics/sketches.py
+"""
+Per-profile sketches maintained at ingest.
+
+Unique visitors: each ingested lead adds hash(device_ip, user_agent) to
+the HyperLogLog of its (profile, local date). Ranges and account totals
+are register-wise merges of the stored days, so a 365-day unique count
+reads at most 365 small rows instead of running COUNT(DISTINCT ...) over
+raw leads.
+
+Heavy hitters: Space-Saving summaries of country / city / thana (leads)
+and button (clicks), one per (profile, dimension, local date) plus a
+running all-time row (date = ALL_TIME). Placeholder locations are not
+counted; a GPS lead is counted once the geocode worker locates it.
+"""
+from collections import Counter, defaultdict
+from datetime import date, datetime, time, timedelta
+from itertools import chain
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+from app_accounts.models import ClickEvent, ContactSaveLead
+from app_tracking import archive
+
+from .hll import HyperLogLog, visitor_hash
+from .models import TopKSketch, VisitorSketch
+from .rollups import analytics_tz, local_date, today
+from .topk import DEFAULT_CAPACITY, SpaceSaving
+
+ALL_TIME = date.min
+LOCATION_DIMENSIONS = ("country", "city", "thana")
+PLACEHOLDERS = {"", "-", "Unknown"}
+
+
+def _merge_into(profile_id, date, sketch):
+    with transaction.atomic():
+        row = (
+            VisitorSketch.objects
+            .select_for_update()
+            .filter(profile_id=profile_id, date=date)
+            .first()
+        )
+        if row is not None:
+            current = bytes(row.registers)
+            merged = HyperLogLog(current).update(sketch)
+            if bytes(merged) != current:
+                row.registers = bytes(merged)
+                row.save(update_fields=["registers"])
+            return
+    try:
+        with transaction.atomic():
+            VisitorSketch.objects.create(profile_id=profile_id, date=date, registers=bytes(sketch))
+    except IntegrityError:
+        # another worker created the day first
+        _merge_into(profile_id, date, sketch)
+
+
+def _group(rows):
+    sketches = defaultdict(HyperLogLog)
+    for profile_id, ts, ip, ua in rows:
+        sketches[(profile_id, local_date(ts))].add_hash(visitor_hash(ip, ua))
+    return sketches
+
+
+def record_leads(leads):
+    sketches = _group((l.profile_id, l.timestamp, l.device_ip, l.user_agent) for l in leads)
+    for (profile_id, date), sketch in sketches.items():
+        _merge_into(profile_id, date, sketch)
+
+
+def unique_visitors(profile_ids, windows=(7, 30, 365)):
+    """
+    {window_days: estimated unique visitors} over the given profiles.
+
+    One query; days are merged newest first and each window is read off
+    as the merge passes its start date.
+    """
+    windows = sorted(windows)
+    end = today()
+    rows = (
+        VisitorSketch.objects
+        .filter(profile_id__in=profile_ids, date__gt=end - timedelta(days=windows[-1]))
+        .order_by("-date")
+        .values_list("date", "registers")
+    )
+    result = {}
+    merged = HyperLogLog()
+    pending = list(windows)
+    for date, registers in rows:
+        while pending and date <= end - timedelta(days=pending[0]):
+            result[pending.pop(0)] = merged.count()
+        merged.update(HyperLogLog(bytes(registers)))
+    for days in pending:
+        result[days] = merged.count()
+    return result
+
+
+def rebuild(profile_ids=None, since=None, chunk_size=2000):
+    """Recompute sketches from raw (and archived) leads. Returns rows written."""
+    leads = ContactSaveLead.objects.all()
+    sketches = VisitorSketch.objects.all()
+    if profile_ids is not None:
+        leads = leads.filter(profile_id__in=profile_ids)
+        sketches = sketches.filter(profile_id__in=profile_ids)
+    start = None
+    if since is not None:
+        start = datetime.combine(since, time.min, tzinfo=analytics_tz())
+        leads = leads.filter(timestamp__gte=start)
+        sketches = sketches.filter(date__gte=since)
+
+    fields = ("profile_id", "timestamp", "device_ip", "user_agent")
+    grouped = _group(chain(
+        leads.order_by().values_list(*fields).iterator(chunk_size=chunk_size),
+        archive.iter_rows("leads", fields, profile_ids, start),
+    ))
+    objs = [
+        VisitorSketch(profile_id=profile_id, date=date, registers=bytes(sketch))
+        for (profile_id, date), sketch in grouped.items()
+    ]
+    with transaction.atomic():
+        sketches.delete()
+        VisitorSketch.objects.bulk_create(objs, batch_size=chunk_size)
+    return len(objs)
+
+
+# ───────────────────────────────────────────────
+def topk_capacity():
+    return getattr(settings, "ANALYTICS_TOPK_CAPACITY", DEFAULT_CAPACITY)
+
+
+def _merge_topk(profile_id, dimension, day, counts, capacity):
+    with transaction.atomic():
+        row = (
+            TopKSketch.objects
+            .select_for_update()
+            .filter(profile_id=profile_id, dimension=dimension, date=day)
+            .first()
+        )
+        if row is not None:
+            summary = SpaceSaving(capacity, row.counters, row.total).update(counts)
+            row.counters, row.total = summary.to_json(), summary.total
+            row.save(update_fields=["counters", "total"])
+            return
+    summary = SpaceSaving(capacity).update(counts)
+    try:
+        with transaction.atomic():
+            TopKSketch.objects.create(
+                profile_id=profile_id, dimension=dimension, date=day,
+                counters=summary.to_json(), total=summary.total,
+            )
+    except IntegrityError:
+        _merge_topk(profile_id, dimension, day, counts, capacity)
+
+
+def _apply_topk(grouped):
+    """grouped: {(profile_id, dimension, day): Counter} → day and all-time rows."""
+    capacity = topk_capacity()
+    all_time = defaultdict(Counter)
+    for (profile_id, dimension, day), counts in grouped.items():
+        _merge_topk(profile_id, dimension, day, counts, capacity)
+        all_time[(profile_id, dimension)].update(counts)
+    for (profile_id, dimension), counts in all_time.items():
+        _merge_topk(profile_id, dimension, ALL_TIME, counts, capacity)
+
+
+def _location_items(location):
+    for dimension in LOCATION_DIMENSIONS:
+        value = (location.get(dimension) or "").strip()
+        if value not in PLACEHOLDERS:
+            yield dimension, value
+
+
+def record_topk(leads=(), clicks=()):
+    grouped = defaultdict(Counter)
+    for l in leads:
+        day = local_date(l.timestamp)
+        for dimension, value in _location_items({d: getattr(l, d) for d in LOCATION_DIMENSIONS}):
+            grouped[(l.profile_id, dimension, day)][value] += 1
+    for c in clicks:
+        button = (c.button_type or "").strip().lower()
+        if button:
+            grouped[(c.profile_id, "button", local_date(c.timestamp))][button] += 1
+    _apply_topk(grouped)
+
+
+def record_located(lead_ids, location):
+    """Count leads the geocode worker just located (skipped at ingest)."""
+    items = list(_location_items(location))
+    if not items:
+        return
+    grouped = defaultdict(Counter)
+    rows = ContactSaveLead.objects.filter(pk__in=lead_ids).values_list("profile_id", "timestamp")
+    for profile_id, ts in rows:
+        day = local_date(ts)
+        for dimension, value in items:
+            grouped[(profile_id, dimension, day)][value] += 1
+    _apply_topk(grouped)
+
+
+def top_items(profile_ids, dimensions=("country", "city", "thana", "button"), days=None, n=5):
+    """
+    {dimension: [HeavyHitter, ...]} for the given profiles, in one query.
+
+    days=None reads the all-time rows (K counters per profile and
+    dimension); otherwise the last ``days`` local days are merged.
+    """
+    rows = TopKSketch.objects.filter(profile_id__in=profile_ids, dimension__in=dimensions)
+    if days is None:
+        rows = rows.filter(date=ALL_TIME)
+    else:
+        rows = rows.filter(date__gt=today() - timedelta(days=days))
+    capacity = topk_capacity()
+    merged = {dimension: SpaceSaving(capacity) for dimension in dimensions}
+    for dimension, counters, total in rows.values_list("dimension", "counters", "total"):
+        merged[dimension].merge(SpaceSaving(capacity, counters, total))
+    return {dimension: summary.top(n) for dimension, summary in merged.items()}
+
+
+def rebuild_topk(profile_ids=None, since=None, chunk_size=2000):
+    """
+    Recompute top-K rows from raw (and archived) leads / clicks. Returns
+    rows written.
+
+    Day rows come from exact counts. The all-time row is rebuilt exactly
+    when the whole history is in scope, and as a merge of the day rows
+    when ``since`` limits it.
+    """
+    leads = ContactSaveLead.objects.all()
+    clicks = ClickEvent.objects.all()
+    sketches = TopKSketch.objects.all()
+    if profile_ids is not None:
+        leads = leads.filter(profile_id__in=profile_ids)
+        clicks = clicks.filter(profile_id__in=profile_ids)
+        sketches = sketches.filter(profile_id__in=profile_ids)
+    start = None
+    if since is not None:
+        start = datetime.combine(since, time.min, tzinfo=analytics_tz())
+        leads = leads.filter(timestamp__gte=start)
+        clicks = clicks.filter(timestamp__gte=start)
+        sketches = sketches.filter(date__gte=since)
+
+    lead_fields = ("profile_id", "timestamp", *LOCATION_DIMENSIONS)
+    click_fields = ("profile_id", "timestamp", "button_type")
+    grouped = defaultdict(Counter)
+    for profile_id, ts, *location in chain(
+        leads.order_by().values_list(*lead_fields).iterator(chunk_size=chunk_size),
+        archive.iter_rows("leads", lead_fields, profile_ids, start),
+    ):
+        for dimension, value in _location_items(dict(zip(LOCATION_DIMENSIONS, location))):
+            grouped[(profile_id, dimension, local_date(ts))][value] += 1
+    for profile_id, ts, button in chain(
+        clicks.order_by().values_list(*click_fields).iterator(chunk_size=chunk_size),
+        archive.iter_rows("clicks", click_fields, profile_ids, start),
+    ):
+        button = (button or "").strip().lower()
+        if button:
+            grouped[(profile_id, "button", local_date(ts))][button] += 1
+
+    capacity = topk_capacity()
+    day_rows = {key: SpaceSaving(capacity).update(counts) for key, counts in grouped.items()}
+
+    with transaction.atomic():
+        sketches.delete()
+        TopKSketch.objects.bulk_create([
+            TopKSketch(profile_id=p, dimension=d, date=day, counters=s.to_json(), total=s.total)
+            for (p, d, day), s in day_rows.items()
+        ], batch_size=chunk_size)
+
+        if since is None:
+            exact = defaultdict(Counter)
+            for (p, d, _), counts in grouped.items():
+                exact[(p, d)].update(counts)
+            all_time = {key: SpaceSaving(capacity).update(c) for key, c in exact.items()}
+        else:
+            all_time = defaultdict(lambda: SpaceSaving(capacity))
+            stored = TopKSketch.objects.exclude(date=ALL_TIME)
+            if profile_ids is not None:
+                stored = stored.filter(profile_id__in=profile_ids)
+            for p, d, counters, total in stored.values_list("profile_id", "dimension", "counters", "total"):
+                all_time[(p, d)].merge(SpaceSaving(capacity, counters, total))
+            stale = TopKSketch.objects.filter(date=ALL_TIME)
+            if profile_ids is not None:
+                stale = stale.filter(profile_id__in=profile_ids)
+            stale.delete()
+        TopKSketch.objects.bulk_create([
+            TopKSketch(profile_id=p, dimension=d, date=ALL_TIME, counters=s.to_json(), total=s.total)
+            for (p, d), s in all_time.items()
+        ], batch_size=chunk_size)
+    return len(day_rows) + len(all_time)
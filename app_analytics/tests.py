@@ -1,3 +1,212 @@
-from django.test import TestCase
+import csv
+import gzip
+import json
+import tempfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
 
-# Create your tests here.
+from django.core.management import call_command
+from django.http import StreamingHttpResponse
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from app_accounts.models import ClickEvent, ContactSaveLead, CustomUser
+from app_tracking import archive, ingest
+from app_tracking.geocache import GeocodeCache
+from app_tracking.geocode import GeocodeWorker, geocoder_settings
+
+from . import exports, heatmap, queries, rollups
+from .models import DailyRollup, GeoCellCount, TopKSketch, VisitorSketch
+
+DHAKA = (23.8103, 90.4125)
+
+
+def make_lead(profile, **kwargs):
+    fields = dict(profile=profile, device_ip="10.0.0.1", user_agent="test/1.0", location_source="IP")
+    fields.update(kwargs)
+    return ContactSaveLead(**fields)
+
+
+def rollup_countries(profile):
+    return dict(DailyRollup.objects.filter(profile=profile).values_list("country", "leads"))
+
+
+@override_settings(TRACKING_INGEST={"MODE": "sync"}, TRACKING_GEOCODER={"ENABLED": False})
+class ProfileAnalyticsTests(TestCase):
+    BUTTONS = ("connect", "save", "call", "fb", "insta", "linkedin", "whatsapp")
+
+    def setUp(self):
+        self.profile = CustomUser.objects.create_user(email="owner@example.com", username="owner")
+        ingest.record(
+            leads=[
+                make_lead(self.profile, country="Bangladesh", city="Dhaka", thana="Gulshan"),
+                make_lead(self.profile, country="India", city="Kolkata", thana="Salt Lake"),
+                make_lead(self.profile, location_source="GPS", country="Bangladesh",
+                          latitude=DHAKA[0], longitude=DHAKA[1]),
+            ],
+            clicks=[
+                ClickEvent(profile=self.profile, button_type=button, device_ip="10.0.0.1")
+                for button in self.BUTTONS
+            ],
+        )
+
+    def test_query_count_does_not_depend_on_range_or_buttons(self):
+        for days in (1, 15, 90):
+            for n_buttons in (0, 3, 7):
+                with self.subTest(days=days, buttons=n_buttons):
+                    with self.assertNumQueries(3):
+                        stats = queries.profile_analytics(self.profile, days=days, buttons=self.BUTTONS[:n_buttons])
+                    self.assertEqual(len(stats.day_counts), days)
+                    self.assertEqual(stats.period_views, 3)
+                    self.assertEqual(stats.total_views, 3)
+                    self.assertEqual(stats.click_stats.total, 7)
+                    self.assertEqual(len(stats.click_stats.by_button), n_buttons)
+
+    def test_rebuild_rollups_restores_what_ingest_counted(self):
+        # the deploy-time backfill: derived rows come back from the raw events alone
+        def snapshot():
+            return {
+                model.__name__: sorted(model.objects.values_list(*fields))
+                for model, fields in (
+                    (DailyRollup, ("date", "location_source", "device_class", "country", "leads", "clicks")),
+                    (VisitorSketch, ("date", "registers")),
+                    (TopKSketch, ("dimension", "date", "total")),
+                    (GeoCellCount, ("precision", "cell", "leads")),
+                )
+            }
+
+        counted = snapshot()
+        for model in (DailyRollup, VisitorSketch, TopKSketch, GeoCellCount):
+            model.objects.all().delete()
+        call_command("rebuild_rollups", stdout=StringIO())
+        self.assertEqual(snapshot(), counted)
+        self.assertEqual(queries.profile_analytics(self.profile, days=15).total_views, 3)
+
+    def test_period_views_only_counts_the_chart_days(self):
+        DailyRollup.objects.create(
+            profile=self.profile, date=rollups.today() - timedelta(days=30),
+            location_source="IP", device_class="Desktop", country="", leads=5,
+        )
+        stats = queries.profile_analytics(self.profile, days=15)
+        self.assertEqual(stats.total_views, 8)
+        self.assertEqual(stats.period_views, 3)
+
+
+class PrecisionForZoomTests(TestCase):
+    # zoom → precision for the default ANALYTICS_HEATMAP_PRECISIONS (2..7)
+    TABLE = {
+        0: 2, 2: 2, 3: 3, 5: 3, 6: 4, 7: 4, 8: 5, 10: 5,
+        11: 6, 12: 6, 13: 7, 16: 7, 20: 7,
+    }
+
+    @override_settings(ANALYTICS_HEATMAP_PRECISIONS=heatmap.DEFAULT_PRECISIONS)
+    def test_coarsest_precision_fine_enough_for_the_zoom(self):
+        for zoom, precision in self.TABLE.items():
+            with self.subTest(zoom=zoom):
+                self.assertEqual(heatmap.precision_for_zoom(zoom), precision)
+
+    @override_settings(ANALYTICS_HEATMAP_PRECISIONS=(3, 5))
+    def test_falls_back_to_the_finest_stored_precision(self):
+        self.assertEqual(heatmap.precision_for_zoom(0), 3)
+        self.assertEqual(heatmap.precision_for_zoom(6), 5)
+        self.assertEqual(heatmap.precision_for_zoom(18), 5)
+
+
+@override_settings(TRACKING_INGEST={"MODE": "sync"}, TRACKING_GEOCODER={"ENABLED": False})
+class LocatedLeadsTests(TestCase):
+    def setUp(self):
+        self.profile = CustomUser.objects.create_user(email="owner@example.com", username="owner")
+
+    def test_located_leads_leave_the_country_they_were_ingested_with(self):
+        # track_save_gps stores None, older rows "", track_visit "Unknown"
+        ingest.record(leads=[
+            make_lead(self.profile, location_source="GPS", latitude=DHAKA[0], longitude=DHAKA[1], country=country)
+            for country in (None, "", "Unknown")
+        ])
+        self.assertEqual(rollup_countries(self.profile), {"": 2, "Unknown": 1})
+
+        worker = GeocodeWorker(conf=dict(geocoder_settings(), PROVIDERS=["local"]), cache=GeocodeCache())
+        for lead in ContactSaveLead.objects.filter(profile=self.profile):
+            worker.submit(lead.pk, lead.latitude, lead.longitude)
+        worker.process(worker.cache.cell(*DHAKA))
+
+        self.assertEqual(rollup_countries(self.profile), {"": 0, "Unknown": 0, "Bangladesh": 3})
+
+
+@override_settings(TRACKING_INGEST={"MODE": "sync"}, TRACKING_GEOCODER={"ENABLED": False})
+class ExportTests(TestCase):
+    IP = "203.0.113.7"
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        archive_dir = override_settings(TRACKING_ARCHIVE={"DIR": tmp.name})
+        archive_dir.enable()
+        self.addCleanup(archive_dir.disable)
+
+        self.owner = CustomUser.objects.create_user(
+            email="owner@example.com", username="owner", password="pw", is_active=True,
+        )
+        self.child = CustomUser.objects.create_user(email="child@example.com", username="child", parent_user=self.owner)
+        ingest.record(
+            leads=[make_lead(self.child, device_ip=self.IP, country="Bangladesh") for _ in range(3)],
+            clicks=[ClickEvent(profile=self.child, button_type="call", device_ip=self.IP)],
+        )
+        # one more lead that has already moved to the archive
+        old = ingest.record(leads=[make_lead(self.child, device_ip=self.IP)])[0]
+        ContactSaveLead.objects.filter(pk=old.pk).update(timestamp=datetime(2024, 1, 1, tzinfo=dt_timezone.utc))
+        archive.archive(days=365)
+        self.client.force_login(self.owner)
+
+    def export(self, kind="leads", **params):
+        return self.client.get(reverse("app_account:export_profile_events", args=[self.child.pk, kind]), params)
+
+    def body(self, response):
+        self.assertIsInstance(response, StreamingHttpResponse)
+        return b"".join(response.streaming_content)
+
+    def test_csv(self):
+        response = self.export()
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="child-leads.csv"')
+        body = self.body(response).decode()
+        header, *rows = list(csv.reader(StringIO(body)))
+        self.assertEqual(tuple(header), exports.FIELDS["leads"])
+        self.assertEqual(len(rows), 4)
+        self.assertNotIn(self.IP, body)
+        session_keys = {row[header.index("session_key")] for row in rows}
+        self.assertNotIn("", session_keys)
+
+    def test_ndjson(self):
+        response = self.export("clicks", format="ndjson")
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        rows = [json.loads(line) for line in self.body(response).decode().splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(tuple(rows[0]), exports.FIELDS["clicks"])
+        self.assertEqual(rows[0]["button_type"], "call")
+        self.assertNotIn(self.IP, rows[0].values())
+
+    def test_gzip(self):
+        plain = self.body(self.export())
+        response = self.export(gzip="1")
+        self.assertEqual(response["Content-Type"], "application/gzip")
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="child-leads.csv.gz"')
+        self.assertEqual(gzip.decompress(self.body(response)), plain)
+
+    def test_date_range(self):
+        response = self.export(since=rollups.today().isoformat(), until=rollups.today().isoformat())
+        self.assertEqual(len(self.body(response).decode().splitlines()), 1 + 3)
+        self.assertEqual(self.export(since="yesterday").status_code, 400)
+
+    def test_permissions(self):
+        self.assertEqual(self.export(kind="visits").status_code, 400)
+        self.assertEqual(self.export(format="xml").status_code, 400)
+
+        stranger = CustomUser.objects.create_user(
+            email="stranger@example.com", username="stranger", password="pw", is_active=True,
+        )
+        self.client.force_login(stranger)
+        self.assertEqual(self.export().status_code, 403)
+
+        self.client.logout()
+        self.assertEqual(self.export().status_code, 302)
@@ -0,0 +1,77 @@
+# app_analytics/topk.py
+"""
+Space-Saving heavy-hitter summary (Metwally et al.).
+
+At most ``capacity`` counters of item → (count, error). ``count`` never
+under-estimates the true frequency and ``count - error`` never over-
+estimates it; any item whose true frequency exceeds total / capacity is
+guaranteed to be in the summary. Summaries merge (Cafaro et al.): an item
+missing from a full summary is credited with that summary's minimum count
+as both count and error, then the largest ``capacity`` counters are kept.
+"""
+from dataclasses import dataclass
+
+DEFAULT_CAPACITY = 32
+
+
+@dataclass(frozen=True)
+class HeavyHitter:
+    item: str
+    count: int
+    error: int
+
+    @property
+    def low(self):
+        """Guaranteed lower bound of the true count."""
+        return self.count - self.error
+
+
+class SpaceSaving:
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, counters=None, total=0):
+        self.capacity = capacity
+        self.counters = {item: list(v) for item, v in (counters or {}).items()}
+        self.total = total
+
+    def floor(self):
+        """Count credited to unseen items (0 until the summary is full)."""
+        if len(self.counters) < self.capacity:
+            return 0
+        return min(c for c, _ in self.counters.values())
+
+    def add(self, item, n=1):
+        self.total += n
+        entry = self.counters.get(item)
+        if entry is not None:
+            entry[0] += n
+        elif len(self.counters) < self.capacity:
+            self.counters[item] = [n, 0]
+        else:
+            victim = min(self.counters, key=lambda k: self.counters[k][0])
+            floor = self.counters.pop(victim)[0]
+            self.counters[item] = [floor + n, floor]
+
+    def update(self, counts):
+        """Add an exact {item: n} batch, largest first."""
+        for item, n in sorted(counts.items(), key=lambda kv: -kv[1]):
+            self.add(item, n)
+        return self
+
+    def merge(self, other):
+        mine, theirs = self.floor(), other.floor()
+        merged = {}
+        for item in self.counters.keys() | other.counters.keys():
+            c1, e1 = self.counters.get(item, (mine, mine))
+            c2, e2 = other.counters.get(item, (theirs, theirs))
+            merged[item] = [c1 + c2, e1 + e2]
+        keep = sorted(merged.items(), key=lambda kv: -kv[1][0])[:self.capacity]
+        self.counters = dict(keep)
+        self.total += other.total
+        return self
+
+    def top(self, n=5):
+        ranked = sorted(self.counters.items(), key=lambda kv: (-kv[1][0], kv[0]))
+        return [HeavyHitter(item, c, e) for item, (c, e) in ranked[:n]]
+
+    def to_json(self):
+        return {item: [c, e] for item, (c, e) in self.counters.items()}
@@ -0,0 +1,152 @@
+# app_pages/analytics.py
+"""
+Company-wide analytics over the active employees of a Company.
+
+Everything is read from the per-profile aggregates (DailyRollup, visitor
+and top-K sketches), never from raw leads / clicks, so the cost is a
+fixed five queries and depends on headcount × days, not on event volume:
+
+  1. active employees (+ user)
+  2. DailyRollup per employee over the window (leaderboard)
+  3. DailyRollup per day over the window (trend lines)
+  4. merged HyperLogLog sketches (unique visitors across the company)
+  5. merged top-K sketches (top countries / buttons across the company)
+"""
+from dataclasses import asdict, dataclass
+from datetime import timedelta
+
+from django.db.models import Sum
+
+from app_analytics.models import DailyRollup
+from app_analytics.rollups import today
+from app_analytics.sketches import top_items, unique_visitors
+from app_analytics.topk import HeavyHitter
+
+from .models import Employee
+
+
+@dataclass(frozen=True)
+class EmployeeStats:
+    user_id: int
+    name: str
+    username: str
+    designation: str
+    views: int
+    clicks: int
+    share: float          # of company views in the window, 0-1
+
+
+@dataclass(frozen=True)
+class CompanyAnalytics:
+    headcount: int
+    days: int
+    total_views: int
+    total_clicks: int
+    unique_visitors: int
+    leaderboard: list[EmployeeStats]
+    trend_dates: list
+    trend_views: list[int]
+    trend_clicks: list[int]
+    top_countries: list[HeavyHitter]
+    top_buttons: list[HeavyHitter]
+
+    @property
+    def views_per_employee(self):
+        return round(self.total_views / self.headcount, 1) if self.headcount else 0
+
+    @property
+    def clicks_per_employee(self):
+        return round(self.total_clicks / self.headcount, 1) if self.headcount else 0
+
+    @property
+    def trend_views_per_employee(self):
+        if not self.headcount:
+            return [0 for _ in self.trend_views]
+        return [round(v / self.headcount, 2) for v in self.trend_views]
+
+    def as_json(self):
+        return {
+            "headcount": self.headcount,
+            "days": self.days,
+            "total_views": self.total_views,
+            "total_clicks": self.total_clicks,
+            "unique_visitors": self.unique_visitors,
+            "views_per_employee": self.views_per_employee,
+            "clicks_per_employee": self.clicks_per_employee,
+            "leaderboard": [asdict(e) for e in self.leaderboard],
+            "trend": {
+                "dates": [d.isoformat() for d in self.trend_dates],
+                "views": self.trend_views,
+                "clicks": self.trend_clicks,
+                "views_per_employee": self.trend_views_per_employee,
+            },
+            "top_countries": [asdict(h) for h in self.top_countries],
+            "top_buttons": [asdict(h) for h in self.top_buttons],
+        }
+
+
+def company_analytics(company, days=30, top=5):
+    employees = list(
+        Employee.objects
+        .filter(company=company, is_active=True)
+        .select_related("user")
+        .order_by("id")
+    )
+    # one profile may hold several Employee rows; count each person once
+    people = {}
+    for emp in employees:
+        people.setdefault(emp.user_id, emp)
+    profile_ids = list(people)
+
+    end = today()
+    start = end - timedelta(days=days - 1)
+    window = DailyRollup.objects.filter(
+        profile_id__in=profile_ids, date__gte=start, date__lte=end,
+    ).order_by()
+
+    per_profile = {
+        row["profile_id"]: row
+        for row in window.values("profile_id").annotate(
+            views=Sum("leads"), clicks=Sum("clicks")
+        )
+    }
+    per_day = {
+        row["date"]: row
+        for row in window.values("date").annotate(views=Sum("leads"), clicks=Sum("clicks"))
+    }
+
+    total_views = sum(r["views"] or 0 for r in per_profile.values())
+    total_clicks = sum(r["clicks"] or 0 for r in per_profile.values())
+
+    leaderboard = []
+    for user_id, emp in people.items():
+        row = per_profile.get(user_id, {})
+        views = row.get("views") or 0
+        leaderboard.append(EmployeeStats(
+            user_id=user_id,
+            name=emp.user.full_name or emp.user.email,
+            username=emp.user.username,
+            designation=emp.designation or "",
+            views=views,
+            clicks=row.get("clicks") or 0,
+            share=round(views / total_views, 4) if total_views else 0.0,
+        ))
+    leaderboard.sort(key=lambda e: (-e.views, -e.clicks, e.name))
+
+    dates = [start + timedelta(days=i) for i in range(days)]
+    tops = top_items(profile_ids, ("country", "button"), days=days, n=top) if profile_ids else {}
+    uniques = unique_visitors(profile_ids, windows=(days,))[days] if profile_ids else 0
+
+    return CompanyAnalytics(
+        headcount=len(people),
+        days=days,
+        total_views=total_views,
+        total_clicks=total_clicks,
+        unique_visitors=uniques,
+        leaderboard=leaderboard,
+        trend_dates=dates,
+        trend_views=[(per_day.get(d) or {}).get("views") or 0 for d in dates],
+        trend_clicks=[(per_day.get(d) or {}).get("clicks") or 0 for d in dates],
+        top_countries=tops.get("country", []),
+        top_buttons=tops.get("button", []),
+    )
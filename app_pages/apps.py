@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class AppPagesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'app_pages'
+
+    def ready(self):
+        import app_pages.signals
@@ -54,7 +54,10 @@ class Company(models.Model):
     map_location = models.URLField(blank=True, null=True)
 
     logo = models.ImageField(upload_to="company_logos/", blank=True, null=True)
+    # resized copies, filled in by app_accounts.derivatives
+    logo_variants = models.JSONField(default=dict, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     # ================================
     # URL METHODS
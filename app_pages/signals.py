@@ -0,0 +1,12 @@
+# app_pages/signals.py
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from app_accounts import derivatives
+
+from .models import Company
+
+
+@receiver(post_save, sender=Company)
+def queue_logo_derivatives(sender, instance, update_fields=None, **kwargs):
+    derivatives.schedule(instance, "logo", update_fields)
@@ -1,3 +1,126 @@
-from django.test import TestCase
+from collections import Counter
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from app_accounts.models import ClickEvent, ContactSaveLead, CustomUser
+from app_analytics.rollups import local_date, today
+
+from .analytics import company_analytics
+from .models import Company, Employee
+
+COUNTRIES = ("Bangladesh", "India", "Bangladesh", "Nepal", "Unknown")
+BUTTONS = ("call", "save", "Call", "whatsapp")
+
+
+@override_settings(TRACKING_GEOCODER={"ENABLED": False})
+class CompanyAnalyticsTests(TestCase):
+    def setUp(self):
+        self.owner = CustomUser.objects.create_user(
+            email="owner@example.com", username="owner", password="pw", is_active=True,
+        )
+        self.company = Company.objects.create(name="Acme", owner=self.owner)
+        self.staff = [
+            CustomUser.objects.create_user(email=f"e{i}@example.com", username=f"e{i}", full_name=f"Employee {i}")
+            for i in range(3)
+        ]
+        for user in self.staff:
+            Employee.objects.create(company=self.company, user=user, designation="Sales")
+        # rejoined after leaving: two rows, one person
+        Employee.objects.create(company=self.company, user=self.staff[0], is_active=True)
+        self.former = CustomUser.objects.create_user(email="former@example.com", username="former")
+        Employee.objects.create(company=self.company, user=self.former, is_active=False)
+        self.outsider = CustomUser.objects.create_user(email="out@example.com", username="out", is_active=True)
+
+        # raw events spread over the last 45 days, then derived rows rebuilt from them
+        now = timezone.now()
+        profiles = [*self.staff, self.former, self.outsider]
+        leads, clicks = [], []
+        for i in range(120):
+            profile = profiles[i % len(profiles)] if i % 7 else self.staff[1]
+            leads.append(ContactSaveLead(
+                profile=profile, device_ip=f"10.0.0.{i % 9}", user_agent="test/1.0",
+                country=COUNTRIES[i % len(COUNTRIES)], location_source="IP",
+            ))
+            if i % 3 == 0:
+                clicks.append(ClickEvent(profile=profile, button_type=BUTTONS[i % len(BUTTONS)], device_ip="10.0.0.1"))
+        for model, rows in ((ContactSaveLead, leads), (ClickEvent, clicks)):
+            for i, obj in enumerate(model.objects.bulk_create(rows)):
+                model.objects.filter(pk=obj.pk).update(timestamp=now - timedelta(days=i % 45, hours=i % 5))
+        call_command("rebuild_rollups", stdout=StringIO())
+
+    def raw(self, model, days):
+        """Events of active employees whose local date falls in the last ``days`` days."""
+        start = today() - timedelta(days=days - 1)
+        rows = model.objects.filter(profile__in=self.staff)
+        return [obj for obj in rows if local_date(obj.timestamp) >= start]
+
+    def test_query_count_does_not_depend_on_window(self):
+        for days in (1, 30, 365):
+            with self.subTest(days=days):
+                with self.assertNumQueries(5):
+                    stats = company_analytics(self.company, days=days)
+                self.assertEqual(len(stats.trend_dates), days)
+                self.assertEqual(stats.headcount, 3)
+
+    def test_query_count_does_not_depend_on_headcount(self):
+        for i in range(5):
+            user = CustomUser.objects.create_user(email=f"new{i}@example.com", username=f"new{i}")
+            Employee.objects.create(company=self.company, user=user)
+        with self.assertNumQueries(5):
+            stats = company_analytics(self.company, days=30)
+        self.assertEqual(stats.headcount, 8)
+        self.assertEqual(len(stats.leaderboard), 8)
+
+    def test_matches_raw_rows(self):
+        for days in (7, 30):
+            with self.subTest(days=days):
+                stats = company_analytics(self.company, days=days)
+                leads, clicks = self.raw(ContactSaveLead, days), self.raw(ClickEvent, days)
+
+                self.assertEqual(stats.total_views, len(leads))
+                self.assertEqual(stats.total_clicks, len(clicks))
+                views, clicked = Counter(l.profile_id for l in leads), Counter(c.profile_id for c in clicks)
+                self.assertEqual(
+                    {e.user_id: (e.views, e.clicks) for e in stats.leaderboard},
+                    {u.pk: (views[u.pk], clicked[u.pk]) for u in self.staff},
+                )
+                self.assertEqual([e.views for e in stats.leaderboard], sorted(views.values(), reverse=True))
+                self.assertAlmostEqual(sum(e.share for e in stats.leaderboard), 1, places=3)
+
+                by_day = Counter(local_date(l.timestamp) for l in leads)
+                self.assertEqual(stats.trend_views, [by_day[d] for d in stats.trend_dates])
+                by_day = Counter(local_date(c.timestamp) for c in clicks)
+                self.assertEqual(stats.trend_clicks, [by_day[d] for d in stats.trend_dates])
+
+                countries = Counter(l.country for l in leads if l.country != "Unknown")
+                self.assertEqual({h.item: h.count for h in stats.top_countries}, dict(countries.most_common(5)))
+                buttons = Counter(c.button_type.lower() for c in clicks)
+                self.assertEqual({h.item: h.count for h in stats.top_buttons}, dict(buttons.most_common(5)))
+                # small sets: the HyperLogLog estimate is exact
+                self.assertEqual(stats.unique_visitors, len({(l.device_ip, l.user_agent) for l in leads}))
+
+    def test_empty_company(self):
+        empty = Company.objects.create(name="Empty", owner=self.owner)
+        with self.assertNumQueries(1):     # nothing to read once there are no profiles
+            stats = company_analytics(empty, days=30)
+        self.assertEqual((stats.headcount, stats.total_views, stats.unique_visitors), (0, 0, 0))
+        self.assertEqual(stats.views_per_employee, 0)
+        self.assertEqual(stats.trend_views_per_employee, [0] * 30)
+
+    def test_api_is_owner_only(self):
+        url = reverse("app_pages:company_analytics_api", args=[self.company.pk])
+        self.client.force_login(self.owner)
+        data = self.client.get(url, {"days": 7}).json()
+        self.assertEqual(data, company_analytics(self.company, days=7).as_json())
+        self.assertEqual(self.client.get(url, {"days": "abc"}).json()["days"], 30)
+        self.assertEqual(
+            self.client.get(reverse("app_pages:company_analytics", args=[self.company.pk])).status_code, 200,
+        )
+
+        self.client.force_login(self.outsider)
+        self.assertEqual(self.client.get(url).status_code, 404)
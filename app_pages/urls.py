@@ -31,6 +31,20 @@ urlpatterns = [
         name="company_deactivate"
     ),
 
+    # =====================================
+    # 📊 COMPANY ANALYTICS (ALL EMPLOYEES)
+    # =====================================
+    path(
+        "company/<int:company_id>/analytics/",
+        views.company_analytics_page,
+        name="company_analytics"
+    ),
+    path(
+        "company/<int:company_id>/analytics/api/",
+        views.company_analytics_api,
+        name="company_analytics_api"
+    ),
+
     # =====================================
     # ✅ PRODUCTS & RECRUITMENT
     # =====================================
@@ -6,6 +6,7 @@ from django.utils import timezone
 from django.urls import reverse
 from django.contrib import messages
 
+from .analytics import company_analytics
 from .models import (
     Company,
     Employee,
@@ -14,7 +15,9 @@ from .models import (
     JobPost,
 )
 from .forms import CompanyForm
+from app_accounts import derivatives
 from app_accounts.models import CustomUser
+from app_accounts.utils import conditional
 from app_jobs.models import EmploymentRequest
 
 
@@ -51,7 +54,8 @@ def company_public_by_uid(request, uid):
 
 def company_public_by_slug(request, slug):
     company = get_object_or_404(Company, slug=slug)
-    return render(request, "pages/company_public.html", {"company": company})
+    response = render(request, "pages/company_public.html", {"company": company})
+    return conditional(request, response, last_modified=company.updated_at)
 
 
 # ======================================
@@ -103,6 +107,36 @@ def company_manage(request, company_id):
     })
 
 
+# ======================================
+# ✅ COMPANY ANALYTICS (ALL ACTIVE EMPLOYEES)
+# ======================================
+def _analytics_days(request):
+    try:
+        return min(max(int(request.GET.get("days", 30)), 1), 365)
+    except ValueError:
+        return 30
+
+
+@login_required
+def company_analytics_page(request, company_id):
+    company = get_object_or_404(Company, id=company_id, owner=request.user)
+    stats = company_analytics(company, days=_analytics_days(request))
+
+    return render(request, "pages/company_analytics.html", {
+        "company": company,
+        "stats": stats,
+        "stats_json": stats.as_json(),
+        "active_tab": "analytics",
+    })
+
+
+@login_required
+def company_analytics_api(request, company_id):
+    company = get_object_or_404(Company, id=company_id, owner=request.user)
+    stats = company_analytics(company, days=_analytics_days(request))
+    return JsonResponse(stats.as_json())
+
+
 # ======================================
 # ✅ PRODUCTS (COMPANY WISE)
 # ======================================
@@ -300,7 +334,7 @@ def employee_live_search(request):
             "id": u.id,
             "name": u.full_name or "—",
             "email": u.email,
-            "avatar": u.profile_picture.url if u.profile_picture else "/static/img/default-user.png"
+            "avatar": derivatives.url(u.profile_picture, "avatar") or "/static/img/default-user.png"
         } for u in users]
     })
 
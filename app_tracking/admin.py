@@ -1,3 +1,10 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import GeocodeCacheEntry
+
+
+@admin.register(GeocodeCacheEntry)
+class GeocodeCacheEntryAdmin(admin.ModelAdmin):
+    list_display = ("cell", "is_override", "country", "city", "thana", "post_office", "hits", "expires_at")
+    list_filter = ("is_override", "country")
+    search_fields = ("cell", "city", "thana")
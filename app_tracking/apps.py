@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class AppTrackingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'app_tracking'
+
+    def ready(self):
+        import app_tracking.receivers
@@ -0,0 +1,249 @@
+# app_tracking/archive.py
+"""
+Cold storage for old ContactSaveLead / ClickEvent rows.
+
+``archive()`` moves rows older than RETENTION_DAYS into per-month gzip'd
+NDJSON partitions under settings.TRACKING_ARCHIVE["DIR"]:
+
+    <DIR>/manifest.json
+    <DIR>/leads/2025-01/part-20260101T000000.ndjson.gz
+    <DIR>/clicks/2025-01/part-20260101T000000.ndjson.gz
+
+The first line of a part is {"columns": [...]}; every following line is
+one row as a JSON array in that column order. A part is written to a temp
+file, renamed into place and recorded in the manifest *before* its rows
+are deleted (in chunks, by primary key); parts whose delete did not finish
+are completed on the next run, so a crash never archives a row twice.
+
+``iter_rows()`` reads archived partitions back on demand, pruned by month,
+so rebuilds and exports can see the full history.
+"""
+import gzip
+import json
+import logging
+import os
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone as dt_timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from app_accounts.models import ClickEvent, ContactSaveLead
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "DIR": None,              # default: BASE_DIR / "archive"
+    "RETENTION_DAYS": 365,
+    "CHUNK_SIZE": 2000,
+}
+
+MODELS = {
+    "leads": ContactSaveLead,
+    "clicks": ClickEvent,
+}
+
+_manifest_lock = threading.Lock()
+
+
+def archive_settings():
+    conf = dict(DEFAULTS)
+    conf.update(getattr(settings, "TRACKING_ARCHIVE", {}))
+    conf["DIR"] = Path(conf["DIR"] or Path(settings.BASE_DIR) / "archive")
+    return conf
+
+
+def columns(model):
+    return [f.attname for f in model._meta.concrete_fields]
+
+
+def month_key(ts):
+    return ts.astimezone(dt_timezone.utc).strftime("%Y-%m")
+
+
+def month_bounds(key):
+    start = datetime.strptime(key, "%Y-%m").replace(tzinfo=dt_timezone.utc)
+    end = (start + timedelta(days=32)).replace(day=1)
+    return start, end
+
+
+# ───────────────────────────────────────────────
+# manifest
+def load_manifest(root):
+    path = Path(root) / "manifest.json"
+    if not path.exists():
+        return {"parts": []}
+    with open(path, encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+def _atomic_write(path, write):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            write(fh)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def save_manifest(root, manifest):
+    data = json.dumps(manifest, indent=1, sort_keys=True).encode()
+    _atomic_write(Path(root) / "manifest.json", lambda fh: fh.write(data))
+
+
+# ───────────────────────────────────────────────
+# write
+def _write_part(root, kind, month, rows, cols):
+    """Write rows (tuples) to a new part file. Returns its manifest entry or None."""
+    stamp = timezone.now().strftime("%Y%m%dT%H%M%S%f")
+    rel = Path(kind) / month / f"part-{stamp}.ndjson.gz"
+    stats = {"rows": 0, "min_id": None, "max_id": None}
+    pk_index = cols.index("id")
+
+    def write(fh):
+        with gzip.GzipFile(fileobj=fh, mode="wb", mtime=0) as gz:
+            gz.write(json.dumps({"columns": cols}).encode() + b"\n")
+            for row in rows:
+                gz.write(json.dumps(row, cls=DjangoJSONEncoder, separators=(",", ":")).encode() + b"\n")
+                pk = row[pk_index]
+                stats["rows"] += 1
+                stats["min_id"] = pk if stats["min_id"] is None else min(stats["min_id"], pk)
+                stats["max_id"] = pk if stats["max_id"] is None else max(stats["max_id"], pk)
+
+    _atomic_write(Path(root) / rel, write)
+    if not stats["rows"]:
+        os.unlink(Path(root) / rel)
+        return None
+    return {"kind": kind, "month": month, "file": str(rel), "deleted": False, **stats}
+
+
+def _delete_part_rows(part, chunk_size):
+    """Delete the DB rows a part holds, by pk chunks. Returns rows deleted."""
+    model = MODELS[part["kind"]]
+    start, end = month_bounds(part["month"])
+    end = min(end, datetime.fromisoformat(part["cutoff"]))
+    rows = model.objects.filter(
+        pk__gte=part["min_id"], pk__lte=part["max_id"],
+        timestamp__gte=start, timestamp__lt=end,
+    )
+    deleted = 0
+    while True:
+        ids = list(rows.order_by("pk").values_list("pk", flat=True)[:chunk_size])
+        if not ids:
+            return deleted
+        deleted += model.objects.filter(pk__in=ids).delete()[0]
+
+
+def archive(days=None, kinds=None, dry_run=False, root=None, chunk_size=None):
+    """
+    Move rows older than ``days`` into monthly parts. Returns
+    {kind: {month: rows}} of what was (or, with dry_run, would be) archived.
+    """
+    conf = archive_settings()
+    days = conf["RETENTION_DAYS"] if days is None else days
+    root = Path(root or conf["DIR"])
+    chunk_size = chunk_size or conf["CHUNK_SIZE"]
+    cutoff = timezone.now() - timedelta(days=days)
+    report = {}
+
+    with _manifest_lock:
+        manifest = load_manifest(root)
+
+        # finish deletes interrupted by an earlier run
+        for part in manifest["parts"]:
+            if not part["deleted"] and not dry_run:
+                _delete_part_rows(part, chunk_size)
+                part["deleted"] = True
+                save_manifest(root, manifest)
+
+        for kind in kinds or MODELS:
+            model = MODELS[kind]
+            cols = columns(model)
+            old = model.objects.filter(timestamp__lt=cutoff).order_by()
+            months = sorted({
+                month_key(ts)
+                for ts in old.datetimes("timestamp", "month", tzinfo=dt_timezone.utc)
+            })
+            report[kind] = {}
+
+            for month in months:
+                start, end = month_bounds(month)
+                rows = old.filter(timestamp__gte=start, timestamp__lt=end)
+                if dry_run:
+                    report[kind][month] = rows.count()
+                    continue
+                part = _write_part(
+                    root, kind, month,
+                    rows.order_by("pk").values_list(*cols).iterator(chunk_size=chunk_size),
+                    cols,
+                )
+                if part is None:
+                    continue
+                part["cutoff"] = cutoff.isoformat()
+                part["created"] = timezone.now().isoformat()
+                manifest["parts"].append(part)
+                save_manifest(root, manifest)
+
+                _delete_part_rows(part, chunk_size)
+                part["deleted"] = True
+                save_manifest(root, manifest)
+                report[kind][month] = part["rows"]
+                logger.info("Archived %s %s rows for %s", part["rows"], kind, month)
+    return report
+
+
+def run():
+    """Scheduler entry point (settings.SCHEDULED_JOBS)."""
+    return archive()
+
+
+# ───────────────────────────────────────────────
+# read
+def parts(kind, start=None, end=None, root=None):
+    """Manifest entries of ``kind`` whose month overlaps [start, end)."""
+    root = Path(root or archive_settings()["DIR"])
+    manifest = load_manifest(root)["parts"]
+    for part in sorted(manifest, key=lambda p: (p["month"], p["file"])):
+        if part["kind"] != kind:
+            continue
+        m_start, m_end = month_bounds(part["month"])
+        if (start and m_end <= start) or (end and m_start >= end):
+            continue
+        yield root / part["file"]
+
+
+def iter_rows(kind, fields=None, profile_ids=None, start=None, end=None, root=None):
+    """
+    Yield archived rows of ``kind`` as tuples of ``fields`` (default: all
+    columns), converted back to Python values, filtered by profile and by
+    timestamp in [start, end).
+    """
+    model = MODELS[kind]
+    fields = list(fields or columns(model))
+    converters = [model._meta.get_field(f).to_python for f in fields]
+    profile_ids = set(profile_ids) if profile_ids is not None else None
+
+    for path in parts(kind, start, end, root):
+        with gzip.open(path, "rt", encoding="utf-8") as fh:
+            cols = json.loads(fh.readline())["columns"]
+            picks = [cols.index(model._meta.get_field(f).attname) for f in fields]
+            p_idx, ts_idx = cols.index("profile_id"), cols.index("timestamp")
+            ts_field = model._meta.get_field("timestamp")
+            for line in fh:
+                row = json.loads(line)
+                if profile_ids is not None and row[p_idx] not in profile_ids:
+                    continue
+                if start or end:
+                    ts = ts_field.to_python(row[ts_idx])
+                    if (start and ts < start) or (end and ts >= end):
+                        continue
+                yield tuple(conv(row[i]) for conv, i in zip(converters, picks))
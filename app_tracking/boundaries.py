@@ -0,0 +1,218 @@
+# app_tracking/boundaries.py
+"""
+Administrative boundary resolver (thana / district / post office).
+
+GeoJSON polygon layers are loaded into an STR-packed R-tree (bounding
+boxes only, array-backed) and candidates are confirmed with an even-odd
+point-in-polygon test, holes included.
+
+settings.TRACKING_BOUNDARIES["LAYERS"] is a list of
+    {"FILE": "bd_upazilas.geojson", "FIELDS": {"thana": "ADM3_EN", "city": "ADM2_EN"}}
+where FIELDS maps ContactSaveLead fields to GeoJSON feature properties.
+"""
+import json
+import logging
+import math
+import threading
+from array import array
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "LAYERS": [],
+    "NODE_CAPACITY": 16,
+}
+
+
+def boundary_settings():
+    conf = dict(DEFAULTS)
+    conf.update(getattr(settings, "TRACKING_BOUNDARIES", {}))
+    return conf
+
+
+# ───────────────────────────────────────────────
+def point_in_ring(x, y, ring):
+    inside = False
+    j = len(ring) - 1
+    for i in range(len(ring)):
+        xi, yi = ring[i][0], ring[i][1]
+        xj, yj = ring[j][0], ring[j][1]
+        if (yi > y) != (yj > y) and x < (xj - xi) * (y - yi) / (yj - yi) + xi:
+            inside = not inside
+        j = i
+    return inside
+
+
+def point_in_polygon(x, y, polygon):
+    """polygon: [outer ring, *holes] in GeoJSON (lon, lat) order."""
+    if not point_in_ring(x, y, polygon[0]):
+        return False
+    return not any(point_in_ring(x, y, hole) for hole in polygon[1:])
+
+
+def polygon_bbox(polygon):
+    xs = [p[0] for p in polygon[0]]
+    ys = [p[1] for p in polygon[0]]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+# ───────────────────────────────────────────────
+class STRTree:
+    """
+    Sort-Tile-Recursive packed R-tree over bounding boxes.
+
+    Level 0 holds the item boxes in packed order; every level above holds
+    one box per group of NODE_CAPACITY children. Child ranges are implicit
+    (node i of level k covers children [i*M, (i+1)*M) of level k-1), so
+    each level is four array('d') columns.
+    """
+
+    def __init__(self, boxes, capacity=16):
+        self.capacity = capacity
+        order = self._pack(list(range(len(boxes))), boxes)
+        self.items = array("l", order)
+        level = [boxes[i] for i in order]
+        self.levels = [self._columns(level)]
+        while len(level) > 1:
+            level = [
+                self._union(level[i:i + capacity])
+                for i in range(0, len(level), capacity)
+            ]
+            self.levels.append(self._columns(level))
+
+    def _pack(self, ids, boxes):
+        m = self.capacity
+        if len(ids) <= m:
+            return ids
+        leaves = math.ceil(len(ids) / m)
+        slices = math.ceil(math.sqrt(leaves))
+        per_slice = slices * m
+
+        def cx(i):
+            return boxes[i][0] + boxes[i][2]
+
+        def cy(i):
+            return boxes[i][1] + boxes[i][3]
+
+        ids = sorted(ids, key=cx)
+        out = []
+        for s in range(0, len(ids), per_slice):
+            out.extend(sorted(ids[s:s + per_slice], key=cy))
+        return out
+
+    @staticmethod
+    def _union(group):
+        return (
+            min(b[0] for b in group), min(b[1] for b in group),
+            max(b[2] for b in group), max(b[3] for b in group),
+        )
+
+    @staticmethod
+    def _columns(level):
+        return tuple(array("d", (b[k] for b in level)) for k in range(4))
+
+    def query_point(self, x, y):
+        """Indexes of items whose box contains (x, y)."""
+        if not self.items:
+            return []
+        m = self.capacity
+        top = len(self.levels) - 1
+        stack = [(top, i) for i in range(len(self.levels[top][0]))]
+        hits = []
+        while stack:
+            depth, i = stack.pop()
+            minx, miny, maxx, maxy = self.levels[depth]
+            if not (minx[i] <= x <= maxx[i] and miny[i] <= y <= maxy[i]):
+                continue
+            if depth == 0:
+                hits.append(self.items[i])
+                continue
+            below = len(self.levels[depth - 1][0])
+            stack.extend((depth - 1, c) for c in range(i * m, min((i + 1) * m, below)))
+        return hits
+
+
+# ───────────────────────────────────────────────
+class BoundaryLayer:
+
+    def __init__(self, path, fields, capacity=16):
+        self.path = path
+        self.fields = fields
+        self.polygons = []     # [outer ring, *holes] per entry
+        self.values = []       # lead fields per entry
+        with open(path, encoding="utf-8") as fh:
+            data = json.load(fh)
+        for feature in data.get("features", []):
+            self._add(feature)
+        self.tree = STRTree([polygon_bbox(p) for p in self.polygons], capacity)
+
+    def _add(self, feature):
+        geom = feature.get("geometry") or {}
+        props = feature.get("properties") or {}
+        values = {
+            field: str(props[prop])
+            for field, prop in self.fields.items()
+            if props.get(prop) not in (None, "")
+        }
+        if geom.get("type") == "Polygon":
+            polygons = [geom["coordinates"]]
+        elif geom.get("type") == "MultiPolygon":
+            polygons = geom["coordinates"]
+        else:
+            return
+        for polygon in polygons:
+            if polygon and polygon[0]:
+                self.polygons.append(polygon)
+                self.values.append(values)
+
+    def __len__(self):
+        return len(self.polygons)
+
+    def resolve(self, lat, lon):
+        x, y = float(lon), float(lat)
+        for i in self.tree.query_point(x, y):
+            if point_in_polygon(x, y, self.polygons[i]):
+                return self.values[i]
+        return None
+
+
+class BoundaryResolver:
+
+    def __init__(self, layers=(), capacity=16):
+        self.layers = [
+            BoundaryLayer(layer["FILE"], layer["FIELDS"], capacity)
+            for layer in layers
+        ]
+
+    def __bool__(self):
+        return bool(self.layers)
+
+    def resolve(self, lat, lon):
+        """Merged fields from every layer containing the point (first layer wins)."""
+        location = {}
+        for layer in self.layers:
+            hit = layer.resolve(lat, lon)
+            if hit:
+                for field, value in hit.items():
+                    location.setdefault(field, value)
+        return location
+
+
+_resolver = None
+_resolver_lock = threading.Lock()
+
+
+def get_resolver():
+    global _resolver
+    if _resolver is None:
+        with _resolver_lock:
+            if _resolver is None:
+                conf = boundary_settings()
+                try:
+                    _resolver = BoundaryResolver(conf["LAYERS"], conf["NODE_CAPACITY"])
+                except (OSError, ValueError) as e:
+                    logger.warning("Boundary layers disabled: %s", e)
+                    _resolver = BoundaryResolver()
+    return _resolver
@@ -0,0 +1,186 @@
+# app_tracking/geocache.py
+"""
+Two-level reverse geocode cache keyed by geohash cell.
+
+  memory  → per-process OrderedDict LRU (MEMORY_SIZE entries, TTL)
+  DB      → GeocodeCacheEntry rows (TTL, trimmed LRU-first to MAX_ROWS)
+
+Override rows (is_override=True) form a separate layer: any cell prefix
+that matches the point replaces the geocoder's fields for that area.
+"""
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from . import geohash
+from .models import GeocodeCacheEntry
+
+DEFAULTS = {
+    "PRECISION": 7,              # ~150 m cells
+    "TTL": 60 * 60 * 24 * 30,    # seconds
+    "MEMORY_SIZE": 5000,
+    "MAX_ROWS": 100000,
+    "TRIM_EVERY": 500,           # DB writes between LRU trims
+}
+
+FIELDS = ("country", "city", "thana", "post_office")
+
+
+def cache_settings():
+    conf = dict(DEFAULTS)
+    conf.update(getattr(settings, "TRACKING_GEOCACHE", {}))
+    return conf
+
+
+class GeocodeCache:
+
+    def __init__(self, conf=None):
+        self.conf = conf or cache_settings()
+        self.precision = self.conf["PRECISION"]
+        self._memory = OrderedDict()     # cell → (location, expires_at)
+        self._overrides = None           # cell prefix → location
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.counters = {
+            "memory_hits": 0,
+            "db_hits": 0,
+            "misses": 0,
+            "override_hits": 0,
+            "evictions": 0,
+        }
+
+    def cell(self, lat, lon):
+        return geohash.encode(float(lat), float(lon), self.precision)
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats["memory_size"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["db_hits"] + stats["misses"]
+        stats["hit_ratio"] = (
+            round((stats["memory_hits"] + stats["db_hits"]) / lookups, 4) if lookups else None
+        )
+        stats["precision"] = self.precision
+        return stats
+
+    # ── overrides ──────────────────────────────
+    def load_overrides(self):
+        rows = GeocodeCacheEntry.objects.filter(is_override=True)
+        overrides = {row.cell: row.location() for row in rows}
+        with self._lock:
+            self._overrides = overrides
+        return overrides
+
+    def override_for(self, lat, lon):
+        """Longest matching override prefix for a point, or None."""
+        overrides = self._overrides
+        if overrides is None:
+            overrides = self.load_overrides()
+        if not overrides:
+            return None
+        full = geohash.encode(float(lat), float(lon), 12)
+        for n in range(len(full), 0, -1):
+            hit = overrides.get(full[:n])
+            if hit is not None:
+                self._count("override_hits")
+                return hit
+        return None
+
+    def seed_override(self, cell, **location):
+        GeocodeCacheEntry.objects.update_or_create(
+            cell=cell,
+            defaults={**{k: location.get(k, "") for k in FIELDS},
+                      "is_override": True, "expires_at": None},
+        )
+        self._overrides = None
+
+    # ── cache ──────────────────────────────────
+    def get(self, lat, lon):
+        cell = self.cell(lat, lon)
+        now = timezone.now()
+
+        with self._lock:
+            entry = self._memory.get(cell)
+            if entry is not None:
+                location, expires_at = entry
+                if expires_at > now:
+                    self._memory.move_to_end(cell)
+                    self.counters["memory_hits"] += 1
+                    return dict(location)
+                del self._memory[cell]
+
+        row = (
+            GeocodeCacheEntry.objects
+            .filter(cell=cell, is_override=False, expires_at__gt=now)
+            .first()
+        )
+        if row is None:
+            self._count("misses")
+            return None
+
+        GeocodeCacheEntry.objects.filter(pk=row.pk).update(
+            hits=F("hits") + 1, last_used_at=now
+        )
+        location = row.location()
+        self._remember(cell, location, row.expires_at)
+        self._count("db_hits")
+        return dict(location)
+
+    def put(self, lat, lon, location):
+        cell = self.cell(lat, lon)
+        if self._overrides and cell in self._overrides:
+            return  # same cell is seeded as an override row
+        now = timezone.now()
+        expires_at = now + timedelta(seconds=self.conf["TTL"])
+        location = {k: location.get(k) or "" for k in FIELDS}
+
+        GeocodeCacheEntry.objects.update_or_create(
+            cell=cell, is_override=False,
+            defaults={**location, "expires_at": expires_at, "last_used_at": now},
+        )
+        self._remember(cell, location, expires_at)
+
+        self._writes += 1
+        if self._writes % self.conf["TRIM_EVERY"] == 0:
+            self.trim()
+
+    def _remember(self, cell, location, expires_at):
+        with self._lock:
+            self._memory[cell] = (location, expires_at)
+            self._memory.move_to_end(cell)
+            while len(self._memory) > self.conf["MEMORY_SIZE"]:
+                self._memory.popitem(last=False)
+                self.counters["evictions"] += 1
+
+    def trim(self):
+        """Drop expired rows, then least-recently-used rows over MAX_ROWS."""
+        qs = GeocodeCacheEntry.objects.filter(is_override=False)
+        deleted, _ = qs.filter(expires_at__lte=timezone.now()).delete()
+
+        overflow = qs.count() - self.conf["MAX_ROWS"]
+        if overflow > 0:
+            stale = list(qs.order_by("last_used_at").values_list("pk", flat=True)[:overflow])
+            deleted += GeocodeCacheEntry.objects.filter(pk__in=stale).delete()[0]
+        self._count("evictions", deleted)
+        return deleted
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = GeocodeCache()
+    return _cache
@@ -0,0 +1,204 @@
+# app_tracking/geocode.py
+"""
+Background reverse geocoding for GPS leads.
+
+track_visit writes the lead immediately with raw lat/lon and
+location_source="GPS"; the worker below fills country / city / thana /
+post_office afterwards.
+
+  - one daemon thread per process, started lazily
+  - providers from app_tracking.geocoders, tried in order
+    (settings.TRACKING_GEOCODER["PROVIDERS"])
+  - requests/second limit for remote providers ("RATE_LIMIT")
+  - duplicate in-flight lookups for the same geohash cell are merged:
+    one lookup updates every waiting lead
+  - results go through app_tracking.geocache (memory + DB, with
+    per-cell overrides seeded in GeocodeCacheEntry)
+  - thana / city / post_office are refined by admin boundary polygons
+    (app_tracking.boundaries) when layers are configured
+"""
+import logging
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from app_accounts.models import ContactSaveLead
+
+from .boundaries import get_resolver
+from .geocache import get_cache
+from .geocoders import UNKNOWN, get_providers
+from .signals import leads_located, send_robust
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "ENABLED": True,
+    "PROVIDERS": ["local", "nominatim"],
+    "PLACES_FILE": None,     # None → bundled app_tracking/data/bd_places.tsv
+    "MAX_DISTANCE_KM": 50,   # local provider gives up beyond this
+    "URL": "https://nominatim.openstreetmap.org/reverse",
+    "USER_AGENT": "SmartCard-GPS-Tracker/4.0",
+    "TIMEOUT": 5,
+    "RATE_LIMIT": 1.0,       # requests per second (Nominatim policy: 1)
+}
+
+LOCATION_FIELDS = ("country", "city", "thana", "post_office")
+
+
+def geocoder_settings():
+    conf = dict(DEFAULTS)
+    conf.update(getattr(settings, "TRACKING_GEOCODER", {}))
+    return conf
+
+
+def needs_geocode(lead):
+    return (
+        lead.location_source == "GPS"
+        and lead.latitude is not None
+        and lead.longitude is not None
+        and (lead.country in (None, "", UNKNOWN))
+    )
+
+
+# ───────────────────────────────────────────────
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart (thread-safe)."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+class GeocodeWorker:
+    def __init__(self, conf=None, cache=None):
+        self.conf = conf or geocoder_settings()
+        self.cache = cache or get_cache()
+        self.providers = get_providers(self.conf)
+        self.limiter = RateLimiter(self.conf["RATE_LIMIT"])
+
+        self._queue = queue.Queue()
+        self._pending = {}          # geohash cell → ((lat, lon), set(lead ids))
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="geocode-worker", daemon=True)
+        self._thread.start()
+
+    def submit(self, lead_id, lat, lon):
+        """Queue a lead; returns False when merged into an in-flight lookup."""
+        k = self.cache.cell(lat, lon)
+        with self._lock:
+            if k in self._pending:
+                self._pending[k][1].add(lead_id)
+                return False
+            self._pending[k] = ((float(lat), float(lon)), {lead_id})
+        self._queue.put(k)
+        return True
+
+    def pending(self):
+        with self._lock:
+            return sum(len(ids) for _, ids in self._pending.values())
+
+    def resolve(self, lat, lon):
+        """First provider with an answer wins; only remote answers are cached."""
+        for provider in self.providers:
+            if provider.remote:
+                self.limiter.wait()
+            location = provider.reverse(lat, lon)
+            if location:
+                if provider.remote:
+                    self.cache.put(lat, lon, location)
+                return location
+        return None
+
+    def lookup(self, lat, lon):
+        """Override layer → cache → providers, refined by boundary polygons."""
+        override = self.cache.override_for(lat, lon)
+        if override and all(override.get(f) for f in LOCATION_FIELDS):
+            return dict(override)
+
+        location = self.cache.get(lat, lon)
+        if location is None:
+            location = self.resolve(lat, lon) or {}
+
+        location.update(get_resolver().resolve(lat, lon))
+        if override:
+            location.update(override)
+        return location or None
+
+    def process(self, k):
+        with self._lock:
+            (lat, lon), _ = self._pending[k]
+        try:
+            location = self.lookup(lat, lon)
+        finally:
+            # on failure too: otherwise every later submit() for the cell
+            # would merge into an entry nobody processes any more
+            with self._lock:
+                _, lead_ids = self._pending.pop(k, (None, set()))
+        if location and lead_ids:
+            leads = ContactSaveLead.objects.filter(pk__in=lead_ids)
+            previous = dict(leads.values_list("pk", "country"))
+            leads.update(**location)
+            send_robust(
+                leads_located, ContactSaveLead,
+                lead_ids=sorted(lead_ids), location=location, previous=previous,
+            )
+        return location
+
+    def _run(self):
+        while True:
+            k = self._queue.get()
+            close_old_connections()
+            try:
+                self.process(k)
+            except Exception:
+                logger.exception("Geocode worker failed for %s", k)
+            finally:
+                close_old_connections()
+                self._queue.task_done()
+
+    def join(self):
+        """Block until everything queued so far has been processed."""
+        self._queue.join()
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def get_worker():
+    global _worker
+    if _worker is None:
+        with _worker_lock:
+            if _worker is None:
+                worker = GeocodeWorker()
+                worker.start()
+                _worker = worker
+    return _worker
+
+
+def enqueue_leads(leads):
+    if not geocoder_settings()["ENABLED"]:
+        return
+    todo = [lead for lead in leads if needs_geocode(lead)]
+    if not todo:
+        return
+    worker = get_worker()
+    for lead in todo:
+        worker.submit(lead.pk, lead.latitude, lead.longitude)
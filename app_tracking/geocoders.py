@@ -0,0 +1,147 @@
+# app_tracking/geocoders.py
+"""
+Reverse geocoding providers.
+
+Every provider answers ``reverse(lat, lon)`` with a dict of
+ContactSaveLead location fields (country / city / thana / post_office) or
+None. settings.TRACKING_GEOCODER["PROVIDERS"] lists them in the order they
+are tried:
+
+  "local"      → LocalPlacesGeocoder: nearest place from a bundled
+                 tab-separated places file, KD-tree, no network
+  "nominatim"  → NominatimGeocoder: HTTP, slower, rate limited
+  dotted path  → any BaseGeocoder subclass
+"""
+import csv
+import logging
+import threading
+from pathlib import Path
+
+import requests
+from django.utils.module_loading import import_string
+
+from .kdtree import KDTree
+
+logger = logging.getLogger(__name__)
+
+UNKNOWN = "Unknown"
+DEFAULT_PLACES_FILE = Path(__file__).resolve().parent / "data" / "bd_places.tsv"
+
+
+class BaseGeocoder:
+    name = "base"
+    # remote providers go through the worker's rate limiter and the geocache
+    remote = False
+
+    def reverse(self, lat, lon):
+        raise NotImplementedError
+
+
+# ───────────────────────────────────────────────
+def parse_nominatim(data):
+    """Map a Nominatim /reverse payload onto ContactSaveLead fields."""
+    addr = (data or {}).get("address", {})
+    return {
+        "country": addr.get("country", UNKNOWN),
+        "city": addr.get("state_district") or addr.get("county") or addr.get("state") or UNKNOWN,
+        "thana": addr.get("town") or addr.get("city") or addr.get("village") or UNKNOWN,
+        "post_office": addr.get("postcode", "-"),
+    }
+
+
+class NominatimGeocoder(BaseGeocoder):
+    name = "nominatim"
+    remote = True
+
+    def __init__(self, conf):
+        self.url = conf["URL"]
+        self.user_agent = conf["USER_AGENT"]
+        self.timeout = conf["TIMEOUT"]
+        self.session = requests.Session()
+
+    def reverse(self, lat, lon):
+        try:
+            r = self.session.get(self.url, params={
+                "format": "json", "lat": lat, "lon": lon, "zoom": 18,
+                "accept-language": "en", "addressdetails": 1,
+            }, headers={"User-Agent": self.user_agent}, timeout=self.timeout)
+            r.raise_for_status()
+            return parse_nominatim(r.json())
+        except Exception as e:
+            logger.warning("Nominatim reverse geocode failed for %s,%s: %s", lat, lon, e)
+            return None
+
+
+# ───────────────────────────────────────────────
+class LocalPlacesGeocoder(BaseGeocoder):
+    """
+    Nearest-place lookup over a GeoNames-style TSV.
+
+    Required columns: name, latitude, longitude. Optional: country,
+    district, upazila, postcode. Lines starting with "#" are comments.
+    """
+    name = "local"
+
+    def __init__(self, path=None, max_distance_km=50):
+        self.path = Path(path or DEFAULT_PLACES_FILE)
+        self.max_distance_km = max_distance_km
+        self.places = []
+        self.tree = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        with self._lock:
+            if self.tree is not None:
+                return
+            with open(self.path, encoding="utf-8", newline="") as fh:
+                rows = csv.DictReader(
+                    (line for line in fh if line.strip() and not line.startswith("#")),
+                    delimiter="\t",
+                )
+                places = [
+                    (float(row["latitude"]), float(row["longitude"]), {
+                        "country": row.get("country") or UNKNOWN,
+                        "city": row.get("district") or UNKNOWN,
+                        "thana": row.get("upazila") or row.get("name") or UNKNOWN,
+                        "post_office": row.get("postcode") or "-",
+                    })
+                    for row in rows
+                ]
+            self.places = [p[2] for p in places]
+            self.tree = KDTree((lat, lon) for lat, lon, _ in places)
+
+    def nearest(self, lat, lon):
+        """Return (location, distance_km) or None."""
+        if self.tree is None:
+            self.load()
+        hit = self.tree.nearest(float(lat), float(lon), self.max_distance_km)
+        if hit is None:
+            return None
+        index, km = hit
+        return dict(self.places[index]), km
+
+    def reverse(self, lat, lon):
+        hit = self.nearest(lat, lon)
+        return hit[0] if hit else None
+
+
+# ───────────────────────────────────────────────
+def build_provider(name, conf):
+    if name == "nominatim":
+        return NominatimGeocoder(conf)
+    if name == "local":
+        return LocalPlacesGeocoder(conf.get("PLACES_FILE"), conf.get("MAX_DISTANCE_KM", 50))
+    return import_string(name)(conf)
+
+
+_providers = {}
+_providers_lock = threading.Lock()
+
+
+def get_providers(conf):
+    """Provider instances for conf["PROVIDERS"], shared per process."""
+    names = tuple(conf["PROVIDERS"])
+    with _providers_lock:
+        if names not in _providers:
+            _providers[names] = [build_provider(n, conf) for n in names]
+        return _providers[names]
@@ -0,0 +1,93 @@
+# app_tracking/geohash.py
+"""Minimal geohash encode / decode helpers (no external dependency)."""
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_DECODE = {c: i for i, c in enumerate(BASE32)}
+
+
+def encode(lat, lon, precision=7):
+    lat_lo, lat_hi = -90.0, 90.0
+    lon_lo, lon_hi = -180.0, 180.0
+    chars = []
+    bits = 0
+    ch = 0
+    even = True
+    while len(chars) < precision:
+        if even:
+            mid = (lon_lo + lon_hi) / 2
+            if lon >= mid:
+                ch = (ch << 1) | 1
+                lon_lo = mid
+            else:
+                ch <<= 1
+                lon_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                ch = (ch << 1) | 1
+                lat_lo = mid
+            else:
+                ch <<= 1
+                lat_hi = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[ch])
+            bits = 0
+            ch = 0
+    return "".join(chars)
+
+
+def bbox(cell):
+    """Return (min_lat, min_lon, max_lat, max_lon) of a geohash cell."""
+    lat_lo, lat_hi = -90.0, 90.0
+    lon_lo, lon_hi = -180.0, 180.0
+    even = True
+    for c in cell:
+        n = _DECODE[c]
+        for shift in range(4, -1, -1):
+            bit = (n >> shift) & 1
+            if even:
+                mid = (lon_lo + lon_hi) / 2
+                if bit:
+                    lon_lo = mid
+                else:
+                    lon_hi = mid
+            else:
+                mid = (lat_lo + lat_hi) / 2
+                if bit:
+                    lat_lo = mid
+                else:
+                    lat_hi = mid
+            even = not even
+    return lat_lo, lon_lo, lat_hi, lon_hi
+
+
+def decode(cell):
+    """Return the (lat, lon) centre of a geohash cell."""
+    lat_lo, lon_lo, lat_hi, lon_hi = bbox(cell)
+    return (lat_lo + lat_hi) / 2, (lon_lo + lon_hi) / 2
+
+
+def cell_size(precision):
+    """Return (lat_degrees, lon_degrees) covered by one cell."""
+    lat_lo, lon_lo, lat_hi, lon_hi = bbox("0" * precision)
+    return lat_hi - lat_lo, lon_hi - lon_lo
+
+
+def cover(min_lat, min_lon, max_lat, max_lon, precision):
+    """All cells of the given precision that intersect a bounding box."""
+    dlat, dlon = cell_size(precision)
+    cells = set()
+    lat = min_lat
+    while True:
+        lon = min_lon
+        while True:
+            cells.add(encode(min(lat, max_lat), min(lon, max_lon), precision))
+            if lon >= max_lon:
+                break
+            lon += dlon
+        if lat >= max_lat:
+            break
+        lat += dlat
+    return sorted(cells)
@@ -0,0 +1,134 @@
+# app_tracking/geoip.py
+"""
+Process-wide GeoIP2 City lookups.
+
+One memory-mapped reader per worker process (MODE_MMAP_EXT when the
+libmaxminddb extension is available, MODE_MMAP otherwise), opened lazily
+on the first lookup, with an LRU of ip → location in front of it.
+"""
+import ipaddress
+import logging
+import threading
+from functools import lru_cache
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "DATABASE": None,        # path to GeoLite2-City.mmdb
+    "CACHE_SIZE": 10000,     # ip → location entries kept per process
+}
+
+
+def geoip_settings():
+    conf = dict(DEFAULTS)
+    conf.update(getattr(settings, "TRACKING_GEOIP", {}))
+    if not conf["DATABASE"]:
+        # Django's own convention: GEOIP_PATH dir + GEOIP_CITY file name
+        path = getattr(settings, "GEOIP_PATH", None)
+        if path:
+            city = getattr(settings, "GEOIP_CITY", "GeoLite2-City.mmdb")
+            conf["DATABASE"] = str(path) if str(path).endswith(".mmdb") else f"{path}/{city}"
+    return conf
+
+
+def _location_from_city(resp):
+    subdivision = resp.subdivisions.most_specific
+    return {
+        "country": resp.country.name,
+        "country_code": resp.country.iso_code,
+        "city": resp.city.name,
+        "region": subdivision.name,
+        "postal_code": resp.postal.code,
+        "latitude": resp.location.latitude,
+        "longitude": resp.location.longitude,
+    }
+
+
+class GeoIPService:
+
+    def __init__(self, database=None, cache_size=10000):
+        self.database = database
+        self._reader = None
+        self._failed = False
+        self._lock = threading.Lock()
+        self.lookup = lru_cache(maxsize=cache_size)(self._lookup)
+
+    @property
+    def reader(self):
+        if self._reader is None and not self._failed:
+            with self._lock:
+                if self._reader is None and not self._failed:
+                    self._reader = self._open()
+        return self._reader
+
+    def _open(self):
+        if not self.database:
+            logger.warning("GeoIP disabled: no TRACKING_GEOIP['DATABASE'] / GEOIP_PATH configured")
+            self._failed = True
+            return None
+        try:
+            import geoip2.database
+            import maxminddb
+        except ImportError:
+            logger.warning("GeoIP disabled: geoip2 is not installed")
+            self._failed = True
+            return None
+        try:
+            # memory-mapped either way; the C extension is just faster
+            try:
+                return geoip2.database.Reader(self.database, mode=maxminddb.MODE_MMAP_EXT)
+            except ValueError:
+                return geoip2.database.Reader(self.database, mode=maxminddb.MODE_MMAP)
+        except Exception as e:
+            logger.warning("GeoIP disabled: cannot open %s (%s)", self.database, e)
+            self._failed = True
+            return None
+
+    def _lookup(self, ip):
+        """Uncached lookup. Returns a location dict or None."""
+        try:
+            addr = ipaddress.ip_address(ip)
+        except (TypeError, ValueError):
+            return None
+        if not addr.is_global:
+            return None
+
+        reader = self.reader
+        if reader is None:
+            return None
+        try:
+            return _location_from_city(reader.city(str(addr)))
+        except Exception:
+            # AddressNotFoundError and friends: cache the miss as well
+            return None
+
+    def stats(self):
+        info = self.lookup.cache_info()
+        return {"hits": info.hits, "misses": info.misses, "size": info.currsize, "max_size": info.maxsize}
+
+    def close(self):
+        with self._lock:
+            if self._reader is not None:
+                self._reader.close()
+                self._reader = None
+        self.lookup.cache_clear()
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_geoip():
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                conf = geoip_settings()
+                _service = GeoIPService(conf["DATABASE"], conf["CACHE_SIZE"])
+    return _service
+
+
+def lookup(ip):
+    return get_geoip().lookup(ip)
@@ -0,0 +1,277 @@
+# app_tracking/ingest.py
+"""
+Tracking ingestion.
+
+Public endpoints (track_visit / click_track / track_save_gps) build unsaved
+ContactSaveLead / ClickEvent objects and hand them to ``record()``.
+
+settings.TRACKING_INGEST["MODE"]:
+  - "buffered" → rows are queued in memory and a background flusher
+                 bulk_create()s them in batches (size / time thresholds,
+                 flushed again at interpreter shutdown). The default: the
+                 request does no tracking writes, and the analytics
+                 receivers run once per batch instead of once per event.
+                 Events still queued when a process dies are lost.
+  - "sync"     → rows and every events_ingested receiver (rollups,
+                 sketches, heatmap, top-K, live) are written inside the
+                 request. On SQLite one visit costs 49 queries the first
+                 time in a day (derived rows created), 31 for a repeat
+                 located visit and 21 for a repeat GPS visit still waiting
+                 for the geocoder (IngestTests.test_sync_record_query_count)
+"""
+import atexit
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+from app_accounts.models import ClickEvent, ContactSaveLead, CustomUser
+
+from .signals import events_ingested, send_robust
+from .visitors import stamp
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "MODE": "buffered",
+    "BATCH_SIZE": 200,
+    "FLUSH_INTERVAL": 1.0,   # seconds
+    "MAX_QUEUE": 10000,      # above this the caller flushes inline
+    "SESSION_WINDOW": 1800,  # seconds per visitor session bucket
+}
+
+
+def ingest_settings():
+    conf = dict(DEFAULTS)
+    conf.update(getattr(settings, "TRACKING_INGEST", {}))
+    return conf
+
+
+def write_events(leads=(), clicks=()):
+    """
+    Bulk insert leads/clicks in one transaction and announce them. Only
+    the insert can raise; receiver failures are logged (signals.send_robust).
+    """
+    leads, clicks = list(leads), list(clicks)
+    if not leads and not clicks:
+        return leads, clicks
+
+    with transaction.atomic():
+        if leads:
+            leads = ContactSaveLead.objects.bulk_create(leads)
+        if clicks:
+            clicks = ClickEvent.objects.bulk_create(clicks)
+
+    send_robust(events_ingested, ContactSaveLead, leads=leads, clicks=clicks)
+    return leads, clicks
+
+
+# ───────────────────────────────────────────────
+class EventBuffer:
+    """
+    Per-process queue of unsaved tracking rows.
+
+    A daemon thread wakes every FLUSH_INTERVAL seconds (or as soon as
+    BATCH_SIZE events are waiting) and writes them with bulk_create.
+    """
+
+    def __init__(self, batch_size=200, flush_interval=1.0, max_queue=10000):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+
+        self._leads = deque()
+        self._clicks = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def __len__(self):
+        return len(self._leads) + len(self._clicks)
+
+    def start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stopped.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="tracking-flusher", daemon=True
+            )
+            self._thread.start()
+
+    def put(self, leads=(), clicks=()):
+        with self._lock:
+            self._leads.extend(leads)
+            self._clicks.extend(clicks)
+            pending = len(self._leads) + len(self._clicks)
+
+        if pending >= self.max_queue:
+            # back-pressure: never let the queue grow without bound
+            self.flush()
+        elif pending >= self.batch_size:
+            self._wakeup.set()
+
+    def _drain(self):
+        with self._lock:
+            leads, clicks = list(self._leads), list(self._clicks)
+            self._leads.clear()
+            self._clicks.clear()
+        return leads, clicks
+
+    def flush(self):
+        """Write everything queued so far. Returns number of rows written."""
+        with self._flush_lock:
+            leads, clicks = self._drain()
+            written = 0
+            for i in range(0, max(len(leads), len(clicks)), self.batch_size):
+                chunk_leads = leads[i:i + self.batch_size]
+                chunk_clicks = clicks[i:i + self.batch_size]
+                try:
+                    write_events(chunk_leads, chunk_clicks)
+                    written += len(chunk_leads) + len(chunk_clicks)
+                except Exception:
+                    logger.exception(
+                        "Tracking flush failed, dropped %s events",
+                        len(chunk_leads) + len(chunk_clicks),
+                    )
+            return written
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            if not len(self):
+                continue
+            close_old_connections()
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+
+    def stop(self):
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout=max(self.flush_interval, 1.0) * 2)
+        self.flush()
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer():
+    """Lazily create the process-wide buffer and its flusher thread."""
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                conf = ingest_settings()
+                buf = EventBuffer(
+                    batch_size=conf["BATCH_SIZE"],
+                    flush_interval=conf["FLUSH_INTERVAL"],
+                    max_queue=conf["MAX_QUEUE"],
+                )
+                buf.start()
+                atexit.register(buf.stop)
+                _buffer = buf
+    return _buffer
+
+
+def is_buffered():
+    return ingest_settings()["MODE"] == "buffered"
+
+
+def record(leads=(), clicks=()):
+    """
+    Entry point for the tracking views.
+
+    Returns the saved leads in sync mode, or an empty list when the events
+    were only queued (buffered mode).
+    """
+    leads, clicks = list(leads), list(clicks)
+    # stamped now, at request time, so buffered rows get the same window
+    stamp(leads + clicks)
+
+    if is_buffered():
+        get_buffer().put(leads, clicks)
+        return []
+    return _save(leads, clicks)
+
+
+def _save(leads, clicks):
+    saved_leads = []
+    with transaction.atomic():
+        for lead in leads:
+            lead.save()
+            saved_leads.append(lead)
+        for click in clicks:
+            click.save()
+
+    send_robust(events_ingested, ContactSaveLead, leads=saved_leads, clicks=clicks)
+    return saved_leads
+
+
+# ───────────────────────────────────────────────
+BENCH_PLACES = [
+    ("Bangladesh", "Dhaka", "Dhanmondi", 23.7461, 90.3742),
+    ("Bangladesh", "Chattogram", "Kotwali", 22.3350, 91.8325),
+    ("India", "Kolkata", "Park Street", 22.5535, 88.3525),
+]
+
+
+def benchmark(events=1000, batch_size=200):
+    """
+    events/sec for per-request _save() (sync mode) vs buffered
+    write_events() batches. Both paths send events_ingested, so the
+    analytics receivers are timed on both sides.
+
+    Runs against a throwaway profile: deleting it cascades to its leads,
+    clicks and every derived row (rollups, sketches, heatmap cells), so no
+    real analytics change.
+    """
+    profile = CustomUser.objects.create_user(
+        email=f"bench-{uuid.uuid4().hex[:8]}@example.invalid",
+        username=f"bench-{uuid.uuid4().hex[:8]}",
+    )
+
+    def make(n, tag):
+        leads = []
+        for i in range(n):
+            country, city, thana, lat, lon = BENCH_PLACES[i % len(BENCH_PLACES)]
+            leads.append(ContactSaveLead(
+                profile=profile,
+                device_ip=f"10.0.{i // 256 % 256}.{i % 256}",
+                user_agent=f"bench/{tag}",
+                country=country, city=city, thana=thana,
+                latitude=lat, longitude=lon,
+                location_source="IP",
+            ))
+        stamp(leads)
+        return leads
+
+    results = {}
+    try:
+        start = time.perf_counter()
+        for lead in make(events, "sync"):
+            _save([lead], [])
+        results["sync"] = events / (time.perf_counter() - start)
+
+        buf = EventBuffer(batch_size=batch_size, max_queue=events + 1)
+        start = time.perf_counter()
+        for lead in make(events, "buffered"):
+            buf.put(leads=[lead])
+        enqueue_time = time.perf_counter() - start
+        buf.flush()
+        total_time = time.perf_counter() - start
+        results["buffered_enqueue"] = events / enqueue_time if enqueue_time else float("inf")
+        results["buffered"] = events / total_time
+    finally:
+        profile.delete()
+    return results
@@ -0,0 +1,95 @@
+# app_tracking/kdtree.py
+"""
+Array-backed 3-D KD-tree for nearest-point queries on the globe.
+
+Points are stored as unit vectors (x, y, z) so plain Euclidean (chord)
+distance orders exactly like great-circle distance and there is no
+antimeridian / pole special-casing. The tree is implicit: after build()
+the node for range [lo, hi) sits at mid = (lo + hi) // 2 and its split
+axis is depth % 3, so the whole structure is three array('d') columns
+plus one array('l') of original indexes.
+"""
+import math
+from array import array
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def to_xyz(lat, lon):
+    la, lo = math.radians(lat), math.radians(lon)
+    c = math.cos(la)
+    return c * math.cos(lo), c * math.sin(lo), math.sin(la)
+
+
+def chord_to_km(chord):
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, chord / 2))
+
+
+def km_to_chord(km):
+    return 2 * math.sin(min(math.pi / 2, km / (2 * EARTH_RADIUS_KM)))
+
+
+class KDTree:
+
+    def __init__(self, points):
+        """points: iterable of (lat, lon). Index i refers to the i-th point."""
+        coords = [to_xyz(lat, lon) for lat, lon in points]
+        order = list(range(len(coords)))
+        self._build(coords, order, 0, len(order), 0)
+
+        self.xs = array("d", (coords[i][0] for i in order))
+        self.ys = array("d", (coords[i][1] for i in order))
+        self.zs = array("d", (coords[i][2] for i in order))
+        self.ids = array("l", order)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @staticmethod
+    def _build(coords, order, lo, hi, depth):
+        # iterative stack instead of recursion: dataset size is unbounded
+        stack = [(lo, hi, depth)]
+        while stack:
+            lo, hi, depth = stack.pop()
+            if hi - lo <= 1:
+                continue
+            axis = depth % 3
+            order[lo:hi] = sorted(order[lo:hi], key=lambda i: coords[i][axis])
+            mid = (lo + hi) // 2
+            stack.append((lo, mid, depth + 1))
+            stack.append((mid + 1, hi, depth + 1))
+
+    def nearest(self, lat, lon, max_km=None):
+        """Return (index, distance_km) of the nearest point, or None."""
+        if not self.ids:
+            return None
+        qx, qy, qz = to_xyz(lat, lon)
+        q = (qx, qy, qz)
+        cols = (self.xs, self.ys, self.zs)
+        best_d2 = km_to_chord(max_km) ** 2 if max_km is not None else float("inf")
+        best = -1
+
+        # (lo, hi, depth, squared distance from query to the splitting plane)
+        stack = [(0, len(self.ids), 0, 0.0)]
+        while stack:
+            lo, hi, depth, bound = stack.pop()
+            if lo >= hi or bound >= best_d2:
+                continue
+            mid = (lo + hi) // 2
+            dx = self.xs[mid] - qx
+            dy = self.ys[mid] - qy
+            dz = self.zs[mid] - qz
+            d2 = dx * dx + dy * dy + dz * dz
+            if d2 < best_d2:
+                best_d2, best = d2, mid
+
+            axis = depth % 3
+            diff = q[axis] - cols[axis][mid]
+            near, far = ((lo, mid), (mid + 1, hi)) if diff < 0 else ((mid + 1, hi), (lo, mid))
+            # far side first so the near side is popped (and tightens best) first
+            stack.append((far[0], far[1], depth + 1, diff * diff))
+            stack.append((near[0], near[1], depth + 1, bound))
+
+        if best < 0:
+            return None
+        return self.ids[best], chord_to_km(math.sqrt(best_d2))
@@ -0,0 +1,186 @@
+# app_tracking/live.py
+"""
+Live fan-out of freshly ingested tracking events (dashboard SSE stream).
+
+Receivers of ``events_ingested`` / ``leads_located`` ``publish()`` a small
+JSON-able dict on a channel ("profile:<pk>"); ``sse_stream()`` subscribes
+to a channel from an async view and turns messages into Server-Sent
+Events. Streaming responses are only served incrementally under ASGI
+(smartcard.asgi.application).
+
+settings.TRACKING_LIVE["BROKER"] picks the backend. ``LocalBroker`` only
+reaches subscribers in the same process, which is enough for a single
+ASGI worker; a broker shared by several workers (Redis pub/sub, …) can be
+dropped in with the same publish() / subscribe() / has_subscribers()
+interface.
+"""
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "BROKER": "app_tracking.live.LocalBroker",
+    "QUEUE_SIZE": 100,       # per subscriber; oldest messages are dropped first
+    "KEEPALIVE": 15,         # seconds between SSE comment pings
+    "MAX_AGE": 300,          # seconds before a stream ends and the browser reconnects
+    "RETRY": 3000,           # ms, EventSource reconnect delay
+}
+
+
+def live_settings():
+    conf = dict(DEFAULTS)
+    conf.update(getattr(settings, "TRACKING_LIVE", {}))
+    return conf
+
+
+def profile_channel(profile_id):
+    return f"profile:{profile_id}"
+
+
+# ───────────────────────────────────────────────
+class Subscription:
+    """
+    One listener: a bounded asyncio.Queue owned by the subscriber's event
+    loop. ``deliver()`` may be called from any thread.
+    """
+
+    def __init__(self, broker, channel, loop, maxsize):
+        self.broker = broker
+        self.channel = channel
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def _put(self, message):
+        if self.queue.full():
+            # slow consumer: lose the oldest message rather than block publishers
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+    def deliver(self, message):
+        if self.loop.is_closed():
+            self.close()
+            return
+        try:
+            self.loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:     # loop closed between the check and the call
+            self.close()
+
+    async def get(self, timeout=None):
+        """Next message, or None after ``timeout`` seconds of silence."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
+
+
+class LocalBroker:
+    """In-process pub/sub keyed by channel name."""
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel):
+        """Must be called from the event loop that will consume messages."""
+        sub = Subscription(self, channel, asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscribers[channel].add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            subs = self._subscribers.get(sub.channel)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subscribers[sub.channel]
+
+    def has_subscribers(self, channel=None):
+        """Lets publishers skip building payloads nobody will read."""
+        with self._lock:
+            return bool(self._subscribers.get(channel)) if channel else bool(self._subscribers)
+
+    def publish(self, channel, message):
+        """Fan ``message`` out to the channel. Returns the number of subscribers."""
+        with self._lock:
+            subs = list(self._subscribers.get(channel, ()))
+        for sub in subs:
+            sub.deliver(message)
+        return len(subs)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """Lazily create the process-wide broker."""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                conf = live_settings()
+                _broker = import_string(conf["BROKER"])(queue_size=conf["QUEUE_SIZE"])
+    return _broker
+
+
+def publish(channel, message):
+    try:
+        return get_broker().publish(channel, message)
+    except Exception:
+        # live updates are best effort; never fail the ingest path
+        logger.exception("Live publish to %s failed", channel)
+        return 0
+
+
+# ───────────────────────────────────────────────
+def sse_event(data, event=None):
+    lines = []
+    if event:
+        lines.append(f"event: {event}")
+    payload = json.dumps(data, cls=DjangoJSONEncoder, separators=(",", ":"))
+    lines.extend(f"data: {line}" for line in payload.splitlines())
+    return ("\n".join(lines) + "\n\n").encode()
+
+
+async def sse_stream(channel, keepalive=None, max_age=None):
+    """
+    Async byte iterator for StreamingHttpResponse: one SSE event per
+    published message (event name = message["type"]), a comment line every
+    ``keepalive`` seconds, and end of stream after ``max_age`` seconds so
+    proxies never hold a connection forever (EventSource reconnects).
+    """
+    conf = live_settings()
+    keepalive = keepalive or conf["KEEPALIVE"]
+    max_age = max_age or conf["MAX_AGE"]
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + max_age
+
+    async with get_broker().subscribe(channel) as sub:
+        yield f"retry: {conf['RETRY']}\n\n".encode()
+        while (remaining := deadline - loop.time()) > 0:
+            message = await sub.get(timeout=min(keepalive, remaining))
+            if message is None:
+                yield b": keepalive\n\n"
+            else:
+                yield sse_event(message, message.get("type"))
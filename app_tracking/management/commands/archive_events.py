@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from app_tracking.archive import MODELS, archive, archive_settings
+
+
+class Command(BaseCommand):
+    help = (
+        "Move ContactSaveLead / ClickEvent rows older than the retention period "
+        "into per-month gzip'd NDJSON archive partitions, then delete them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int,
+                            help="retention in days (default: TRACKING_ARCHIVE['RETENTION_DAYS'])")
+        parser.add_argument("--kind", action="append", choices=list(MODELS),
+                            help="leads and/or clicks (repeatable); default: both")
+        parser.add_argument("--dir", help="archive directory (default: TRACKING_ARCHIVE['DIR'])")
+        parser.add_argument("--chunk-size", type=int)
+        parser.add_argument("--dry-run", action="store_true",
+                            help="only report how many rows each month would archive")
+
+    def handle(self, *args, **opts):
+        report = archive(
+            days=opts["days"],
+            kinds=opts["kind"],
+            dry_run=opts["dry_run"],
+            root=opts["dir"],
+            chunk_size=opts["chunk_size"],
+        )
+        for kind, months in report.items():
+            for month, rows in months.items():
+                self.stdout.write(f"{kind} {month}: {rows} rows")
+        total = sum(sum(m.values()) for m in report.values())
+        verb = "Would archive" if opts["dry_run"] else "Archived"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {total} rows into {opts['dir'] or archive_settings()['DIR']}."
+        ))
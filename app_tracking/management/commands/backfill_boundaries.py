@@ -0,0 +1,76 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from app_accounts.models import ContactSaveLead
+from app_tracking.boundaries import get_resolver
+from app_tracking.geocode import LOCATION_FIELDS
+from app_tracking.geocoders import UNKNOWN
+from app_tracking.signals import leads_relocated, send_robust
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill location fields of existing GPS leads from boundary polygons, in "
+        "chunks, then recount the analytics of the profiles whose leads changed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=2000)
+        parser.add_argument("--profile", type=int, help="only leads of this profile id")
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **opts):
+        resolver = get_resolver()
+        if not resolver:
+            raise CommandError("No TRACKING_BOUNDARIES['LAYERS'] configured.")
+
+        # IP leads carry the GeoIP city's coordinates: a polygon hit would
+        # invent a thana for them. Leads still waiting for the geocoder get
+        # their polygons there, and are counted when it locates them.
+        qs = (
+            ContactSaveLead.objects
+            .filter(location_source="GPS", latitude__isnull=False, longitude__isnull=False)
+            .exclude(Q(country__isnull=True) | Q(country__in=("", UNKNOWN)))
+        )
+        if opts["profile"]:
+            qs = qs.filter(profile_id=opts["profile"])
+
+        last_pk = 0
+        scanned = updated = 0
+        touched = set()
+        while True:
+            chunk = list(
+                qs.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .values_list("pk", "profile_id", "latitude", "longitude", *LOCATION_FIELDS)
+                [:opts["chunk_size"]]
+            )
+            if not chunk:
+                break
+            last_pk = chunk[-1][0]
+            scanned += len(chunk)
+
+            # one UPDATE per distinct resolved location in the chunk
+            groups = defaultdict(list)
+            for pk, profile_id, lat, lon, *current in chunk:
+                location = resolver.resolve(lat, lon)
+                current = dict(zip(LOCATION_FIELDS, current))
+                if location and any(current.get(k) != v for k, v in location.items()):
+                    groups[tuple(sorted(location.items()))].append(pk)
+                    touched.add(profile_id)
+
+            for location, pks in groups.items():
+                updated += len(pks)
+                if not opts["dry_run"]:
+                    ContactSaveLead.objects.filter(pk__in=pks).update(**dict(location))
+
+            self.stdout.write(f"… {scanned} scanned, {updated} updated (last id {last_pk})")
+
+        if touched and not opts["dry_run"]:
+            self.stdout.write(f"Recounting analytics of {len(touched)} profiles…")
+            send_robust(leads_relocated, ContactSaveLead, profile_ids=touched)
+
+        verb = "would update" if opts["dry_run"] else "updated"
+        self.stdout.write(self.style.SUCCESS(f"Done: {scanned} scanned, {verb} {updated}."))
@@ -0,0 +1,84 @@
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app_tracking.geoip import GeoIPService
+from app_tracking.mmdb import write_city_db
+
+
+def fixture_networks(count):
+    """count /24 networks under 103.x.y.0 with fake Bangladeshi cities."""
+    return {
+        f"103.{i // 256}.{i % 256}.0/24": {
+            "country": "Bangladesh", "country_code": "BD",
+            "city": f"City {i}", "region": "Dhaka Division",
+            "postal_code": str(1000 + i % 9000),
+            "latitude": 23.0 + (i % 100) / 100, "longitude": 90.0 + (i % 100) / 100,
+        }
+        for i in range(count)
+    }
+
+
+class Command(BaseCommand):
+    help = "Micro-benchmark GeoIP lookups/sec: reopen-per-lookup vs shared MMAP reader vs LRU."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--mmdb", help="existing .mmdb (default: generated test fixture)")
+        parser.add_argument("--networks", type=int, default=500)
+        parser.add_argument("--lookups", type=int, default=20000)
+        parser.add_argument("--unique-ips", type=int, default=500,
+                            help="distinct IPs in the workload (repeat scans hit the LRU)")
+
+    def handle(self, *args, **opts):
+        try:
+            import geoip2.database
+        except ImportError:
+            raise CommandError("geoip2 is not installed.")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = opts["mmdb"]
+            if not path:
+                path = str(Path(tmp) / "test-city.mmdb")
+                write_city_db(path, fixture_networks(opts["networks"]))
+
+            rnd = random.Random(42)
+            n_nets = max(opts["networks"], 1)
+            pool = [
+                f"103.{(i % n_nets) // 256}.{(i % n_nets) % 256}.{rnd.randint(1, 254)}"
+                for i in range(opts["unique_ips"])
+            ]
+            ips = [rnd.choice(pool) for _ in range(opts["lookups"])]
+
+            # old behaviour: a new reader for every request
+            reopen_n = min(len(ips), 2000)
+            start = time.perf_counter()
+            for ip in ips[:reopen_n]:
+                reader = geoip2.database.Reader(path)
+                try:
+                    reader.city(ip)
+                except Exception:
+                    pass
+                reader.close()
+            reopen = reopen_n / (time.perf_counter() - start)
+
+            service = GeoIPService(path, cache_size=opts["unique_ips"])
+            start = time.perf_counter()
+            for ip in ips:
+                service._lookup(ip)
+            shared = len(ips) / (time.perf_counter() - start)
+
+            start = time.perf_counter()
+            for ip in ips:
+                service.lookup(ip)
+            cached = len(ips) / (time.perf_counter() - start)
+            stats = service.stats()
+            service.close()
+
+        self.stdout.write(f"lookups: {len(ips)}  unique ips: {opts['unique_ips']}")
+        self.stdout.write(f"reopen per lookup    : {reopen:>12.0f} lookups/sec")
+        self.stdout.write(f"shared MMAP reader   : {shared:>12.0f} lookups/sec")
+        self.stdout.write(f"shared reader + LRU  : {cached:>12.0f} lookups/sec "
+                          f"(hits {stats['hits']}, misses {stats['misses']})")
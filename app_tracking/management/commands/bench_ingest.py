@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from app_tracking.ingest import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark tracking ingestion: per-request writes (sync mode) vs buffered "
+        "bulk_create() batches, events_ingested receivers included on both sides."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--events", type=int, default=2000)
+        parser.add_argument("--batch-size", type=int, default=200)
+
+    def handle(self, *args, **opts):
+        results = benchmark(opts["events"], opts["batch_size"])
+
+        self.stdout.write(f"events: {opts['events']}  batch size: {opts['batch_size']}")
+        self.stdout.write(f"sync (per request)   : {results['sync']:>10.0f} events/sec")
+        self.stdout.write(f"buffered (enqueue)   : {results['buffered_enqueue']:>10.0f} events/sec")
+        self.stdout.write(f"buffered (end-to-end): {results['buffered']:>10.0f} events/sec")
+        self.stdout.write(self.style.SUCCESS(
+            f"speed-up: {results['buffered'] / results['sync']:.1f}x"
+        ))
@@ -0,0 +1,205 @@
+import asyncio
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.util import setup_testing_defaults
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from app_accounts.models import CustomUser
+from app_tracking import ingest
+
+
+def visitor(i):
+    """A distinct (ip, user agent) per visit, like real traffic."""
+    return f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}", f"bench/{i}"
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(int(len(values) * q), len(values) - 1)] if values else 0.0
+
+
+async def drive(call, visits, concurrency):
+    """``concurrency`` clients issue ``visits`` requests between them."""
+    latencies, errors = [], 0
+    todo = iter(range(visits))
+
+    async def client():
+        nonlocal errors
+        for i in todo:
+            start = time.perf_counter()
+            try:
+                status = await call(i)
+            except Exception:
+                status = None
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return {
+        "rps": visits / (time.perf_counter() - start),
+        "p50": percentile(latencies, 0.50) * 1000,
+        "p95": percentile(latencies, 0.95) * 1000,
+        "errors": errors,
+    }
+
+
+# ───────────────────────────────────────────────
+def asgi_caller(path):
+    """Requests straight into Django's ASGI handler on this event loop."""
+    app = ASGIHandler()
+
+    async def call(i):
+        ip, ua = visitor(i)
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+            "query_string": b"", "root_path": "",
+            "headers": [(b"host", b"localhost"), (b"user-agent", ua.encode())],
+            "client": (ip, 50000), "server": ("localhost", 80),
+        }
+        status = None
+        body_sent = False
+
+        async def receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await asyncio.Future()      # never disconnects; Django cancels this
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        await app(scope, receive, send)
+        return status
+
+    return call, None
+
+
+def wsgi_caller(path, threads):
+    """Requests through Django's WSGI handler on a fixed pool of worker threads."""
+    app = WSGIHandler()
+    pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="bench-wsgi")
+
+    def request(i):
+        ip, ua = visitor(i)
+        environ = {"PATH_INFO": path, "REMOTE_ADDR": ip, "HTTP_USER_AGENT": ua,
+                   "HTTP_HOST": "localhost"}
+        setup_testing_defaults(environ)
+        status = []
+        response = app(environ, lambda s, headers, exc_info=None: status.append(s))
+        try:
+            b"".join(response)
+        finally:
+            response.close()
+        return int(status[0].split()[0])
+
+    async def call(i):
+        return await asyncio.get_running_loop().run_in_executor(pool, request, i)
+
+    return call, pool.shutdown
+
+
+def http_caller(base_url, path, concurrency, timeout):
+    """One pooled aiohttp session against a running server: keep-alive, limits, timeouts."""
+    try:
+        import aiohttp
+    except ImportError:
+        raise CommandError("aiohttp is not installed (needed for --url).")
+
+    session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=concurrency, keepalive_timeout=30),
+        timeout=aiohttp.ClientTimeout(total=timeout, connect=min(timeout, 5)),
+    )
+
+    async def call(i):
+        ip, ua = visitor(i)
+        headers = {"User-Agent": ua, "X-Forwarded-For": ip}
+        async with session.get(base_url.rstrip("/") + path, headers=headers) as r:
+            await r.read()
+            return r.status
+
+    return call, session.close
+
+
+# ───────────────────────────────────────────────
+class Command(BaseCommand):
+    help = (
+        "Load-test track_visit: concurrent visits/sec and latency through the "
+        "WSGI handler (fixed worker threads) vs the ASGI handler (one event loop)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--visits", type=int, default=1000, help="requests per run")
+        parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 50, 200],
+                            help="concurrent clients (one run per value)")
+        parser.add_argument("--threads", type=int, default=8,
+                            help="WSGI worker threads (gunicorn --threads)")
+        parser.add_argument("--handler", choices=["wsgi", "asgi", "both"], default="both")
+        parser.add_argument("--ingest", choices=["sync", "buffered"],
+                            help="override TRACKING_INGEST['MODE'] for the run")
+        parser.add_argument("--url",
+                            help="drive a running server (same database) instead, "
+                                 "e.g. http://127.0.0.1:8000")
+        parser.add_argument("--timeout", type=float, default=10.0, help="--url request timeout")
+
+    def handle(self, *args, **opts):
+        handlers = ["wsgi", "asgi"] if opts["handler"] == "both" else [opts["handler"]]
+        if opts["url"]:
+            handlers = ["http"]
+        conf = dict(getattr(settings, "TRACKING_INGEST", {}))
+        if opts["ingest"]:
+            conf["MODE"] = opts["ingest"]
+
+        # throwaway profile so benchmark rows never touch real analytics
+        profile = CustomUser.objects.create_user(
+            email=f"bench-{uuid.uuid4().hex[:8]}@example.invalid",
+            username=f"bench-{uuid.uuid4().hex[:8]}",
+        )
+        path = reverse("app_accounts:track_visit", args=[profile.username])
+        try:
+            with override_settings(TRACKING_INGEST=conf):
+                self.stdout.write(
+                    f"visits: {opts['visits']}  ingest: {conf.get('MODE', 'sync')}  "
+                    f"wsgi threads: {opts['threads']}"
+                )
+                self.stdout.write(
+                    f"{'handler':<8}{'clients':>8}{'visits/s':>11}{'p50 ms':>10}{'p95 ms':>10}{'errors':>8}"
+                )
+                for concurrency in opts["concurrency"]:
+                    for handler in handlers:
+                        result = asyncio.run(self.run(handler, path, concurrency, opts))
+                        self.stdout.write(
+                            f"{handler:<8}{concurrency:>8}{result['rps']:>11.0f}"
+                            f"{result['p50']:>10.1f}{result['p95']:>10.1f}{result['errors']:>8}"
+                        )
+                if ingest.is_buffered():
+                    ingest.get_buffer().flush()
+        finally:
+            profile.delete()
+
+    async def run(self, handler, path, concurrency, opts):
+        if handler == "asgi":
+            call, close = asgi_caller(path)
+        elif handler == "wsgi":
+            call, close = wsgi_caller(path, opts["threads"])
+        else:
+            call, close = http_caller(opts["url"], path, concurrency, opts["timeout"])
+        try:
+            return await drive(call, opts["visits"], concurrency)
+        finally:
+            if close:
+                result = close()
+                if asyncio.iscoroutine(result):
+                    await result
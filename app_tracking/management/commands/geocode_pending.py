@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from app_accounts.models import ContactSaveLead
+from app_tracking.geocode import UNKNOWN, GeocodeWorker
+
+
+class Command(BaseCommand):
+    help = (
+        "Reverse geocode GPS leads that are still missing an address "
+        "(e.g. queued in a worker that was restarted)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=1000)
+
+    def handle(self, *args, **opts):
+        leads = (
+            ContactSaveLead.objects
+            .filter(location_source="GPS", latitude__isnull=False, longitude__isnull=False)
+            .filter(country__in=[UNKNOWN, ""])
+            .order_by("-timestamp")
+            .values_list("pk", "latitude", "longitude")[:opts["limit"]]
+        )
+
+        # same merge + rate limit as the live worker, run inline
+        worker = GeocodeWorker()
+        keys = []
+        for pk, lat, lon in leads:
+            if worker.submit(pk, lat, lon):
+                keys.append(worker._queue.get())
+
+        located = 0
+        for k in keys:
+            if worker.process(k):
+                located += 1
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(keys)} lookups, {located} resolved."
+        ))
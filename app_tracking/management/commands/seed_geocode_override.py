@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from app_tracking import geohash
+from app_tracking.geocache import get_cache
+
+
+class Command(BaseCommand):
+    help = "Seed reverse-geocode overrides for one geohash cell or every cell covering a box."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--cell", help="geohash cell (any precision)")
+        parser.add_argument("--bbox", nargs=4, type=float,
+                            metavar=("MIN_LAT", "MIN_LON", "MAX_LAT", "MAX_LON"))
+        parser.add_argument("--precision", type=int, default=6)
+        parser.add_argument("--country", default="")
+        parser.add_argument("--city", default="")
+        parser.add_argument("--thana", default="")
+        parser.add_argument("--post-office", default="")
+
+    def handle(self, *args, **opts):
+        if opts["cell"]:
+            cells = [opts["cell"]]
+        elif opts["bbox"]:
+            cells = geohash.cover(*opts["bbox"], opts["precision"])
+        else:
+            raise CommandError("Pass --cell or --bbox.")
+
+        location = {
+            "country": opts["country"],
+            "city": opts["city"],
+            "thana": opts["thana"],
+            "post_office": opts["post_office"],
+        }
+        if not any(location.values()):
+            raise CommandError("Nothing to override: pass at least one location field.")
+
+        cache = get_cache()
+        for cell in cells:
+            cache.seed_override(cell, **location)
+        self.stdout.write(self.style.SUCCESS(f"Seeded {len(cells)} override cell(s)."))
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeocodeCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cell', models.CharField(max_length=12, unique=True)),
+                ('country', models.CharField(blank=True, default='', max_length=100)),
+                ('city', models.CharField(blank=True, default='', max_length=100)),
+                ('thana', models.CharField(blank=True, default='', max_length=120)),
+                ('post_office', models.CharField(blank=True, default='', max_length=120)),
+                ('is_override', models.BooleanField(db_index=True, default=False)),
+                ('hits', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField(blank=True, null=True)),
+                ('last_used_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'ordering': ['cell'],
+            },
+        ),
+    ]
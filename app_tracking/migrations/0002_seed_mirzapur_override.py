@@ -0,0 +1,50 @@
+from django.db import migrations
+
+# Former hard-coded box in track_visit: the reverse geocoder is not
+# precise enough around Mirzapur, Tangail. The cells are the precision-6
+# geohashes covering lat 24.14-24.20, lon 90.00-90.08, frozen here so the
+# migration does not depend on app_tracking.geohash.
+MIRZAPUR_CELLS = [
+    "wh2124", "wh2125", "wh2126", "wh2127", "wh212d", "wh212e", "wh212f", "wh212g",
+    "wh212h", "wh212j", "wh212k", "wh212m", "wh212n", "wh212p", "wh212q", "wh212r",
+    "wh212s", "wh212t", "wh212u", "wh212v", "wh212w", "wh212x", "wh212y", "wh212z",
+    "wh2134", "wh2135", "wh2136", "wh2137", "wh213d", "wh213e", "wh213f", "wh213g",
+    "wh213h", "wh213j", "wh213k", "wh213m", "wh213n", "wh213p", "wh213q", "wh213r",
+    "wh213s", "wh213t", "wh213u", "wh213v", "wh213w", "wh213x", "wh213y", "wh213z",
+    "wh2180", "wh2181", "wh2182", "wh2183", "wh2184", "wh2185", "wh2186", "wh2187",
+    "wh2188", "wh2189", "wh218b", "wh218c", "wh218d", "wh218e", "wh218f", "wh218g",
+    "wh218h", "wh218j", "wh218k", "wh218m", "wh218s", "wh218t", "wh218u", "wh218v",
+    "wh2190", "wh2191", "wh2192", "wh2193", "wh2194", "wh2195", "wh2196", "wh2197",
+    "wh2198", "wh2199", "wh219b", "wh219c", "wh219d", "wh219e", "wh219f", "wh219g",
+    "wh219h", "wh219j", "wh219k", "wh219m", "wh219s", "wh219t", "wh219u", "wh219v",
+]
+
+
+def seed(apps, schema_editor):
+    Entry = apps.get_model("app_tracking", "GeocodeCacheEntry")
+    for cell in MIRZAPUR_CELLS:
+        Entry.objects.update_or_create(
+            cell=cell,
+            defaults={
+                "thana": "Mirzapur",
+                "city": "Tangail District",
+                "is_override": True,
+                "expires_at": None,
+            },
+        )
+
+
+def unseed(apps, schema_editor):
+    Entry = apps.get_model("app_tracking", "GeocodeCacheEntry")
+    Entry.objects.filter(cell__in=MIRZAPUR_CELLS, is_override=True).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_tracking', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed, unseed),
+    ]
@@ -0,0 +1,167 @@
+# app_tracking/mmdb.py
+"""
+Writer for small MaxMind DB (.mmdb) files.
+
+Only meant for fixtures / benchmarks: builds an IPv4 City-style database
+from a handful of networks so GeoIP code can run without the real
+GeoLite2 download.
+
+    write_city_db("/tmp/test-city.mmdb", {
+        "103.4.144.0/22": {"country": "Bangladesh", "country_code": "BD",
+                           "city": "Dhaka", "latitude": 23.7, "longitude": 90.4},
+    })
+"""
+import ipaddress
+import struct
+import time
+
+METADATA_MARKER = b"\xab\xcd\xefMaxMind.com"
+
+# MaxMind DB data types
+_UTF8, _DOUBLE, _UINT16, _UINT32, _MAP = 2, 3, 5, 6, 7
+_UINT64, _ARRAY, _BOOL = 9, 11, 14
+
+
+class UInt16(int):
+    """Marks an int that must be stored as uint16 (metadata fields)."""
+
+
+class UInt64(int):
+    """Marks an int that must be stored as uint64 (metadata fields)."""
+
+
+def _control(type_id, size):
+    if type_id <= 7:
+        first, ext = type_id << 5, b""
+    else:
+        first, ext = 0, bytes([type_id - 7])
+
+    if size < 29:
+        return bytes([first | size]) + ext
+    if size < 285:
+        return bytes([first | 29]) + ext + bytes([size - 29])
+    if size < 65821:
+        return bytes([first | 30]) + ext + struct.pack(">H", size - 285)
+    return bytes([first | 31]) + ext + struct.pack(">I", size - 65821)[1:]
+
+
+def _uint(type_id, value):
+    raw = value.to_bytes((value.bit_length() + 7) // 8, "big") if value else b""
+    return _control(type_id, len(raw)) + raw
+
+
+def encode(value):
+    if isinstance(value, bool):
+        return _control(_BOOL, int(value))
+    if isinstance(value, str):
+        raw = value.encode("utf-8")
+        return _control(_UTF8, len(raw)) + raw
+    if isinstance(value, float):
+        return _control(_DOUBLE, 8) + struct.pack(">d", value)
+    if isinstance(value, UInt16):
+        return _uint(_UINT16, value)
+    if isinstance(value, UInt64):
+        return _uint(_UINT64, value)
+    if isinstance(value, int):
+        if value < 0:
+            raise ValueError("negative integers are not supported")
+        return _uint(_UINT32 if value < 2 ** 32 else _UINT64, value)
+    if isinstance(value, dict):
+        out = _control(_MAP, len(value))
+        for k, v in value.items():
+            out += encode(str(k)) + encode(v)
+        return out
+    if isinstance(value, (list, tuple)):
+        out = _control(_ARRAY, len(value))
+        for v in value:
+            out += encode(v)
+        return out
+    raise TypeError(f"cannot encode {type(value).__name__}")
+
+
+def city_record(country=None, country_code=None, city=None, region=None,
+                postal_code=None, latitude=None, longitude=None):
+    """Shape a flat location like a GeoIP2 City record."""
+    record = {}
+    if country or country_code:
+        record["country"] = {"iso_code": country_code or "", "names": {"en": country or ""}}
+    if city:
+        record["city"] = {"names": {"en": city}}
+    if region:
+        record["subdivisions"] = [{"names": {"en": region}}]
+    if postal_code:
+        record["postal"] = {"code": postal_code}
+    if latitude is not None and longitude is not None:
+        record["location"] = {"latitude": float(latitude), "longitude": float(longitude)}
+    return record
+
+
+def build(networks, database_type="GeoLite2-City", record_size=24):
+    """Return .mmdb bytes for an IPv4 {cidr: record} mapping."""
+    if record_size != 24:
+        raise ValueError("only 24-bit records are supported")
+
+    data = b""
+    offsets = {}
+    nodes = [[None, None]]
+
+    for cidr, record in networks.items():
+        net = ipaddress.ip_network(cidr)
+        if net.version != 4:
+            raise ValueError("only IPv4 networks are supported")
+        blob = encode(record)
+        if blob not in offsets:
+            offsets[blob] = len(data)
+            data += blob
+
+        bits = int(net.network_address)
+        node = 0
+        for depth in range(net.prefixlen):
+            bit = (bits >> (31 - depth)) & 1
+            if depth == net.prefixlen - 1:
+                nodes[node][bit] = ("data", offsets[blob])
+            else:
+                child = nodes[node][bit]
+                if not isinstance(child, int):
+                    nodes.append([None, None])
+                    child = nodes[node][bit] = len(nodes) - 1
+                node = child
+
+    node_count = len(nodes)
+    max_record = 1 << record_size
+
+    def resolve(rec):
+        if rec is None:
+            return node_count
+        if isinstance(rec, int):
+            return rec
+        return node_count + 16 + rec[1]
+
+    tree = b""
+    for left, right in nodes:
+        for rec in (left, right):
+            value = resolve(rec)
+            if value >= max_record:
+                raise ValueError("database too large for 24-bit records")
+            tree += value.to_bytes(3, "big")
+
+    metadata = encode({
+        "node_count": node_count,
+        "record_size": UInt16(record_size),
+        "ip_version": UInt16(4),
+        "database_type": database_type,
+        "languages": ["en"],
+        "binary_format_major_version": UInt16(2),
+        "binary_format_minor_version": UInt16(0),
+        "build_epoch": UInt64(int(time.time())),
+        "description": {"en": "SmartCard test fixture"},
+    })
+    return tree + b"\x00" * 16 + data + METADATA_MARKER + metadata
+
+
+def write_city_db(path, networks):
+    """networks: {cidr: flat location dict (see city_record)}."""
+    records = {cidr: city_record(**loc) for cidr, loc in networks.items()}
+    with open(path, "wb") as fh:
+        fh.write(build(records))
+    return path
@@ -1,3 +1,37 @@
 from django.db import models
 
-# Create your models here.
+
+# ======================================================
+#   REVERSE GEOCODE CACHE (geohash cell → address)
+# ======================================================
+class GeocodeCacheEntry(models.Model):
+    cell = models.CharField(max_length=12, unique=True)
+
+    country = models.CharField(max_length=100, blank=True, default="")
+    city = models.CharField(max_length=100, blank=True, default="")
+    thana = models.CharField(max_length=120, blank=True, default="")
+    post_office = models.CharField(max_length=120, blank=True, default="")
+
+    # Overrides are seeded by hand, never expire and win over the geocoder
+    # for every point inside the cell (prefix match, any precision).
+    is_override = models.BooleanField(default=False, db_index=True)
+
+    hits = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+    last_used_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def location(self):
+        """Non-empty location fields as a dict."""
+        return {
+            k: getattr(self, k)
+            for k in ("country", "city", "thana", "post_office")
+            if getattr(self, k)
+        }
+
+    def __str__(self):
+        kind = "override" if self.is_override else "cache"
+        return f"{self.cell} [{kind}] {self.thana or self.city or self.country}"
+
+    class Meta:
+        ordering = ["cell"]
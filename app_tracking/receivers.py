@@ -0,0 +1,11 @@
+# app_tracking/receivers.py
+from django.dispatch import receiver
+
+from .geocode import enqueue_leads
+from .signals import events_ingested
+
+
+@receiver(events_ingested)
+def geocode_new_leads(sender, leads, **kwargs):
+    """Hand GPS leads without an address to the background geocoder."""
+    enqueue_leads(leads)
@@ -0,0 +1,35 @@
+# app_tracking/signals.py
+import logging
+
+from django.dispatch import Signal
+
+logger = logging.getLogger(__name__)
+
+# Sent after tracking rows reach the database (sync or buffered flush).
+#   leads  → list[ContactSaveLead] (saved, pk set)
+#   clicks → list[ClickEvent]      (saved, pk set)
+events_ingested = Signal()
+
+# Sent by the geocode worker after it fills location fields on GPS leads.
+#   lead_ids → list[int]
+#   location → dict(country, city, thana, post_office)
+#   previous → {lead_id: country before the update}
+leads_located = Signal()
+
+# Sent by backfill_boundaries after it rewrote location fields of leads
+# that may already be counted (so counts cannot simply be moved).
+#   profile_ids → set[int]
+leads_relocated = Signal()
+
+
+def send_robust(signal, sender, **kwargs):
+    """
+    These signals fire after the rows are committed: a failing receiver is
+    logged on its own and never stops the others (or fails the caller).
+    """
+    for receiver, result in signal.send_robust(sender=sender, **kwargs):
+        if isinstance(result, Exception):
+            logger.error(
+                "Receiver %s.%s failed", receiver.__module__, receiver.__qualname__,
+                exc_info=(type(result), result, result.__traceback__),
+            )
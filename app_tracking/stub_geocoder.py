@@ -0,0 +1,56 @@
+# app_tracking/stub_geocoder.py
+"""
+Tiny local stand-in for Nominatim's /reverse endpoint.
+
+    server = serve(port=0)        # background thread, random free port
+    TRACKING_GEOCODER["URL"] = f"http://127.0.0.1:{server.server_port}/reverse"
+    ...
+    server.shutdown()
+
+Every response returns ``server.address`` (editable) and bumps
+``server.hits`` so callers can check rate limiting / request merging.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+DEFAULT_ADDRESS = {
+    "country": "Bangladesh",
+    "state_district": "Dhaka District",
+    "city": "Dhaka",
+    "postcode": "1000",
+}
+
+
+class StubGeocoderHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.hits += 1
+            server.requests.append(parse_qs(urlparse(self.path).query))
+        if server.delay:
+            time.sleep(server.delay)
+
+        body = json.dumps({"address": server.address}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(host="127.0.0.1", port=0, address=None, delay=0.0):
+    server = ThreadingHTTPServer((host, port), StubGeocoderHandler)
+    server.address = dict(address or DEFAULT_ADDRESS)
+    server.delay = delay
+    server.hits = 0
+    server.requests = []
+    server.lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
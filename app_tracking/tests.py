@@ -1,3 +1,567 @@
-from django.test import TestCase
+import gzip
+import json
+import math
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from app_accounts.models import ContactSaveLead, CustomUser
+from app_analytics.models import DailyRollup, TopKSketch
+from app_analytics.sketches import ALL_TIME
+
+from . import archive, geocoders, geoip, ingest, stub_geocoder
+from .boundaries import BoundaryResolver
+from .geocache import GeocodeCache, cache_settings
+from .geocode import GeocodeWorker, geocoder_settings
+from .kdtree import KDTree
+from .mmdb import write_city_db
+from .models import GeocodeCacheEntry
+from .signals import events_ingested
+
+DHAKA = (23.8103, 90.4125)
+NEARBY = (23.8104, 90.4126)        # same ~150 m cache cell as DHAKA
+CHATTOGRAM = (22.3350, 91.8325)
+SYLHET = (24.8949, 91.8687)
+
+
+def make_lead(profile, **kwargs):
+    fields = dict(
+        profile=profile, device_ip="10.0.0.1", user_agent="test/1.0",
+        country="Bangladesh", city="Dhaka", location_source="IP",
+    )
+    fields.update(kwargs)
+    return ContactSaveLead(**fields)
+
+
+class IngestTests(TestCase):
+    def setUp(self):
+        self.profile = CustomUser.objects.create_user(email="owner@example.com", username="owner")
+        self.seen = []
+
+    def failing_receiver(self, sender, **kwargs):
+        raise RuntimeError("receiver broke")
+
+    def recording_receiver(self, sender, leads, clicks, **kwargs):
+        self.seen.extend(leads)
+
+    def connect_receivers(self):
+        events_ingested.connect(self.failing_receiver, dispatch_uid="test-failing")
+        events_ingested.connect(self.recording_receiver, dispatch_uid="test-recording")
+        self.addCleanup(events_ingested.disconnect, dispatch_uid="test-failing")
+        self.addCleanup(events_ingested.disconnect, dispatch_uid="test-recording")
+
+    @override_settings(TRACKING_INGEST={"MODE": "sync"})
+    def test_sync_record_survives_failing_receiver(self):
+        self.connect_receivers()
+        with self.assertLogs("app_tracking", "ERROR"):
+            saved = ingest.record(leads=[make_lead(self.profile)])
+
+        self.assertEqual(len(saved), 1)
+        self.assertEqual(self.seen, saved)
+        # the analytics receivers connected before ours ran as well
+        self.assertEqual(DailyRollup.objects.get(profile=self.profile).leads, 1)
+
+    @override_settings(TRACKING_INGEST={"MODE": "sync"}, TRACKING_GEOCODER={"ENABLED": False})
+    def test_sync_record_query_count(self):
+        # write amplification of one visit: the lead plus every events_ingested
+        # receiver. A new receiver (or a per-row query in one) shows up here.
+        gps = dict(location_source="GPS", country=None, city=None, latitude=DHAKA[0], longitude=DHAKA[1])
+        for label, queries, fields in (
+            ("first visit of the day", 49, {}),
+            ("repeat visit", 31, {}),
+            ("first GPS visit, not geocoded yet", 42, gps),
+            ("repeat GPS visit", 21, gps),
+        ):
+            with self.subTest(label):
+                with self.assertNumQueries(queries):
+                    ingest.record(leads=[make_lead(self.profile, thana="Gulshan", **fields)])
+
+    def test_flush_counts_rows_written_despite_failing_receiver(self):
+        self.connect_receivers()
+        buf = ingest.EventBuffer(batch_size=2)
+        buf.put(leads=[make_lead(self.profile) for _ in range(3)])
+
+        with self.assertLogs("app_tracking", "ERROR") as logs:
+            written = buf.flush()
+
+        self.assertEqual(written, 3)
+        self.assertEqual(len(self.seen), 3)
+        self.assertEqual(ContactSaveLead.objects.filter(profile=self.profile).count(), 3)
+        self.assertFalse(any("dropped" in line for line in logs.output))
+
+
+def haversine_km(a, b):
+    (lat1, lon1), (lat2, lon2) = (map(math.radians, p) for p in (a, b))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6371.0088 * math.asin(math.sqrt(h))
+
+
+class KDTreeTests(TestCase):
+    def test_nearest_matches_brute_force(self):
+        rng = random.Random(7)
+        points = [(rng.uniform(-90, 90), rng.uniform(-180, 180)) for _ in range(500)]
+        # clustered points, the poles and both sides of the antimeridian
+        points += [(DHAKA[0] + rng.gauss(0, 0.05), DHAKA[1] + rng.gauss(0, 0.05)) for _ in range(200)]
+        points += [(90, 0), (-90, 0), (10, 179.9), (10, -179.9)]
+        tree = KDTree(points)
+        self.assertEqual(len(tree), len(points))
+
+        queries = [(rng.uniform(-90, 90), rng.uniform(-180, 180)) for _ in range(300)]
+        queries += [DHAKA, (89.9, 120), (10, -179.99), (10, 180)]
+        for q in queries:
+            with self.subTest(q=q):
+                index, km = tree.nearest(*q)
+                expected = min(haversine_km(q, p) for p in points)
+                self.assertAlmostEqual(haversine_km(q, points[index]), expected, places=6)
+                self.assertAlmostEqual(km, expected, places=6)
+
+    def test_max_distance_cutoff(self):
+        tree = KDTree([DHAKA, CHATTOGRAM])
+        km = haversine_km(SYLHET, DHAKA)        # Dhaka is nearer to Sylhet than Chattogram
+        self.assertEqual(tree.nearest(*SYLHET, max_km=km + 1)[0], 0)
+        self.assertIsNone(tree.nearest(*SYLHET, max_km=km - 1))
+        self.assertEqual(tree.nearest(*DHAKA, max_km=0.001), (0, 0.0))
+
+    def test_empty_tree(self):
+        self.assertIsNone(KDTree([]).nearest(*DHAKA))
+
+
+class LocalPlacesGeocoderTests(TestCase):
+    PLACES = (
+        "# comment line\n"
+        "name\tlatitude\tlongitude\tcountry\tdistrict\tupazila\tpostcode\n"
+        "Dhaka\t23.8103\t90.4125\tBangladesh\tDhaka District\tDhaka Sadar\t1000\n"
+        "\n"
+        "Chattogram\t22.3350\t91.8325\tBangladesh\tChattogram District\t\t4000\n"
+    )
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = Path(tmp.name) / "places.tsv"
+        self.path.write_text(self.PLACES, encoding="utf-8")
+
+    def test_nearest_place_within_max_distance(self):
+        geocoder = geocoders.LocalPlacesGeocoder(self.path, max_distance_km=50)
+        self.assertEqual(geocoder.reverse(*NEARBY), {
+            "country": "Bangladesh", "city": "Dhaka District", "thana": "Dhaka Sadar", "post_office": "1000",
+        })
+        # empty upazila falls back to the place name
+        self.assertEqual(geocoder.reverse(22.34, 91.83)["thana"], "Chattogram")
+
+        location, km = geocoder.nearest(*NEARBY)
+        self.assertAlmostEqual(km, haversine_km(NEARBY, DHAKA), places=6)
+
+    def test_nothing_beyond_max_distance(self):
+        geocoder = geocoders.LocalPlacesGeocoder(self.path, max_distance_km=50)
+        self.assertIsNone(geocoder.reverse(*SYLHET))     # ~200 km from both
+        self.assertIsNotNone(geocoders.LocalPlacesGeocoder(self.path, max_distance_km=250).reverse(*SYLHET))
+
+    def test_bundled_places_file_loads(self):
+        geocoder = geocoders.LocalPlacesGeocoder()
+        self.assertEqual(geocoder.reverse(*DHAKA)["country"], "Bangladesh")
+        self.assertEqual(len(geocoder.tree), len(geocoder.places))
+
+
+@override_settings(TRACKING_INGEST={"MODE": "sync"}, TRACKING_GEOCODER={"ENABLED": False})
+class GeocodeWorkerTests(TestCase):
+    """The worker against stub_geocoder, a local stand-in for Nominatim."""
+
+    def setUp(self):
+        self.server = stub_geocoder.serve()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        # providers are shared per process; build ours against the stub
+        patcher = mock.patch.dict(geocoders._providers, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.profile = CustomUser.objects.create_user(email="owner@example.com", username="owner")
+        self.cache = GeocodeCache()
+
+    def worker(self, rate_limit=0):
+        conf = dict(
+            geocoder_settings(), PROVIDERS=["nominatim"], RATE_LIMIT=rate_limit,
+            URL=f"http://127.0.0.1:{self.server.server_port}/reverse",
+        )
+        return GeocodeWorker(conf=conf, cache=self.cache)
+
+    def gps_lead(self, point):
+        return ingest.record(leads=[make_lead(
+            self.profile, location_source="GPS", country=None, city=None,
+            latitude=point[0], longitude=point[1],
+        )])[0]
+
+    def test_leads_in_one_cell_share_a_lookup(self):
+        worker = self.worker()
+        leads = [self.gps_lead(DHAKA), self.gps_lead(NEARBY), self.gps_lead(DHAKA)]
+        submitted = [worker.submit(lead.pk, lead.latitude, lead.longitude) for lead in leads]
+
+        self.assertEqual(submitted, [True, False, False])
+        self.assertEqual(worker.pending(), 3)
+        worker.process(self.cache.cell(*DHAKA))
+
+        self.assertEqual(self.server.hits, 1)
+        self.assertEqual(worker.pending(), 0)
+        located = ContactSaveLead.objects.filter(pk__in=[lead.pk for lead in leads])
+        self.assertEqual(
+            set(located.values_list("country", "city", "thana", "post_office")),
+            {("Bangladesh", "Dhaka District", "Dhaka", "1000")},
+        )
+
+    def test_failed_lookup_does_not_block_its_cell(self):
+        worker = self.worker()
+        first, second = self.gps_lead(DHAKA), self.gps_lead(DHAKA)
+        k = self.cache.cell(*DHAKA)
+
+        worker.submit(first.pk, *DHAKA)
+        with mock.patch.object(worker, "lookup", side_effect=RuntimeError("database is locked")):
+            with self.assertRaises(RuntimeError):
+                worker.process(k)
+        self.assertEqual(worker.pending(), 0)
+
+        self.assertTrue(worker.submit(second.pk, *DHAKA))
+        worker.process(k)
+        self.assertEqual(ContactSaveLead.objects.get(pk=second.pk).country, "Bangladesh")
+
+    def test_remote_lookups_are_rate_limited(self):
+        worker = self.worker(rate_limit=10)      # one request per 0.1 s
+        start = time.monotonic()
+        for point in (DHAKA, CHATTOGRAM, SYLHET):
+            worker.lookup(*point)
+        elapsed = time.monotonic() - start
+
+        self.assertEqual(self.server.hits, 3)
+        self.assertGreaterEqual(elapsed, 0.2)
+
+    def test_cached_cells_skip_the_provider(self):
+        self.worker().lookup(*DHAKA)
+        self.assertEqual(self.server.hits, 1)
+
+        # memory first, then the GeocodeCacheEntry row for a fresh process
+        self.assertEqual(self.worker().lookup(*NEARBY)["country"], "Bangladesh")
+        self.cache = GeocodeCache()
+        self.assertEqual(self.worker().lookup(*DHAKA)["country"], "Bangladesh")
+
+        self.assertEqual(self.server.hits, 1)
+        self.assertEqual(self.cache.stats()["db_hits"], 1)
+
+    def test_overrides_replace_or_refine_the_provider(self):
+        full = dict(country="Bangladesh", city="Dhaka", thana="Gulshan", post_office="1212")
+        self.cache.seed_override(self.cache.cell(*DHAKA)[:6], **full)
+        self.cache.seed_override(self.cache.cell(*CHATTOGRAM)[:6], thana="Kotwali")
+        worker = self.worker()
+
+        # a complete override answers without a request
+        self.assertEqual(worker.lookup(*DHAKA), full)
+        self.assertEqual(self.server.hits, 0)
+
+        # a partial one is laid over the provider's answer
+        location = worker.lookup(*CHATTOGRAM)
+        self.assertEqual(self.server.hits, 1)
+        self.assertEqual(location["thana"], "Kotwali")
+        self.assertEqual(location["city"], "Dhaka District")
+
+
+class GeocodeCacheTests(TestCase):
+    BANANI = {"country": "Bangladesh", "city": "Dhaka District", "thana": "Banani", "post_office": "1213"}
+
+    def cache(self, **conf):
+        return GeocodeCache(conf=dict(cache_settings(), **conf))
+
+    def test_expired_entries_are_misses(self):
+        self.cache().put(*DHAKA, self.BANANI)
+        GeocodeCacheEntry.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        cache = self.cache()
+        self.assertIsNone(cache.get(*DHAKA))
+        self.assertEqual(cache.stats()["misses"], 1)
+
+        # the memory layer honours the TTL as well
+        cache = self.cache(TTL=0)
+        cache.put(*DHAKA, self.BANANI)
+        self.assertIsNone(cache.get(*DHAKA))
+        self.assertEqual((cache.stats()["memory_hits"], cache.stats()["misses"]), (0, 1))
+
+    def test_hits_from_memory_then_db(self):
+        self.cache().put(*DHAKA, self.BANANI)
+        cache = self.cache()
+        self.assertEqual(cache.get(*NEARBY), self.BANANI)     # same cell
+        self.assertEqual(cache.get(*DHAKA), self.BANANI)
+        stats = cache.stats()
+        self.assertEqual((stats["db_hits"], stats["memory_hits"], stats["hit_ratio"]), (1, 1, 1.0))
+        self.assertIsNone(cache.get(*SYLHET))
+
+    def test_trim_keeps_the_most_recently_used_rows(self):
+        points = [(23.70 + i * 0.01, 90.40) for i in range(5)]
+        cache = self.cache(MAX_ROWS=3, TRIM_EVERY=1000)
+        for point in points:
+            cache.put(*point, self.BANANI)
+        now = timezone.now()
+        for age, point in enumerate(reversed(points)):
+            GeocodeCacheEntry.objects.filter(cell=cache.cell(*point)).update(last_used_at=now - timedelta(hours=age))
+        self.cache().get(*points[0])            # oldest, but read just now
+        cache.seed_override(cache.cell(*SYLHET)[:5], thana="Sylhet Sadar")
+
+        self.assertEqual(cache.trim(), 2)
+        kept = set(GeocodeCacheEntry.objects.filter(is_override=False).values_list("cell", flat=True))
+        self.assertEqual(kept, {cache.cell(*p) for p in (points[0], points[3], points[4])})
+        self.assertTrue(GeocodeCacheEntry.objects.filter(is_override=True, cell=cache.cell(*SYLHET)[:5]).exists())
+
+    def test_trim_runs_every_trim_every_writes(self):
+        cache = self.cache(MAX_ROWS=2, TRIM_EVERY=4)
+        for i in range(4):
+            cache.put(23.70 + i * 0.01, 90.40, self.BANANI)
+        self.assertEqual(GeocodeCacheEntry.objects.filter(is_override=False).count(), 2)
+
+    def test_override_beats_a_cached_answer(self):
+        cache = self.cache()
+        cache.put(*DHAKA, self.BANANI)
+        cache.seed_override(cache.cell(*DHAKA)[:6], thana="Gulshan")
+        worker = GeocodeWorker(conf=dict(geocoder_settings(), PROVIDERS=["local"]), cache=cache)
+
+        location = worker.lookup(*DHAKA)
+        self.assertEqual(location["thana"], "Gulshan")
+        self.assertEqual(location["post_office"], "1213")     # the rest still comes from the cache
+        self.assertEqual(cache.stats()["override_hits"], 1)
+
+    def test_seeded_mirzapur_override(self):
+        cache = self.cache()
+        self.assertEqual(cache.override_for(24.17, 90.04), {"thana": "Mirzapur", "city": "Tangail District"})
+        self.assertIsNone(cache.override_for(*DHAKA))
+
+
+@override_settings(TRACKING_INGEST={"MODE": "sync"}, TRACKING_GEOCODER={"ENABLED": False})
+class BackfillBoundariesTests(TestCase):
+    def setUp(self):
+        self.profile = CustomUser.objects.create_user(email="owner@example.com", username="owner")
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        layer = Path(tmp.name) / "thanas.geojson"
+        lat, lon = DHAKA
+        square = [[lon + dx, lat + dy] for dx, dy in ((-.01, -.01), (.01, -.01), (.01, .01), (-.01, .01), (-.01, -.01))]
+        layer.write_text(json.dumps({"type": "FeatureCollection", "features": [{
+            "type": "Feature", "properties": {"name": "Gulshan", "country": "Bangladesh"},
+            "geometry": {"type": "Polygon", "coordinates": [square]},
+        }]}))
+        resolver = BoundaryResolver([{"FILE": layer, "FIELDS": {"thana": "name", "country": "country"}}])
+        patcher = mock.patch(
+            "app_tracking.management.commands.backfill_boundaries.get_resolver", return_value=resolver,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def backfill(self):
+        call_command("backfill_boundaries", stdout=StringIO())
+
+    def thanas(self):
+        row = TopKSketch.objects.get(profile=self.profile, dimension="thana", date=ALL_TIME)
+        return {item: count for item, (count, _) in row.counters.items()}
+
+    def test_only_located_gps_leads_change_and_analytics_follow(self):
+        gps = dict(latitude=DHAKA[0], longitude=DHAKA[1])
+        located, ip, pending = ingest.record(leads=[
+            make_lead(self.profile, location_source="GPS", country="India", thana="Banani", **gps),
+            make_lead(self.profile, location_source="IP", thana="Banani", **gps),
+            make_lead(self.profile, location_source="GPS", country=None, city=None, **gps),
+        ])
+        self.assertEqual(self.thanas(), {"Banani": 2})
+
+        self.backfill()
+
+        self.assertEqual(ContactSaveLead.objects.get(pk=located.pk).thana, "Gulshan")
+        self.assertEqual(ContactSaveLead.objects.get(pk=ip.pk).thana, "Banani")
+        self.assertIsNone(ContactSaveLead.objects.get(pk=pending.pk).thana)
+        # the moved lead left Banani and India behind
+        self.assertEqual(self.thanas(), {"Banani": 1, "Gulshan": 1})
+        rollup = dict(
+            DailyRollup.objects.filter(profile=self.profile, location_source="GPS").values_list("country", "leads")
+        )
+        self.assertEqual(rollup, {"": 1, "Bangladesh": 1})
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        self.profile = CustomUser.objects.create_user(email="owner@example.com", username="owner")
+        self.other = CustomUser.objects.create_user(email="other@example.com", username="other")
+        # three leads in each of two months past retention, one recent lead
+        for when, profile, n in ((datetime(2024, 1, 10, tzinfo=dt_timezone.utc), self.profile, 2),
+                                 (datetime(2024, 1, 20, tzinfo=dt_timezone.utc), self.other, 1),
+                                 (datetime(2024, 2, 5, tzinfo=dt_timezone.utc), self.profile, 3),
+                                 (timezone.now(), self.profile, 1)):
+            ids = [lead.pk for lead in ContactSaveLead.objects.bulk_create(
+                [make_lead(profile, thana=f"Thana {i}") for i in range(n)]
+            )]
+            ContactSaveLead.objects.filter(pk__in=ids).update(timestamp=when)
+        self.old = list(
+            ContactSaveLead.objects.filter(timestamp__year=2024).order_by("pk")
+            .values_list(*archive.columns(ContactSaveLead))
+        )
+
+    def run_archive(self, **kwargs):
+        return archive.archive(days=365, kinds=["leads"], root=self.root, **kwargs)
+
+    def manifest(self):
+        return archive.load_manifest(self.root)["parts"]
+
+    def test_month_is_written_and_recorded_before_anything_is_deleted(self):
+        delete_rows = archive._delete_part_rows
+        seen = []
+
+        def checked_delete(part, chunk_size):
+            on_disk = [p for p in self.manifest() if p["file"] == part["file"]]
+            self.assertEqual(len(on_disk), 1)
+            self.assertFalse(on_disk[0]["deleted"])
+            self.assertTrue((self.root / part["file"]).exists())
+            start, end = archive.month_bounds(part["month"])
+            self.assertEqual(ContactSaveLead.objects.filter(timestamp__range=(start, end)).count(), 3)
+            seen.append(part["month"])
+            return delete_rows(part, chunk_size)
+
+        with mock.patch.object(archive, "_delete_part_rows", checked_delete):
+            out = StringIO()
+            call_command("archive_events", "--kind", "leads", "--days", "365", "--dir", str(self.root), stdout=out)
+        self.assertIn("leads 2024-01: 3 rows", out.getvalue())
+        self.assertIn("leads 2024-02: 3 rows", out.getvalue())
+
+        self.assertEqual(len(self.old), 6)
+        self.assertEqual(seen, ["2024-01", "2024-02"])
+        part = next(p for p in self.manifest() if p["month"] == "2024-01")
+        self.assertTrue(part["deleted"])
+        self.assertEqual(part["rows"], 3)
+        with gzip.open(self.root / part["file"], "rt", encoding="utf-8") as fh:
+            lines = fh.read().splitlines()
+        self.assertEqual(json.loads(lines[0]), {"columns": archive.columns(ContactSaveLead)})
+        self.assertEqual(len(lines), 1 + 3)
+
+        self.assertFalse(ContactSaveLead.objects.filter(timestamp__year=2024).exists())
+        self.assertEqual(ContactSaveLead.objects.count(), 1)
+
+    def test_rerun_finishes_an_interrupted_delete_without_duplicate_parts(self):
+        def crash(part, chunk_size):
+            # one chunk went through, then the process died
+            ContactSaveLead.objects.filter(pk=part["min_id"]).delete()
+            raise RuntimeError("killed")
+
+        with mock.patch.object(archive, "_delete_part_rows", side_effect=crash):
+            with self.assertRaises(RuntimeError):
+                self.run_archive(chunk_size=1)
+        [pending] = self.manifest()
+        self.assertFalse(pending["deleted"])
+        self.assertEqual(ContactSaveLead.objects.filter(timestamp__month=1, timestamp__year=2024).count(), 2)
+
+        report = self.run_archive(chunk_size=1)
+
+        self.assertEqual(report, {"leads": {"2024-02": 3}})
+        parts = self.manifest()
+        self.assertEqual(sorted(p["month"] for p in parts), ["2024-01", "2024-02"])
+        self.assertTrue(all(p["deleted"] for p in parts))
+        self.assertEqual(len(list(self.root.glob("leads/*/part-*.ndjson.gz"))), 2)
+        self.assertFalse(ContactSaveLead.objects.filter(timestamp__year=2024).exists())
+        self.assertEqual(sorted(archive.iter_rows("leads", root=self.root)), self.old)
+
+        # nothing left to do
+        self.assertEqual(self.run_archive(), {"leads": {}})
+        self.assertEqual(len(self.manifest()), 2)
+
+    def test_iter_rows_round_trips(self):
+        self.run_archive()
+
+        self.assertEqual(list(archive.iter_rows("leads", root=self.root)), self.old)
+
+        cols = archive.columns(ContactSaveLead)
+        old = [dict(zip(cols, row)) for row in self.old]
+        picked = archive.iter_rows("leads", ["id", "thana"], profile_ids=[self.other.pk], root=self.root)
+        self.assertEqual(list(picked), [(r["id"], r["thana"]) for r in old if r["profile_id"] == self.other.pk])
+
+        february = datetime(2024, 2, 1, tzinfo=dt_timezone.utc)
+        self.assertEqual(
+            [pk for (pk,) in archive.iter_rows("leads", ["id"], start=february, root=self.root)],
+            [r["id"] for r in old if r["timestamp"] >= february],
+        )
+
+
+class GeoIPTests(TestCase):
+    DHAKA_NET = {
+        "country": "Bangladesh", "country_code": "BD", "city": "Dhaka", "region": "Dhaka Division",
+        "postal_code": "1000", "latitude": 23.7104, "longitude": 90.4074,
+    }
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = write_city_db(Path(tmp.name) / "city.mmdb", {
+            "103.4.144.0/22": self.DHAKA_NET,
+            "27.147.128.0/17": {"country": "Bangladesh", "country_code": "BD"},
+        })
+
+    def service(self, **kwargs):
+        service = geoip.GeoIPService(str(self.path), **kwargs)
+        self.addCleanup(service.close)
+        return service
+
+    def test_hit(self):
+        service = self.service()
+        self.assertEqual(service.lookup("103.4.145.9"), {
+            "country": "Bangladesh", "country_code": "BD", "city": "Dhaka", "region": "Dhaka Division",
+            "postal_code": "1000", "latitude": 23.7104, "longitude": 90.4074,
+        })
+        self.assertEqual(service.lookup("27.147.200.1"), {
+            "country": "Bangladesh", "country_code": "BD", "city": None, "region": None,
+            "postal_code": None, "latitude": None, "longitude": None,
+        })
+
+    def test_misses_and_private_addresses(self):
+        service = self.service()
+        for ip in ("10.0.0.1", "127.0.0.1", "::1", "not an ip", None):
+            with self.subTest(ip=ip):
+                self.assertIsNone(service.lookup(ip))
+        self.assertIsNone(service._reader)          # never needed the database
+        self.assertIsNone(service.lookup("8.8.8.8"))
+        self.assertIsNotNone(service._reader)
+
+    def test_missing_database(self):
+        service = geoip.GeoIPService(str(self.path.with_name("missing.mmdb")))
+        with self.assertLogs("app_tracking.geoip", "WARNING"):
+            self.assertIsNone(service.lookup("103.4.145.9"))
+        self.assertIsNone(service.lookup("103.4.145.10"))   # not retried
+        self.assertTrue(service._failed)
+
+    def test_lru_cache(self):
+        service = self.service(cache_size=2)
+        for ip in ("103.4.145.9", "103.4.145.9", "8.8.8.8", "103.4.145.9", "27.147.200.1", "8.8.8.8"):
+            service.lookup(ip)
+        self.assertEqual(service.stats(), {"hits": 2, "misses": 4, "size": 2, "max_size": 2})
+        service.close()
+        self.assertEqual(service.stats()["size"], 0)
+
+    def test_one_reader_per_process(self):
+        with override_settings(TRACKING_GEOIP={"DATABASE": str(self.path)}), \
+                mock.patch.object(geoip, "_service", None):
+            readers = []
+
+            def look():
+                geoip.lookup("103.4.145.9")
+                readers.append(geoip.get_geoip().reader)
+
+            threads = [threading.Thread(target=look) for _ in range(8)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            self.assertEqual(len(readers), 8)
+            self.assertEqual(len({id(r) for r in readers}), 1)
+            self.assertEqual(geoip.lookup("103.4.145.9")["city"], "Dhaka")
+            geoip.get_geoip().close()
@@ -0,0 +1,9 @@
+from django.urls import path
+
+from . import views
+
+app_name = "app_tracking"
+
+urlpatterns = [
+    path("geocache/stats/", views.geocache_stats, name="geocache_stats"),
+]
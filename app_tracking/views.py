@@ -1,3 +1,11 @@
-from django.shortcuts import render
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
 
-# Create your views here.
+from .geocache import get_cache
+
+
+# ───────────────────────────────────────────────
+@staff_member_required
+def geocache_stats(request):
+    """Hit / miss counters of this worker process's geocode cache."""
+    return JsonResponse(get_cache().stats())
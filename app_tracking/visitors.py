@@ -0,0 +1,37 @@
+# app_tracking/visitors.py
+"""
+Visitor session keys.
+
+A lead and the button clicks that follow it share a session key: a keyed
+hash of (IP, user agent, time window). The window is a fixed bucket of
+settings.TRACKING_INGEST["SESSION_WINDOW"] seconds, so a visit that
+straddles a bucket boundary is split in two, which is fine for "buttons
+this visitor clicked". The IP itself never leaves the hash.
+"""
+import hashlib
+
+from django.conf import settings
+from django.utils import timezone
+
+DEFAULT_WINDOW = 30 * 60
+
+
+def session_window():
+    return int(getattr(settings, "TRACKING_INGEST", {}).get("SESSION_WINDOW", DEFAULT_WINDOW))
+
+
+def session_key(ip, user_agent, when=None, window=None):
+    when = when or timezone.now()
+    bucket = int(when.timestamp()) // (window or session_window())
+    h = hashlib.blake2b(digest_size=16, key=settings.SECRET_KEY.encode()[:64])
+    h.update(f"{ip or ''}\x00{user_agent or ''}\x00{bucket}".encode())
+    return h.hexdigest()
+
+
+def stamp(events, when=None):
+    """Fill session_key on unsaved leads / clicks that do not have one yet."""
+    when = when or timezone.now()
+    window = session_window()
+    for obj in events:
+        if not obj.session_key:
+            obj.session_key = session_key(obj.device_ip, obj.user_agent, obj.timestamp or when, window)
@@ -0,0 +1,91 @@
+# middleware/cache_policy.py
+"""
+Cache-Control per route, from settings.CACHE_POLICY.
+
+"POLICIES" names sets of patch_cache_control() keywords; "ROUTES" maps URL
+names ("app_name:url_name", fnmatch patterns allowed) and "PATHS" maps path
+prefixes (media, which has no URL name) to a policy. Everything else —
+dashboards, APIs, non-GET requests, error responses — gets "DEFAULT".
+
+A view that sets its own Cache-Control header keeps it. A public policy
+is downgraded to private when the response sets a cookie, so shared
+caches never store one visitor's session or CSRF cookie.
+
+Views only compute validators (app_accounts.utils.conditional); the 304
+answers they produce go through here too and get the same policy.
+"""
+from fnmatch import fnmatchcase
+
+from django.conf import settings
+from django.utils.cache import patch_cache_control
+from django.utils.deprecation import MiddlewareMixin
+
+DEFAULTS = {
+    "DEFAULT": "no-store",
+    "POLICIES": {
+        "no-store": {"private": True, "no_store": True},
+        "revalidate": {"private": True, "no_cache": True},
+    },
+    "ROUTES": {},
+    "PATHS": {},
+}
+
+SAFE_METHODS = ("GET", "HEAD")
+CACHEABLE_STATUS = frozenset({200, 203, 206, 301, 302, 304, 307, 308})
+
+
+def cache_policy_settings():
+    conf = dict(DEFAULTS)
+    conf.update(getattr(settings, "CACHE_POLICY", {}))
+    conf["POLICIES"] = {**DEFAULTS["POLICIES"], **conf["POLICIES"]}
+    return conf
+
+
+def route_names(request):
+    """Names a resolved request answers to: "app_name:url_name" and the namespaced view name."""
+    match = getattr(request, "resolver_match", None)
+    if match is None or not match.url_name:
+        return []
+    names = [match.view_name]
+    if match.app_name:
+        names.append(f"{match.app_name}:{match.url_name}")
+    return names
+
+
+def policy_for(request, response, conf=None):
+    """Name of the policy that applies to ``response``."""
+    conf = conf or cache_policy_settings()
+    if request.method not in SAFE_METHODS or response.status_code not in CACHEABLE_STATUS:
+        return conf["DEFAULT"]
+
+    names = route_names(request)
+    for name in names:
+        if name in conf["ROUTES"]:
+            return conf["ROUTES"][name]
+    for pattern, policy in conf["ROUTES"].items():
+        if any(fnmatchcase(name, pattern) for name in names):
+            return policy
+
+    for prefix in sorted(conf["PATHS"], key=len, reverse=True):
+        if request.path.startswith(prefix):
+            return conf["PATHS"][prefix]
+    return conf["DEFAULT"]
+
+
+def directives(policy, response, conf=None):
+    conf = conf or cache_policy_settings()
+    kwargs = dict(conf["POLICIES"][policy])
+    if kwargs.get("public") and response.cookies:
+        kwargs.pop("public")
+        kwargs.pop("s_maxage", None)
+        kwargs["private"] = True
+    return kwargs
+
+
+class CachePolicyMiddleware(MiddlewareMixin):
+    def process_response(self, request, response):
+        if response.has_header("Cache-Control"):
+            return response
+        conf = cache_policy_settings()
+        patch_cache_control(response, **directives(policy_for(request, response, conf), response, conf))
+        return response
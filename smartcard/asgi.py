@@ -2,6 +2,8 @@
 ASGI config for smartcard project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve it (e.g. ``uvicorn smartcard.asgi:application``) for the live
+dashboard's Server-Sent Events stream.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
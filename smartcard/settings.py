@@ -35,6 +35,10 @@ INSTALLED_APPS = [
     "app_pages",
     "app_contacts",
     "app_settings",
+    # analytics before tracking: its events_ingested receivers must run
+    # before the geocode worker can report leads_located
+    "app_analytics",
+    "app_tracking",
 
     # 🔹 Django Apps
     "django.contrib.admin",
@@ -53,6 +57,8 @@ INSTALLED_APPS = [
 # --------------------------------------------------
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    # outside session / CSRF so it sees the cookies they set
+    "middleware.cache_policy.CachePolicyMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -62,10 +68,13 @@ MIDDLEWARE = [
 ]
 
 # --------------------------------------------------
-# URL / WSGI
+# URL / WSGI / ASGI
 # --------------------------------------------------
 ROOT_URLCONF = "smartcard.urls"
 WSGI_APPLICATION = "smartcard.wsgi.application"
+# live dashboard streams (SSE) need the ASGI entry point, e.g.
+#   uvicorn smartcard.asgi:application
+ASGI_APPLICATION = "smartcard.asgi.application"
 
 # --------------------------------------------------
 # TEMPLATES
@@ -98,6 +107,15 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        # the tracking flusher and geocode worker write from their own
+        # threads while requests write too, and the rollup receivers read
+        # before they write: take the write lock when the transaction
+        # starts (and wait up to 20s for it) instead of failing with
+        # "database is locked" when a read lock is upgraded
+        "OPTIONS": {
+            "transaction_mode": "IMMEDIATE",
+            "timeout": 20,
+        },
     }
 }
 
@@ -151,6 +169,189 @@ MEDIA_ROOT = BASE_DIR / "media"
 EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
 DEFAULT_FROM_EMAIL = "SmartCard <no-reply@example.com>"
 
+# --------------------------------------------------
+# ANALYTICS
+# --------------------------------------------------
+# derived rows are not backfilled by migrations: run
+# `manage.py rebuild_rollups` once after migrating on deploy
+ANALYTICS_TIME_ZONE = "Asia/Dhaka"   # rollup day boundaries
+ANALYTICS_BUTTON_TYPES = ["connect", "save", "call"]   # click_stats on the dashboard
+ANALYTICS_TOPK_CAPACITY = 32   # Space-Saving counters per top-K sketch
+ANALYTICS_HEATMAP_PRECISIONS = [2, 3, 4, 5, 6, 7]   # geohash lengths binned at ingest
+
+# --------------------------------------------------
+# CACHES
+# --------------------------------------------------
+# "pages" is on disk so every worker (and warm_profile_pages) shares it
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "pages": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.getenv("PAGE_CACHE_DIR", str(BASE_DIR / "cache" / "pages")),
+        "OPTIONS": {"MAX_ENTRIES": 20000},
+    },
+}
+
+# rendered public_profile pages (app_accounts.pagecache)
+PUBLIC_PROFILE_CACHE = {
+    "ENABLED": True,
+    "CACHE": "pages",
+    "TIMEOUT": 60 * 60 * 24,
+}
+
+# vCard downloads (app_accounts.vcard), cached per (profile, updated_at)
+VCARD = {
+    "VERSION": "3.0",
+    "CACHE": "pages",
+    "PHOTO_SIZE": 256,
+}
+
+# rendered QR codes on disk, keyed by target URL + options (app_accounts.qr)
+QR_CODES = {
+    "DIR": os.getenv("QR_CACHE_DIR", str(BASE_DIR / "cache" / "qr")),
+    "SIZE": 10,
+    "ERROR_CORRECTION": "M",
+    "FORMAT": "png",
+}
+
+# resized WebP/JPEG copies of profile pictures and logos (app_accounts.derivatives)
+IMAGE_DERIVATIVES = {
+    "ENABLED": True,
+    "MODE": os.getenv("IMAGE_DERIVATIVES_MODE", "pool"),
+    "WORKERS": int(os.getenv("IMAGE_DERIVATIVES_WORKERS", "2")),
+    "SIZES": {"avatar": 128, "card": 400, "full": 1200},
+    "FORMATS": ["webp", "jpeg"],
+    "FORMAT": "webp",
+}
+
+# --------------------------------------------------
+# HTTP CACHE POLICY (middleware.cache_policy)
+# --------------------------------------------------
+# Cache-Control per URL name; unlisted routes (dashboards, APIs) get DEFAULT
+CACHE_POLICY = {
+    "DEFAULT": "no-store",
+    "POLICIES": {
+        "no-store": {"private": True, "no_store": True},
+        "revalidate": {"private": True, "no_cache": True},
+        "public": {"public": True, "max_age": 300, "stale_while_revalidate": 3600},
+        "private-file": {"private": True, "max_age": 86400},
+        "media": {"public": True, "max_age": 3600, "stale_while_revalidate": 86400},
+        "immutable": {"public": True, "max_age": 60 * 60 * 24 * 365, "immutable": True},
+    },
+    "ROUTES": {
+        # the page carries a per-visitor CSRF token: browser cache + ETag only
+        "app_accounts:public_profile": "revalidate",
+        "app_accounts:public_profile_by_id": "public",
+        "app_accounts:download_contact_vcard": "public",
+        "app_accounts:download_qr": "private-file",
+        "app_accounts:profile_live_events": "revalidate",
+        "app_pages:company_public_slug": "public",
+        "app_pages:company_public_uid": "public",
+    },
+    "PATHS": {
+        MEDIA_URL: "media",
+        MEDIA_URL + "derived/": "immutable",    # content-hashed (app_accounts.derivatives)
+    },
+}
+
+# --------------------------------------------------
+# PROFILE VIEW COUNTERS (app_accounts.counters)
+# --------------------------------------------------
+VIEW_COUNTERS = {
+    "MODE": "buffered",      # "sync" → one UPDATE per view
+    "FLUSH_INTERVAL": 5.0,   # seconds
+    "MAX_PENDING": 1000,
+}
+
+# jobs run by `python manage.py run_scheduler`
+SCHEDULED_JOBS = {
+    "rollover_view_counters": {"CALLABLE": "app_accounts.counters.rollover", "EVERY": 3600},
+    "archive_tracking_events": {"CALLABLE": "app_tracking.archive.run", "EVERY": 86400},
+}
+
+# --------------------------------------------------
+# TRACKING ARCHIVE (app_tracking.archive)
+# --------------------------------------------------
+# leads / clicks older than RETENTION_DAYS move to gzip'd NDJSON month
+# partitions (manage.py archive_events); rollups and sketches keep them counted
+TRACKING_ARCHIVE = {
+    "DIR": os.getenv("TRACKING_ARCHIVE_DIR", str(BASE_DIR / "archive")),
+    "RETENTION_DAYS": 365,
+    "CHUNK_SIZE": 2000,
+}
+
+# --------------------------------------------------
+# TRACKING INGESTION
+# --------------------------------------------------
+# "buffered" → hits are queued and bulk_create()d by a background flusher;
+#               analytics receivers run once per batch, off the request
+# "sync"     → each hit and all its analytics writes happen in the request
+TRACKING_INGEST = {
+    "MODE": os.getenv("TRACKING_INGEST_MODE", "buffered"),
+    "BATCH_SIZE": 200,
+    "FLUSH_INTERVAL": 1.0,   # seconds
+    "MAX_QUEUE": 10000,
+    "SESSION_WINDOW": 1800,   # seconds; leads and clicks in one window share a session_key
+}
+
+# --------------------------------------------------
+# LIVE DASHBOARD (Server-Sent Events, app_tracking.live)
+# --------------------------------------------------
+# BROKER: LocalBroker fans out inside one process (single ASGI worker);
+# swap in a shared broker with the same interface for several workers
+TRACKING_LIVE = {
+    "BROKER": "app_tracking.live.LocalBroker",
+    "QUEUE_SIZE": 100,
+    "KEEPALIVE": 15,     # seconds
+    "MAX_AGE": 300,      # seconds; the browser reconnects after this
+}
+
+# --------------------------------------------------
+# GPS REVERSE GEOCODING (background worker)
+# --------------------------------------------------
+# PROVIDERS are tried in order: "local" (bundled places file + KD-tree,
+# works offline), "nominatim" (HTTP, only asked when local has no place
+# within MAX_DISTANCE_KM) or a dotted BaseGeocoder path.
+TRACKING_GEOCODER = {
+    "ENABLED": True,
+    "PROVIDERS": os.getenv("TRACKING_GEOCODER_PROVIDERS", "local,nominatim").split(","),
+    "PLACES_FILE": os.getenv("TRACKING_PLACES_FILE") or None,
+    "MAX_DISTANCE_KM": 50,
+    "URL": os.getenv("TRACKING_GEOCODER_URL", "https://nominatim.openstreetmap.org/reverse"),
+    "USER_AGENT": "SmartCard-GPS-Tracker/4.0",
+    "TIMEOUT": 5,
+    "RATE_LIMIT": 1.0,       # requests / second
+}
+
+# geohash-keyed reverse geocode cache (memory LRU + GeocodeCacheEntry table)
+TRACKING_GEOCACHE = {
+    "PRECISION": 7,               # ~150 m cells
+    "TTL": 60 * 60 * 24 * 30,     # 30 days
+    "MEMORY_SIZE": 5000,
+    "MAX_ROWS": 100000,
+}
+
+# admin boundary polygons (GeoJSON) refining thana / city / post_office;
+# FIELDS maps ContactSaveLead fields → feature properties
+TRACKING_BOUNDARIES = {
+    "LAYERS": [
+        # {"FILE": BASE_DIR / "geo" / "bd_upazilas.geojson",
+        #  "FIELDS": {"thana": "ADM3_EN", "city": "ADM2_EN"}},
+        # {"FILE": BASE_DIR / "geo" / "bd_post_offices.geojson",
+        #  "FIELDS": {"post_office": "postcode"}},
+    ],
+}
+
+# --------------------------------------------------
+# GEOIP (IP fallback for track_visit)
+# --------------------------------------------------
+TRACKING_GEOIP = {
+    "DATABASE": os.getenv("GEOIP_DATABASE", str(BASE_DIR / "geoip" / "GeoLite2-City.mmdb")),
+    "CACHE_SIZE": 10000,     # ip → location LRU per worker process
+}
+
 # --------------------------------------------------
 # DEFAULT PK
 # --------------------------------------------------
@@ -38,6 +38,9 @@ urlpatterns = [
 
     # ⚙️ Settings
     path('settings/', include('app_settings.urls')),
+
+    # 📡 Tracking internals
+    path('tracking/', include('app_tracking.urls')),
 ]
 
 if settings.DEBUG: